@@ -0,0 +1,57 @@
+"""Measure the per-request overhead of ``BasicAuthProvider.authenticate_request``.
+
+Compares the cached header against re-encoding the credentials on every request, which is what
+the provider used to do.
+
+Usage: python benchmarks/bench_basic_auth.py [--requests 200000]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Optional
+
+from kiota_abstractions.method import Method
+from kiota_abstractions.request_information import RequestInformation
+from rich import print as rprint
+
+from ditto_client.basic_auth import BasicAuthProvider, _build_auth_header
+
+
+class _UncachedBasicAuthProvider(BasicAuthProvider):
+    def __init__(self, user_name: str, password: str) -> None:
+        super().__init__(user_name, password)
+        self._password = password
+
+    async def authenticate_request(
+        self,
+        request: RequestInformation,
+        additional_authentication_context: Optional[dict[str, Any]] = None,
+    ) -> None:
+        request.headers.add("Authorization", _build_auth_header(self._user_name, self._password))
+
+
+async def _run(provider: BasicAuthProvider, requests: int) -> float:
+    request_infos = [RequestInformation(Method.GET, "{+baseurl}/api/2/things") for _ in range(requests)]
+
+    started = time.perf_counter()
+    for request_info in request_infos:
+        await provider.authenticate_request(request_info)
+    return time.perf_counter() - started
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    uncached = await _run(_UncachedBasicAuthProvider("ditto", "ditto"), args.requests)
+    cached = await _run(BasicAuthProvider("ditto", "ditto"), args.requests)
+
+    rprint(f"per-request encoding : {uncached / args.requests * 1e9:8.0f} ns/request")
+    rprint(f"cached header        : {cached / args.requests * 1e9:8.0f} ns/request")
+    rprint(f"speed-up             : {uncached / cached:8.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""Measure the CLI import time with ``python -X importtime`` and guard against regressions.
+
+Fails when importing ``ditto_client.__main__`` pulls in one of the heavy dependencies that the
+command groups load on demand, or when the median import time exceeds ``--budget-ms``.
+
+Usage: python benchmarks/bench_cli_startup.py [--runs 5] [--budget-ms 500]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+from rich import print as rprint
+
+# Modules that only the command groups may import
+_LAZY_MODULES = (
+    "httpx",
+    "jsonpatch",
+    "kiota_abstractions",
+    "kiota_http",
+    "kiota_serialization_json",
+    "rich.console",
+    "ditto_client.generated",
+    "ditto_client.cli._thing",
+)
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """Return the cumulative import time in microseconds of every module imported by ``module``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=500.0)
+    args = parser.parse_args()
+
+    runs = [_import_times("ditto_client.__main__") for _ in range(args.runs)]
+    median_ms = statistics.median(times["ditto_client.__main__"] for times in runs) / 1000
+
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)[1:6]
+    rprint(f"ditto_client.__main__ : {median_ms:8.1f} ms (median of {args.runs})")
+    for name, cumulative in slowest:
+        rprint(f"  {name:<40}{cumulative / 1000:8.1f} ms")
+
+    eager = sorted(name for name in runs[-1] if name.startswith(_LAZY_MODULES))
+    failed = False
+    if eager:
+        rprint(f"[red]Imported eagerly: {', '.join(eager)}[/red]")
+        failed = True
+    if median_ms > args.budget_ms:
+        rprint(f"[red]Import time {median_ms:.1f} ms exceeds the budget of {args.budget_ms:.0f} ms[/red]")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
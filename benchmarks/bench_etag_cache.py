@@ -0,0 +1,95 @@
+"""Measure repeated reads of unchanged things with and without the ETag revalidation cache.
+
+Things are served by an in-process ``httpx.MockTransport`` that answers ``If-None-Match`` with
+``304 Not Modified``, like Ditto does for unchanged things.
+
+Usage: python benchmarks/bench_etag_cache.py [--things 500] [--rounds 10]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Optional
+
+import httpx
+from kiota_abstractions.authentication.anonymous_authentication_provider import AnonymousAuthenticationProvider
+from kiota_http.kiota_client_factory import KiotaClientFactory
+from rich import print as rprint
+
+from ditto_client.etag_cache import ETagCache, ETagCacheMiddleware
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.request_adapter import DittoRequestAdapter
+
+
+class _Server:
+    def __init__(self) -> None:
+        self.bytes_sent = 0
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        thing_id = request.url.path.rsplit("/", 1)[-1]
+        etag = f'"rev:{len(thing_id)}"'
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+
+        thing = {
+            "thingId": thing_id,
+            "policyId": "org.acme:policy",
+            "attributes": {"serial": thing_id, "location": {"building": "B1", "floor": 3}},
+            "features": {
+                f"sensor-{i}": {"properties": {"value": i * 1.5, "unit": "C", "status": "ok"}} for i in range(20)
+            },
+        }
+        body = json.dumps(thing).encode()
+        self.bytes_sent += len(body)
+        return httpx.Response(200, content=body, headers={"Content-Type": "application/json", "ETag": etag})
+
+
+def _create_client(server: _Server, cache: Optional[ETagCache]) -> DittoClient:
+    middleware = KiotaClientFactory.get_default_middleware(None)
+    if cache is not None:
+        middleware = [ETagCacheMiddleware(cache), *middleware]
+
+    http_client = KiotaClientFactory.create_with_custom_middleware(
+        middleware, client=httpx.AsyncClient(transport=httpx.MockTransport(server.handle))
+    )
+    request_adapter = DittoRequestAdapter(AnonymousAuthenticationProvider(), http_client=http_client)
+    request_adapter.base_url = "http://localhost:8080"
+    return DittoClient(request_adapter)
+
+
+async def _run(cache: Optional[ETagCache], things: int, rounds: int) -> tuple[float, int]:
+    server = _Server()
+    client = _create_client(server, cache)
+    builder = client.api.two.things
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for i in range(things):
+            await builder.by_thing_id(f"org.acme:device-{i}").get()
+    return time.perf_counter() - started, server.bytes_sent
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--things", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    reads = args.things * args.rounds
+    results = {
+        "no cache": await _run(None, args.things, args.rounds),
+        "ETag cache": await _run(ETagCache(), args.things, args.rounds),
+        "ETag cache, shared models": await _run(ETagCache(share_models=True), args.things, args.rounds),
+    }
+
+    baseline = results["no cache"][0]
+    for name, (elapsed, bytes_sent) in results.items():
+        rprint(
+            f"{name:<26}: {elapsed / reads * 1e6:8.1f} us/read  {bytes_sent / 1e6:8.2f} MB sent"
+            f"  {baseline / elapsed:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
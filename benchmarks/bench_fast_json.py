@@ -0,0 +1,68 @@
+"""Compare kiota's JsonParseNode against ``ditto_client.fast_json`` on a 10k-thing search page.
+
+Usage: python benchmarks/bench_fast_json.py [--things 10000] [--repeat 5]
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+from typing import Any
+
+from kiota_serialization_json.json_parse_node_factory import JsonParseNodeFactory
+from rich import print as rprint
+
+from ditto_client.fast_json import decode_search_result_things
+from ditto_client.generated.models.search_result_things import SearchResultThings
+
+
+def _build_payload(things: int) -> bytes:
+    items = [
+        {
+            "thingId": f"org.acme:device-{i}",
+            "policyId": "org.acme:policy",
+            "definition": "org.acme:sensor:1.0.0",
+            "attributes": {"serial": f"SN{i:08d}", "location": {"building": "B1", "floor": i % 12}},
+            "features": {
+                "temperature": {"properties": {"value": 21.5 + i % 7, "unit": "C", "updated": "2024-01-01T00:00:00Z"}},
+                "battery": {"properties": {"level": i % 100, "charging": bool(i % 2)}},
+            },
+        }
+        for i in range(things)
+    ]
+    return json.dumps({"items": items, "cursor": "LOREMIPSUM"}).encode()
+
+
+def _decode_with_kiota(payload: bytes) -> SearchResultThings:
+    root_node = JsonParseNodeFactory().get_root_parse_node("application/json", payload)
+    return root_node.get_object_value(SearchResultThings)
+
+
+def _best_of(decoder: Callable[[bytes], Any], payload: bytes, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        decoder(payload)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--things", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = _build_payload(args.things)
+    rprint(f"Payload: {args.things} things, {len(payload) / 1024 / 1024:.1f} MiB")
+
+    kiota = _best_of(_decode_with_kiota, payload, args.repeat)
+    fast = _best_of(decode_search_result_things, payload, args.repeat)
+
+    rprint(f"kiota JsonParseNode : {kiota * 1000:8.1f} ms ({args.things / kiota:,.0f} things/s)")
+    rprint(f"fast_json           : {fast * 1000:8.1f} ms ({args.things / fast:,.0f} things/s)")
+    rprint(f"speed-up            : {kiota / fast:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
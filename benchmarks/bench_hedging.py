@@ -0,0 +1,90 @@
+"""Measure tail latency of thing reads with and without hedging against a gateway with slow outliers.
+
+The in-process ``httpx.MockTransport`` answers after ``--latency`` seconds, except for a
+``--slow-ratio`` share of the requests taking ``--slow-latency`` seconds, like reads hitting a
+busy shard or a garbage collection pause.
+
+Usage: python benchmarks/bench_hedging.py [--requests 2000] [--concurrency 4] [--slow-ratio 0.03]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Optional
+
+import httpx
+from kiota_abstractions.authentication.anonymous_authentication_provider import AnonymousAuthenticationProvider
+from kiota_http.kiota_client_factory import KiotaClientFactory
+from rich import print as rprint
+
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.hedging import HedgingMiddleware, HedgingPolicy
+from ditto_client.request_adapter import DittoRequestAdapter
+
+
+class _Server:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.requests = 0
+        self.random = random.Random(42)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        slow = self.random.random() < self.args.slow_ratio
+        await asyncio.sleep(self.args.slow_latency if slow else self.args.latency)
+        return httpx.Response(200, json={"thingId": request.url.path.rsplit("/", 1)[-1]})
+
+
+def _create_client(server: _Server, hedging: Optional[HedgingMiddleware]) -> DittoClient:
+    middleware = KiotaClientFactory.get_default_middleware(None)
+    if hedging is not None:
+        middleware.insert(0, hedging)
+    http_client = KiotaClientFactory.create_with_custom_middleware(
+        middleware, client=httpx.AsyncClient(transport=httpx.MockTransport(server.handle))
+    )
+    request_adapter = DittoRequestAdapter(AnonymousAuthenticationProvider(), http_client=http_client)
+    request_adapter.base_url = "http://localhost:8080"
+    return DittoClient(request_adapter)
+
+
+async def _run(name: str, hedging: Optional[HedgingMiddleware], args: argparse.Namespace) -> None:
+    server = _Server(args)
+    builder = _create_client(server, hedging).api.two.things
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+
+    async def _read(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await builder.by_thing_id(f"org.acme:device-{i}").get()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(_read(i) for i in range(args.requests)))
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    extra = server.requests / args.requests - 1
+    rprint(
+        f"{name:<12}: p50 {quantiles[49] * 1000:6.1f} ms  p99 {quantiles[98] * 1000:6.1f} ms  "
+        f"max {max(latencies) * 1000:6.1f} ms  {extra:5.1%} extra requests"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--slow-latency", type=float, default=0.1)
+    parser.add_argument("--slow-ratio", type=float, default=0.03)
+    args = parser.parse_args()
+
+    await _run("no hedging", None, args)
+    hedging = HedgingMiddleware(HedgingPolicy(percentile=95))
+    await _run("hedged", hedging, args)
+    rprint(hedging.stats)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
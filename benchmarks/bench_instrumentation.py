@@ -0,0 +1,77 @@
+"""Measure the overhead of request instrumentation and show where the time of a thing read goes.
+
+The in-process ``httpx.MockTransport`` answers after ``--latency`` seconds with a thing of
+``--features`` features, so deserialization has some work to do.
+
+Usage: python benchmarks/bench_instrumentation.py [--requests 5000] [--latency 0.0] [--features 20]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Optional
+
+import httpx
+from kiota_abstractions.authentication.anonymous_authentication_provider import AnonymousAuthenticationProvider
+from kiota_http.kiota_client_factory import KiotaClientFactory
+from rich import print as rprint
+
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.instrumentation import PHASES, Instrumentation
+from ditto_client.request_adapter import DittoRequestAdapter
+
+
+def _create_client(args: argparse.Namespace, instrumentation: Optional[Instrumentation]) -> DittoClient:
+    thing = {
+        "thingId": "org.acme:device-1",
+        "policyId": "org.acme:policy",
+        "attributes": {"manufacturer": "ACME", "serial": "1234"},
+        "features": {f"sensor-{i}": {"properties": {"value": i, "unit": "°C"}} for i in range(args.features)},
+    }
+
+    async def _handle(request: httpx.Request) -> httpx.Response:
+        if args.latency:
+            await asyncio.sleep(args.latency)
+        return httpx.Response(200, json=thing)
+
+    http_client = KiotaClientFactory.create_with_custom_middleware(
+        KiotaClientFactory.get_default_middleware(None),
+        client=httpx.AsyncClient(transport=httpx.MockTransport(_handle)),
+    )
+    request_adapter = DittoRequestAdapter(AnonymousAuthenticationProvider(), http_client=http_client)
+    request_adapter.base_url = "http://localhost:8080"
+    request_adapter.instrumentation = instrumentation
+    return DittoClient(request_adapter)
+
+
+async def _run(name: str, args: argparse.Namespace, instrumentation: Optional[Instrumentation]) -> None:
+    builder = _create_client(args, instrumentation).api.two.things
+    started = time.perf_counter()
+    for i in range(args.requests):
+        await builder.by_thing_id(f"org.acme:device-{i}").get()
+    elapsed = time.perf_counter() - started
+    rprint(f"{name:<16}: {elapsed / args.requests * 1e6:7.1f} µs per request")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--features", type=int, default=20)
+    args = parser.parse_args()
+
+    # Warm up imports and caches so that the first measurement is not penalized
+    await _create_client(args, None).api.two.things.by_thing_id("org.acme:device-0").get()
+    await _run("uninstrumented", args, None)
+    instrumentation = Instrumentation()
+    await _run("instrumented", args, instrumentation)
+
+    for (method, route), stats in instrumentation.routes.items():
+        rprint(f"{method} {route}: {stats.count} requests, {stats.bytes_received / stats.count:.0f} bytes each")
+        for phase in PHASES:
+            histogram = stats.phases[phase]
+            rprint(f"  {phase:<16}: {histogram.sum / histogram.count * 1e6:7.1f} µs mean")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+"""Measure optimistic read-modify-write throughput and retry rates under contention.
+
+Concurrent writers increment a counter attribute of a few hot things served by an in-process
+``httpx.MockTransport`` that, like Ditto, bumps the revision on every write and answers writes
+whose ``If-Match`` or ``condition`` is out of date with ``412 Precondition Failed``. Unconditional
+read-modify-writes are run for comparison and lose updates.
+
+Usage: python benchmarks/bench_optimistic_update.py [--writers 1,4,16,64] [--increments 20] [--things 1]
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+from typing import Any
+
+import httpx
+from kiota_abstractions.authentication.anonymous_authentication_provider import AnonymousAuthenticationProvider
+from kiota_abstractions.base_request_configuration import RequestConfiguration
+from kiota_http.kiota_client_factory import KiotaClientFactory
+from rich import print as rprint
+
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.generated.models.patch_thing import PatchThing
+from ditto_client.merge_patch import apply_merge_patch
+from ditto_client.optimistic import Precondition, update_thing
+from ditto_client.raw import raw_json_option
+from ditto_client.request_adapter import DittoRequestAdapter
+
+_LATENCY = 0.001
+_CONDITION = re.compile(r"eq\(_revision,(\d+)\)")
+
+
+class _Server:
+    def __init__(self, things: int) -> None:
+        self.things: dict[str, dict[str, Any]] = {
+            f"org.acme:device-{i}": {"thingId": f"org.acme:device-{i}", "attributes": {"counter": 0}}
+            for i in range(things)
+        }
+        self.revisions = dict.fromkeys(self.things, 1)
+
+    def counters(self) -> int:
+        return sum(thing["attributes"]["counter"] for thing in self.things.values())
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(_LATENCY)
+        thing_id = request.url.path.rsplit("/", 1)[-1]
+        etag = f'"rev:{self.revisions[thing_id]}"'
+        if request.method == "GET":
+            return httpx.Response(200, json=self.things[thing_id], headers={"ETag": etag})
+
+        condition = _CONDITION.fullmatch(request.url.params.get("condition", ""))
+        if_match = request.headers.get("if-match")
+        if (if_match and if_match != etag) or (condition and int(condition.group(1)) != self.revisions[thing_id]):
+            error = {"status": 412, "error": "things:precondition.failed", "message": "The precondition failed."}
+            return httpx.Response(412, json=error)
+
+        self.things[thing_id] = apply_merge_patch(self.things[thing_id], json.loads(request.content))
+        self.revisions[thing_id] += 1
+        return httpx.Response(204)
+
+
+def _create_client(server: _Server) -> DittoClient:
+    http_client = KiotaClientFactory.create_with_custom_middleware(
+        KiotaClientFactory.get_default_middleware(None),
+        client=httpx.AsyncClient(transport=httpx.MockTransport(server.handle)),
+    )
+    request_adapter = DittoRequestAdapter(AnonymousAuthenticationProvider(), http_client=http_client)
+    request_adapter.base_url = "http://localhost:8080"
+    return DittoClient(request_adapter)
+
+
+def _increment(thing: Any) -> dict[str, Any]:
+    return {"attributes": {"counter": thing["attributes"]["counter"] + 1}}
+
+
+async def _unconditional_increment(client: DittoClient, thing_id: str) -> None:
+    builder = client.api.two.things.by_thing_id(thing_id)
+    thing = await builder.get(request_configuration=RequestConfiguration(options=[raw_json_option()]))
+    await builder.patch(PatchThing(additional_data=_increment(thing)))
+
+
+async def _run(mode: str, writers: int, increments: int, things: int) -> tuple[float, int, int]:
+    server = _Server(things)
+    client = _create_client(server)
+    conflicts = 0
+
+    async def _writer(index: int) -> None:
+        nonlocal conflicts
+        thing_id = f"org.acme:device-{index % things}"
+        for _ in range(increments):
+            if mode == "unconditional":
+                await _unconditional_increment(client, thing_id)
+            else:
+                result = await update_thing(
+                    client, thing_id, _increment, precondition=Precondition(mode), max_attempts=10_000
+                )
+                conflicts += result.conflicts
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_writer(i) for i in range(writers)))
+    elapsed = time.perf_counter() - started
+    lost = writers * increments - server.counters()
+    return elapsed, conflicts, lost
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", default="1,4,16,64")
+    parser.add_argument("--increments", type=int, default=20)
+    parser.add_argument("--things", type=int, default=1)
+    args = parser.parse_args()
+
+    for writers in (int(value) for value in args.writers.split(",")):
+        writes = writers * args.increments
+        for mode in ("unconditional", Precondition.IfMatch.value, Precondition.Condition.value):
+            elapsed, conflicts, lost = await _run(mode, writers, args.increments, args.things)
+            rprint(
+                f"{writers:3d} writers  {mode:<13}: {writes / elapsed:8.0f} writes/s"
+                f"  {conflicts / writes:6.2f} retries/write  {lost:5d} lost updates"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""Measure the client-side overhead of a ``by_thing_id(...).get()`` call.
+
+Requests go to an in-process ``httpx.MockTransport``, so the numbers are pure client overhead:
+builder navigation, URL template expansion, request building and response parsing. Compares the
+stock ``HttpxRequestAdapter`` with ``DittoRequestAdapter`` and a full navigation chain with a
+reused ``things`` builder.
+
+Usage: python benchmarks/bench_request_builder.py [--requests 5000]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections.abc import Awaitable, Callable
+
+import httpx
+from kiota_abstractions.authentication.anonymous_authentication_provider import AnonymousAuthenticationProvider
+from kiota_http.httpx_request_adapter import HttpxRequestAdapter
+from rich import print as rprint
+
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.request_adapter import DittoRequestAdapter
+
+_THING = json.dumps({"thingId": "org.acme:device", "policyId": "org.acme:policy", "attributes": {"serial": 1}})
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, content=_THING, headers={"Content-Type": "application/json"})
+
+
+def _create_client(adapter_class: type[HttpxRequestAdapter]) -> DittoClient:
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    request_adapter = adapter_class(AnonymousAuthenticationProvider(), http_client=http_client)
+    request_adapter.base_url = "http://localhost:8080"
+    return DittoClient(request_adapter)
+
+
+async def _run(call: Callable[[int], Awaitable[object]], requests: int) -> float:
+    started = time.perf_counter()
+    for i in range(requests):
+        await call(i)
+    return (time.perf_counter() - started) / requests
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5_000)
+    args = parser.parse_args()
+
+    stock = _create_client(HttpxRequestAdapter)
+    compiled = _create_client(DittoRequestAdapter)
+    things = compiled.api.two.things
+
+    baseline = await _run(lambda i: stock.api.two.things.by_thing_id(f"org.acme:device-{i}").get(), args.requests)
+    templates = await _run(lambda i: compiled.api.two.things.by_thing_id(f"org.acme:device-{i}").get(), args.requests)
+    reused = await _run(lambda i: things.by_thing_id(f"org.acme:device-{i}").get(), args.requests)
+
+    rprint(f"HttpxRequestAdapter               : {baseline * 1e6:8.1f} us/request")
+    rprint(f"DittoRequestAdapter               : {templates * 1e6:8.1f} us/request")
+    rprint(f"DittoRequestAdapter, reused prefix: {reused * 1e6:8.1f} us/request")
+    rprint(f"speed-up                          : {baseline / reused:8.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
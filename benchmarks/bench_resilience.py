@@ -0,0 +1,106 @@
+"""Run a read workload against ``MockDitto`` with injected faults, with and without the resilience middleware.
+
+Thing reads and searches run against a mock answering with ``--latency`` seconds of latency, ``503``
+for ``--error-rate`` of the requests and connection errors for ``--connect-error-rate``. During the
+middle third of the run the search service is down entirely. Faults are drawn from a seeded
+generator, so runs are reproducible.
+
+Usage: python benchmarks/bench_resilience.py [--operations 3000] [--concurrency 32] [--error-rate 0.05]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from kiota_http.kiota_client_factory import KiotaClientFactory
+from kiota_http.middleware.middleware import BaseMiddleware
+from kiota_http.middleware.retry_handler import RetryHandler
+from mock_ditto import Fault, MockDitto
+from rich import print as rprint
+
+from ditto_client.circuit_breaker import CircuitBreakerMiddleware, CircuitOpenError
+from ditto_client.retry import RetryBudget, RetryMiddleware, RetryPolicy
+from ditto_client.search import count_things
+
+_SEARCH_ROUTE = "/api/2/search/things/count"
+
+
+async def _run(name: str, extra_middleware: list[BaseMiddleware], args: argparse.Namespace) -> None:
+    fault = Fault(
+        latency=args.latency,
+        jitter=args.latency,
+        error_rate=args.error_rate,
+        connect_error_rate=args.connect_error_rate,
+    )
+    ditto = MockDitto(fault=fault, seed=args.seed)
+    thing_ids = ditto.populate(1000)
+    middleware = [m for m in KiotaClientFactory.get_default_middleware(None) if not isinstance(m, RetryHandler)]
+    client = ditto.create_client([*extra_middleware, *middleware])
+
+    operations = random.Random(args.seed)
+    plan = [(operations.random() < 0.2, operations.choice(thing_ids)) for _ in range(args.operations)]
+    outage = Fault(latency=args.latency, error_rate=1.0)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    succeeded = fast_failures = 0
+    done = 0
+
+    async def _operation(search: bool, thing_id: str) -> None:
+        nonlocal succeeded, fast_failures, done
+        async with semaphore:
+            # The search service is down during the middle third of the run
+            if args.operations // 3 <= done < 2 * args.operations // 3:
+                ditto.route_faults[_SEARCH_ROUTE] = outage
+            else:
+                ditto.route_faults.pop(_SEARCH_ROUTE, None)
+            try:
+                if search:
+                    await count_things(client, filter=f'eq(attributes/manufacturer,"{thing_id[-1]}")')
+                else:
+                    await client.api.two.things.by_thing_id(thing_id).get()
+                succeeded += 1
+            except CircuitOpenError:
+                fast_failures += 1
+            except Exception:
+                pass
+            finally:
+                done += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_operation(search, thing_id) for search, thing_id in plan))
+    elapsed = time.perf_counter() - started
+
+    sent = sum(ditto.requests.values())
+    rprint(
+        f"{name:<24}: {succeeded / args.operations:6.1%} ok  {args.operations / elapsed:5.0f} ops/s  "
+        f"{sent / args.operations:4.2f} req/op  {fast_failures:4d} failed fast"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--operations", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--connect-error-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    def _retry() -> RetryMiddleware:
+        return RetryMiddleware(RetryPolicy(max_retries=3, backoff=0.005), RetryBudget(ratio=0.2))
+
+    def _circuit_breaker() -> CircuitBreakerMiddleware:
+        return CircuitBreakerMiddleware(failure_threshold=5, reset_timeout=0.1)
+
+    pipelines: list[tuple[str, list[BaseMiddleware]]] = [
+        ("no retries", []),
+        ("retry", [_retry()]),
+        ("retry + circuit breaker", [_retry(), _circuit_breaker()]),
+    ]
+    for name, extra_middleware in pipelines:
+        await _run(name, extra_middleware, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""Measure success rates and retry amplification of ``RetryMiddleware`` under transient and total failures.
+
+Requests go to an in-process ``httpx.MockTransport`` that fails a share of them with ``503``, like
+an overloaded Ditto gateway. The amplification is the number of requests Ditto sees per request
+made by the caller.
+
+Usage: python benchmarks/bench_retry.py [--requests 5000] [--concurrency 100]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Optional
+
+import httpx
+from kiota_abstractions.authentication.anonymous_authentication_provider import AnonymousAuthenticationProvider
+from kiota_http.kiota_client_factory import KiotaClientFactory
+from kiota_http.middleware.retry_handler import RetryHandler
+from rich import print as rprint
+
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.request_adapter import DittoRequestAdapter
+from ditto_client.retry import RetryBudget, RetryMiddleware, RetryPolicy
+
+_LATENCY = 0.001
+
+
+class _Server:
+    def __init__(self, failure_rate: float) -> None:
+        self.failure_rate = failure_rate
+        self.requests = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await asyncio.sleep(_LATENCY)
+        if random.random() < self.failure_rate:
+            return httpx.Response(503, json={"status": 503, "error": "gateway:service.unavailable", "message": "-"})
+        return httpx.Response(200, json={"thingId": request.url.path.rsplit("/", 1)[-1]})
+
+
+def _create_client(server: _Server, retry: Optional[RetryMiddleware]) -> DittoClient:
+    middleware = [m for m in KiotaClientFactory.get_default_middleware(None) if not isinstance(m, RetryHandler)]
+    if retry is not None:
+        middleware.insert(0, retry)
+    http_client = KiotaClientFactory.create_with_custom_middleware(
+        middleware, client=httpx.AsyncClient(transport=httpx.MockTransport(server.handle))
+    )
+    request_adapter = DittoRequestAdapter(AnonymousAuthenticationProvider(), http_client=http_client)
+    request_adapter.base_url = "http://localhost:8080"
+    return DittoClient(request_adapter)
+
+
+async def _run(
+    name: str, retry: Optional[RetryMiddleware], failure_rate: float, requests: int, concurrency: int
+) -> None:
+    server = _Server(failure_rate)
+    builder = _create_client(server, retry).api.two.things
+    semaphore = asyncio.Semaphore(concurrency)
+    succeeded = 0
+
+    async def _read(i: int) -> None:
+        nonlocal succeeded
+        async with semaphore:
+            try:
+                await builder.by_thing_id(f"org.acme:device-{i}").get()
+                succeeded += 1
+            except Exception:
+                pass
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_read(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    rprint(
+        f"{failure_rate:4.0%} failing  {name:<15}: {succeeded / requests:7.2%} succeeded"
+        f"  {server.requests / requests:5.2f}x amplification  {elapsed:6.2f}s"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    policy = RetryPolicy(max_retries=3, backoff=0.005, max_backoff=0.1)
+    for failure_rate in (0.05, 0.3, 1.0):
+        await _run("no retries", None, failure_rate, args.requests, args.concurrency)
+        await _run("retries", RetryMiddleware(policy), failure_rate, args.requests, args.concurrency)
+        budget = RetryBudget(ratio=0.1, min_retries_per_second=10.0, max_balance=50.0)
+        retry = RetryMiddleware(policy, budget)
+        await _run("retries+budget", retry, failure_rate, args.requests, args.concurrency)
+        rprint(retry.stats)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""Measure concurrent reads of the same hot things with and without request coalescing.
+
+Every round, ``--callers`` coroutines each read one of ``--things`` things at the same time from
+an in-process ``httpx.MockTransport`` with a small simulated latency.
+
+Usage: python benchmarks/bench_single_flight.py [--callers 1000] [--things 10] [--rounds 20]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from kiota_abstractions.authentication.anonymous_authentication_provider import AnonymousAuthenticationProvider
+from kiota_http.kiota_client_factory import KiotaClientFactory
+from kiota_http.middleware.middleware import BaseMiddleware
+from rich import print as rprint
+
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.request_adapter import DittoRequestAdapter
+from ditto_client.single_flight import SingleFlightMiddleware
+
+_LATENCY = 0.005
+
+
+class _Server:
+    def __init__(self) -> None:
+        self.requests = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await asyncio.sleep(_LATENCY)
+        thing_id = request.url.path.rsplit("/", 1)[-1]
+        body = json.dumps({"thingId": thing_id, "attributes": {"serial": thing_id}}).encode()
+        return httpx.Response(200, content=body, headers={"Content-Type": "application/json"})
+
+
+def _create_client(server: _Server, middleware: list[BaseMiddleware]) -> DittoClient:
+    http_client = KiotaClientFactory.create_with_custom_middleware(
+        [*middleware, *KiotaClientFactory.get_default_middleware(None)],
+        client=httpx.AsyncClient(transport=httpx.MockTransport(server.handle)),
+    )
+    request_adapter = DittoRequestAdapter(AnonymousAuthenticationProvider(), http_client=http_client)
+    request_adapter.base_url = "http://localhost:8080"
+    return DittoClient(request_adapter)
+
+
+async def _run(middleware: list[BaseMiddleware], callers: int, things: int, rounds: int) -> tuple[float, int]:
+    server = _Server()
+    builder = _create_client(server, middleware).api.two.things
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(builder.by_thing_id(f"org.acme:device-{i % things}").get() for i in range(callers)))
+    return time.perf_counter() - started, server.requests
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--callers", type=int, default=1000)
+    parser.add_argument("--things", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    reads = args.callers * args.rounds
+    single_flight = SingleFlightMiddleware()
+    results = {
+        "no coalescing": await _run([], args.callers, args.things, args.rounds),
+        "single flight": await _run([single_flight], args.callers, args.things, args.rounds),
+    }
+
+    baseline = results["no coalescing"][0]
+    for name, (elapsed, requests) in results.items():
+        rprint(f"{name:<14}: {elapsed / reads * 1e6:8.1f} us/read  {requests:7d} requests  {baseline / elapsed:5.1f}x")
+    rprint(single_flight.stats)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""Measure many concurrent single-thing reads with and without ``ThingLoader`` batching.
+
+Things are served by an in-process ``httpx.MockTransport`` with a small simulated latency that
+answers both ``things/{thingId}`` and ``things?ids=...`` like Ditto does.
+
+Usage: python benchmarks/bench_thing_loader.py [--things 10000] [--concurrency 500]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, Optional
+
+import httpx
+from kiota_abstractions.authentication.anonymous_authentication_provider import AnonymousAuthenticationProvider
+from kiota_http.kiota_client_factory import KiotaClientFactory
+from rich import print as rprint
+
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.loader import ThingLoader
+from ditto_client.request_adapter import DittoRequestAdapter
+
+_LATENCY = 0.002
+
+
+def _thing(thing_id: str) -> dict[str, Any]:
+    return {"thingId": thing_id, "attributes": {"serial": thing_id}, "features": {"temp": {"properties": {"v": 1}}}}
+
+
+class _Server:
+    def __init__(self) -> None:
+        self.requests = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await asyncio.sleep(_LATENCY)
+        ids = request.url.params.get("ids")
+        if ids is not None:
+            body: Any = [_thing(thing_id) for thing_id in ids.split(",")]
+        else:
+            body = _thing(request.url.path.rsplit("/", 1)[-1])
+        return httpx.Response(200, content=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+
+
+def _create_client(server: _Server) -> DittoClient:
+    http_client = KiotaClientFactory.create_with_custom_middleware(
+        KiotaClientFactory.get_default_middleware(None),
+        client=httpx.AsyncClient(transport=httpx.MockTransport(server.handle)),
+    )
+    request_adapter = DittoRequestAdapter(AnonymousAuthenticationProvider(), http_client=http_client)
+    request_adapter.base_url = "http://localhost:8080"
+    return DittoClient(request_adapter)
+
+
+async def _run(
+    make_get: Callable[[DittoClient], Callable[[str], Awaitable[Optional[object]]]], things: int, concurrency: int
+) -> tuple[float, int]:
+    server = _Server()
+    get = make_get(_create_client(server))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _read(thing_id: str) -> None:
+        async with semaphore:
+            await get(thing_id)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_read(f"org.acme:device-{i}") for i in range(things)))
+    return time.perf_counter() - started, server.requests
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--things", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    args = parser.parse_args()
+
+    results = {
+        "by_thing_id": await _run(
+            lambda client: lambda thing_id: client.api.two.things.by_thing_id(thing_id).get(),
+            args.things,
+            args.concurrency,
+        ),
+        "ThingLoader": await _run(lambda client: ThingLoader(client).load, args.things, args.concurrency),
+    }
+
+    baseline = results["by_thing_id"][0]
+    for name, (elapsed, requests) in results.items():
+        rprint(f"{name:<12}: {args.things / elapsed:8.0f} things/s  {requests:6d} requests  {baseline / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""Measure a batch job hammering an overloaded gateway with and without client-side throttling.
+
+The in-process ``httpx.MockTransport`` serves ``--capacity`` requests at a time in ``--service-time``
+seconds each; above that latency grows with the queue and, beyond twice the capacity, requests are
+rejected with ``503`` like an overloaded Ditto gateway.
+
+Usage: python benchmarks/bench_throttle.py [--requests 5000] [--concurrency 256] [--capacity 32]
+       [--service-time 0.005] [--rate 1000]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Optional
+
+import httpx
+from kiota_abstractions.authentication.anonymous_authentication_provider import AnonymousAuthenticationProvider
+from kiota_http.kiota_client_factory import KiotaClientFactory
+from kiota_http.middleware.retry_handler import RetryHandler
+from rich import print as rprint
+
+from ditto_client.endpoints import EndpointFamily
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.request_adapter import DittoRequestAdapter
+from ditto_client.throttle import AdaptiveConcurrencyLimiter, ThrottleMiddleware, TokenBucket
+
+
+class _Server:
+    def __init__(self, capacity: int, service_time: float) -> None:
+        self.capacity = capacity
+        self.service_time = service_time
+        self.active = 0
+        self.rejected = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.active >= 2 * self.capacity:
+            self.rejected += 1
+            return httpx.Response(503, json={"status": 503, "error": "gateway:service.unavailable", "message": "-"})
+
+        self.active += 1
+        try:
+            await asyncio.sleep(self.service_time * max(1.0, self.active / self.capacity))
+        finally:
+            self.active -= 1
+        return httpx.Response(200, json={"thingId": request.url.path.rsplit("/", 1)[-1]})
+
+
+def _create_client(server: _Server, throttle: Optional[ThrottleMiddleware]) -> DittoClient:
+    middleware = [m for m in KiotaClientFactory.get_default_middleware(None) if not isinstance(m, RetryHandler)]
+    if throttle is not None:
+        middleware.insert(0, throttle)
+    http_client = KiotaClientFactory.create_with_custom_middleware(
+        middleware, client=httpx.AsyncClient(transport=httpx.MockTransport(server.handle))
+    )
+    request_adapter = DittoRequestAdapter(AnonymousAuthenticationProvider(), http_client=http_client)
+    request_adapter.base_url = "http://localhost:8080"
+    return DittoClient(request_adapter)
+
+
+async def _run(name: str, throttle: Optional[ThrottleMiddleware], args: argparse.Namespace) -> None:
+    server = _Server(args.capacity, args.service_time)
+    builder = _create_client(server, throttle).api.two.things
+    semaphore = asyncio.Semaphore(args.concurrency)
+    failed = 0
+
+    async def _read(i: int) -> None:
+        nonlocal failed
+        async with semaphore:
+            try:
+                await builder.by_thing_id(f"org.acme:device-{i}").get()
+            except Exception:
+                failed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_read(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    limit = ""
+    if throttle is not None:
+        metrics = throttle.metrics()[EndpointFamily.Things]
+        limit = f"  final limit {metrics.concurrency_limit}" if metrics.concurrency_limit is not None else ""
+    rprint(f"{name:<20}: {(args.requests - failed) / elapsed:7.0f} ok/s  {server.rejected:5d} rejected with 503{limit}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--capacity", type=int, default=32)
+    parser.add_argument("--service-time", type=float, default=0.005, help="Seconds per request below capacity")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Requests per second allowed by the token bucket")
+    args = parser.parse_args()
+
+    await _run("unthrottled", None, args)
+    bucket = TokenBucket(args.rate, burst=args.capacity)
+    await _run("token bucket", ThrottleMiddleware(rate_limits={EndpointFamily.Things: bucket}), args)
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=args.concurrency)
+    await _run("adaptive concurrency", ThrottleMiddleware(concurrency_limits={EndpointFamily.Things: limiter}), args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
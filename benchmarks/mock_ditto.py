@@ -0,0 +1,1066 @@
+"""In-process fake of the Ditto HTTP API for offline, deterministic benchmarks and tests.
+
+``MockDitto`` answers requests of an ``httpx.MockTransport``. Its routes and methods are read from
+``assets/ditto/openapi/ditto-api-2.yml``: unknown paths get ``404``, methods the spec does not list
+``405`` and spec operations the mock does not implement ``501``. Implemented are things and all their
+sub-resources, policies, search with filters, sorting and cursors, count, connections, whoami and the
+devops logging/config/piggyback endpoints, with revisions, ETags, ``If-Match``/``If-None-Match`` and
+``condition``. A ``Fault`` adds latency, error responses, connection errors and lost responses drawn
+from a seeded random generator.
+
+Requires PyYAML, which the dev dependencies install. The tests import it through pytest's ``pythonpath``.
+
+Usage::
+
+    from mock_ditto import Fault, MockDitto
+
+    ditto = MockDitto(fault=Fault(latency=0.002, error_rate=0.05))
+    ditto.populate(1000)
+    client = ditto.create_client()
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import random
+import re
+import uuid
+import zlib
+from collections import Counter
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import parse_qsl
+
+import httpx
+import yaml  # type: ignore[import-untyped]
+from kiota_abstractions.authentication.anonymous_authentication_provider import AnonymousAuthenticationProvider
+from kiota_http.kiota_client_factory import KiotaClientFactory
+from kiota_http.middleware.middleware import BaseMiddleware
+
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.merge_patch import apply_merge_patch
+from ditto_client.request_adapter import DittoRequestAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPEC_PATH = Path(__file__).resolve().parents[1] / "assets" / "ditto" / "openapi" / "ditto-api-2.yml"
+DEFAULT_BASE_URL = "http://localhost:8080"
+DEFAULT_SUBJECT = "nginx:ditto"
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 200
+MODULES = ("gateway", "things", "things-search", "policies", "connectivity")
+
+_METHODS = ("GET", "PUT", "POST", "PATCH", "DELETE")
+_INJECTED_ERRORS = {
+    429: "too.many.requests",
+    500: "internal.error",
+    502: "gateway:service.unavailable",
+    503: "gateway:service.unavailable",
+    504: "gateway:command.timeout",
+}
+
+
+@dataclass
+class Fault:
+    """Misbehaviour injected into the responses of the mock, globally or per route."""
+
+    # Seconds added to every response, plus up to ``jitter`` uniformly random seconds
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Share of requests answered with ``error_status`` without being processed
+    error_rate: float = 0.0
+    error_status: int = 503
+    retry_after: Optional[float] = None
+    # Share of requests failing with ``httpx.ConnectError`` without being processed
+    connect_error_rate: float = 0.0
+    # Share of requests that are processed but whose response is lost with ``httpx.ReadTimeout``
+    timeout_rate: float = 0.0
+
+
+class _DittoError(Exception):
+    def __init__(self, status: int, error: str, message: str, headers: Optional[dict[str, str]] = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.error = error
+        self.message = message
+        self.headers = headers or {}
+
+    def response(self) -> httpx.Response:
+        body = {"status": self.status, "error": self.error, "message": self.message}
+        return httpx.Response(self.status, json=body, headers=self.headers)
+
+
+class _NotModified(Exception):
+    def __init__(self, etag: str) -> None:
+        super().__init__(etag)
+        self.etag = etag
+
+
+@dataclass
+class _SpecRoute:
+    template: str
+    pattern: re.Pattern[str]
+    methods: frozenset[str]
+
+
+def _parameter_pattern(match: re.Match[str]) -> str:
+    # Parameters named ...Path are JSON pointers or resource paths and span several segments
+    name = match.group(1)
+    return f"(?P<{name}>{'.+' if name.endswith('Path') else '[^/]+'})"
+
+
+def _load_routes(spec_path: Path) -> list[_SpecRoute]:
+    with spec_path.open(encoding="utf-8") as spec_file:
+        spec = yaml.load(spec_file, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+    routes = []
+    for template, operations in spec["paths"].items():
+        regex = re.sub(r"\{(\w+)\}", _parameter_pattern, template)
+        methods = frozenset(method.upper() for method in operations if method.upper() in _METHODS)
+        routes.append(_SpecRoute(template, re.compile(f"^{regex}$"), methods))
+    # Literal segments win over parameters, e.g. .../features/{featureId}/properties over .../{attributePath}
+    routes.sort(key=lambda route: len(re.sub(r"\{\w+\}", "", route.template)), reverse=True)
+    return routes
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _pointer(path: str) -> list[str]:
+    return [segment for segment in path.split("/") if segment]
+
+
+_MISSING = object()
+
+
+def _resolve(value: Any, pointer: list[str]) -> Any:
+    for key in pointer:
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+    return value
+
+
+def _assign(target: dict[str, Any], pointer: list[str], value: Any) -> None:
+    for key in pointer[:-1]:
+        child = target.get(key)
+        if not isinstance(child, dict):
+            child = target[key] = {}
+        target = child
+    target[pointer[-1]] = value
+
+
+def _remove(target: dict[str, Any], pointer: list[str]) -> None:
+    parent = _resolve(target, pointer[:-1])
+    if isinstance(parent, dict):
+        parent.pop(pointer[-1], None)
+
+
+def _split_top_level(text: str) -> list[str]:
+    parts, depth, start = [], 0, 0
+    for index, char in enumerate(text):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(text[start:index])
+            start = index + 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _field_pointers(fields: str) -> list[list[str]]:
+    """``thingId,attributes(model,location/city)`` as the pointers it selects."""
+    pointers: list[list[str]] = []
+    for selector in _split_top_level(fields):
+        if selector.endswith(")") and "(" in selector:
+            prefix, nested = selector[:-1].split("(", 1)
+            pointers.extend(_pointer(prefix) + pointer for pointer in _field_pointers(nested))
+        else:
+            pointers.append(_pointer(selector))
+    return pointers
+
+
+def _select_fields(value: Any, fields: Optional[str]) -> Any:
+    if not fields or not isinstance(value, dict):
+        return value
+    selected: dict[str, Any] = {}
+    for pointer in _field_pointers(fields):
+        found = _resolve(value, pointer)
+        if pointer and found is not _MISSING:
+            _assign(selected, pointer, found)
+    return selected
+
+
+# RQL, the query language of Ditto filters and conditions
+
+
+_Predicate = Callable[[dict[str, Any]], bool]
+
+
+def _same_kind(left: Any, right: Any) -> bool:
+    if isinstance(left, bool) or isinstance(right, bool):
+        return isinstance(left, bool) and isinstance(right, bool)
+    if isinstance(left, (int, float)):
+        return isinstance(right, (int, float))
+    return type(left) is type(right)
+
+
+def _compare(operator: str, actual: Any, expected: Any) -> bool:
+    if operator == "eq":
+        return _same_kind(actual, expected) and actual == expected
+    if not _same_kind(actual, expected) or actual is None:
+        return False
+    if operator == "gt":
+        return bool(actual > expected)
+    if operator == "ge":
+        return bool(actual >= expected)
+    if operator == "lt":
+        return bool(actual < expected)
+    return bool(actual <= expected)
+
+
+def _like_pattern(pattern: Any, flags: int = 0) -> re.Pattern[str]:
+    if not isinstance(pattern, str):
+        raise ValueError("like expects a string pattern")
+    regex = "".join(".*" if char == "*" else "." if char == "?" else re.escape(char) for char in pattern)
+    return re.compile(regex, flags | re.DOTALL)
+
+
+class _RqlParser:
+    _NAME = re.compile(r"[a-z]+")
+    _TOKEN = re.compile(r"[^,)]+")
+
+    def __init__(self, text: str) -> None:
+        self._text = text
+        self._position = 0
+
+    def parse(self) -> _Predicate:
+        predicate = self._query()
+        if self._position != len(self._text):
+            raise ValueError(f"Unexpected input at position {self._position}")
+        return predicate
+
+    def _expect(self, char: str) -> None:
+        if not self._text.startswith(char, self._position):
+            raise ValueError(f"Expected '{char}' at position {self._position}")
+        self._position += 1
+
+    def _accept(self, char: str) -> bool:
+        if self._text.startswith(char, self._position):
+            self._position += 1
+            return True
+        return False
+
+    def _match(self, pattern: re.Pattern[str], what: str) -> str:
+        match = pattern.match(self._text, self._position)
+        if match is None:
+            raise ValueError(f"Expected {what} at position {self._position}")
+        self._position = match.end()
+        return match.group(0)
+
+    def _value(self) -> Any:
+        quote = self._text[self._position : self._position + 1]
+        if quote in ('"', "'"):
+            chars = []
+            self._position += 1
+            while self._position < len(self._text) and self._text[self._position] != quote:
+                if self._text[self._position] == "\\":
+                    self._position += 1
+                chars.append(self._text[self._position : self._position + 1])
+                self._position += 1
+            self._expect(quote)
+            return "".join(chars)
+
+        token = self._match(self._TOKEN, "a value").strip()
+        if token in ("true", "false", "null"):
+            return {"true": True, "false": False, "null": None}[token]
+        try:
+            return int(token)
+        except ValueError:
+            return float(token)
+
+    def _query(self) -> _Predicate:
+        operator = self._match(self._NAME, "an operator")
+        self._expect("(")
+        if operator in ("and", "or"):
+            queries = [self._query()]
+            while self._accept(","):
+                queries.append(self._query())
+            self._expect(")")
+            combine = all if operator == "and" else any
+            return lambda view: combine(query(view) for query in queries)
+        if operator == "not":
+            query = self._query()
+            self._expect(")")
+            return lambda view: not query(view)
+
+        pointer = _pointer(self._match(self._TOKEN, "a property").strip())
+        values = []
+        while self._accept(","):
+            values.append(self._value())
+        self._expect(")")
+        return self._relation(operator, pointer, values)
+
+    @staticmethod
+    def _relation(operator: str, pointer: list[str], values: list[Any]) -> _Predicate:
+        def _any(view: dict[str, Any], test: Callable[[Any], bool]) -> bool:
+            actual = _resolve(view, pointer)
+            if actual is _MISSING:
+                return False
+            # Like Ditto's search, a condition on an array holds if it holds for any of its elements
+            if isinstance(actual, list):
+                return any(test(item) for item in actual)
+            return test(actual)
+
+        if operator == "exists" and not values:
+            return lambda view: _resolve(view, pointer) is not _MISSING
+        if operator == "in" and values:
+            return lambda view: _any(view, lambda actual: any(_compare("eq", actual, v) for v in values))
+        if len(values) != 1:
+            raise ValueError(f"Wrong number of arguments for '{operator}'")
+
+        expected = values[0]
+        if operator in ("eq", "gt", "ge", "lt", "le"):
+            return lambda view: _any(view, lambda actual: _compare(operator, actual, expected))
+        if operator == "ne":
+            return lambda view: not _any(view, lambda actual: _compare("eq", actual, expected))
+        if operator in ("like", "ilike"):
+            pattern = _like_pattern(expected, re.IGNORECASE if operator == "ilike" else 0)
+            return lambda view: _any(view, lambda actual: isinstance(actual, str) and bool(pattern.fullmatch(actual)))
+        raise ValueError(f"Unknown operator '{operator}'")
+
+
+def _parse_rql(expression: str) -> _Predicate:
+    try:
+        return _RqlParser(expression.strip()).parse()
+    except (ValueError, IndexError) as ex:
+        raise _DittoError(400, "rql.expression.invalid", f"Invalid RQL expression '{expression}': {ex}") from ex
+
+
+# Storage
+
+
+@dataclass
+class _Entity:
+    value: dict[str, Any]
+    revision: int = 1
+    created: str = field(default_factory=_now)
+    modified: str = field(default_factory=_now)
+
+    @property
+    def etag(self) -> str:
+        return f'"rev:{self.revision}"'
+
+    def view(self) -> dict[str, Any]:
+        """The entity with the special fields usable in ``fields``, filters and conditions."""
+        return {**self.value, "_revision": self.revision, "_created": self.created, "_modified": self.modified}
+
+    def touch(self) -> None:
+        self.revision += 1
+        self.modified = _now()
+
+
+def _hash_etag(value: Any) -> str:
+    # Sub-resources carry a hash of their value as ETag, whole entities their revision
+    return f'"hash:{zlib.crc32(json.dumps(value, sort_keys=True).encode())}"'
+
+
+@dataclass
+class _Call:
+    request: httpx.Request
+    route: str
+    params: dict[str, str]
+
+    @property
+    def method(self) -> str:
+        return self.request.method
+
+    @property
+    def query(self) -> httpx.QueryParams:
+        return self.request.url.params
+
+    def json(self) -> Any:
+        try:
+            return json.loads(self.request.content or b"null")
+        except ValueError as ex:
+            raise _DittoError(400, "json.invalid", f"Failed to parse the JSON body: {ex}") from ex
+
+    def form(self) -> dict[str, str]:
+        """Query parameters, overridden by those of a form-encoded body."""
+        values = dict(self.query)
+        if "application/x-www-form-urlencoded" in self.request.headers.get("content-type", ""):
+            values.update(parse_qsl(self.request.content.decode()))
+        return values
+
+
+def _json_response(
+    status: int, body: Any, *, etag: Optional[str] = None, location: Optional[str] = None
+) -> httpx.Response:
+    headers = {}
+    if etag is not None:
+        headers["ETag"] = etag
+    if location is not None:
+        headers["Location"] = location
+    return httpx.Response(status, json=body, headers=headers)
+
+
+def _written(created: bool, value: Any, etag: str, request: httpx.Request) -> httpx.Response:
+    if created:
+        return _json_response(201, value, etag=etag, location=request.url.path)
+    return httpx.Response(204, headers={"ETag": etag})
+
+
+def _check_preconditions(request: httpx.Request, etag: Optional[str]) -> None:
+    if_match = request.headers.get("if-match")
+    if if_match is not None:
+        tags = [tag.strip() for tag in if_match.split(",")]
+        if etag is None or ("*" not in tags and etag not in tags):
+            raise _DittoError(412, "things:precondition.failed", f"The comparison of If-Match '{if_match}' failed.")
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and etag is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        if "*" in tags or etag in tags:
+            if request.method == "GET":
+                raise _NotModified(etag)
+            raise _DittoError(
+                412, "things:precondition.failed", f"The comparison of If-None-Match '{if_none_match}' failed."
+            )
+
+
+# Handlers, registered per method and spec route
+
+
+_Handler = Callable[["MockDitto", _Call], httpx.Response]
+_HANDLERS: dict[tuple[str, str], _Handler] = {}
+
+
+def _route(methods: str, *templates: str) -> Callable[[_Handler], _Handler]:
+    def _register(handler: _Handler) -> _Handler:
+        for method in methods.split(","):
+            for template in templates:
+                _HANDLERS[(method, template)] = handler
+        return handler
+
+    return _register
+
+
+_Pointer = Callable[[dict[str, str]], list[str]]
+
+# Sub-resources of things and policies: pointer into the entity, and name used in error codes
+_THING_RESOURCES: dict[str, tuple[_Pointer, str]] = {
+    "/api/2/things/{thingId}": (lambda p: [], "thing"),
+    "/api/2/things/{thingId}/definition": (lambda p: ["definition"], "definition"),
+    "/api/2/things/{thingId}/policyId": (lambda p: ["policyId"], "policyid"),
+    "/api/2/things/{thingId}/attributes": (lambda p: ["attributes"], "attributes"),
+    "/api/2/things/{thingId}/attributes/{attributePath}": (
+        lambda p: ["attributes", *_pointer(p["attributePath"])],
+        "attribute",
+    ),
+    "/api/2/things/{thingId}/features": (lambda p: ["features"], "features"),
+    "/api/2/things/{thingId}/features/{featureId}": (lambda p: ["features", p["featureId"]], "feature"),
+    "/api/2/things/{thingId}/features/{featureId}/definition": (
+        lambda p: ["features", p["featureId"], "definition"],
+        "feature.definition",
+    ),
+    "/api/2/things/{thingId}/features/{featureId}/properties": (
+        lambda p: ["features", p["featureId"], "properties"],
+        "feature.properties",
+    ),
+    "/api/2/things/{thingId}/features/{featureId}/properties/{propertyPath}": (
+        lambda p: ["features", p["featureId"], "properties", *_pointer(p["propertyPath"])],
+        "feature.property",
+    ),
+    "/api/2/things/{thingId}/features/{featureId}/desiredProperties": (
+        lambda p: ["features", p["featureId"], "desiredProperties"],
+        "feature.desiredproperties",
+    ),
+    "/api/2/things/{thingId}/features/{featureId}/desiredProperties/{propertyPath}": (
+        lambda p: ["features", p["featureId"], "desiredProperties", *_pointer(p["propertyPath"])],
+        "feature.desiredproperty",
+    ),
+}
+_POLICY_RESOURCES: dict[str, tuple[_Pointer, str]] = {
+    "/api/2/policies/{policyId}": (lambda p: [], "policy"),
+    "/api/2/policies/{policyId}/entries": (lambda p: ["entries"], "entries"),
+    "/api/2/policies/{policyId}/entries/{label}": (lambda p: ["entries", p["label"]], "entry"),
+    "/api/2/policies/{policyId}/entries/{label}/subjects": (
+        lambda p: ["entries", p["label"], "subjects"],
+        "subjects",
+    ),
+    # Subject ids and resource paths are single keys even when they contain a slash
+    "/api/2/policies/{policyId}/entries/{label}/subjects/{subjectId}": (
+        lambda p: ["entries", p["label"], "subjects", p["subjectId"]],
+        "subject",
+    ),
+    "/api/2/policies/{policyId}/entries/{label}/resources": (
+        lambda p: ["entries", p["label"], "resources"],
+        "resources",
+    ),
+    "/api/2/policies/{policyId}/entries/{label}/resources/{resourcePath}": (
+        lambda p: ["entries", p["label"], "resources", p["resourcePath"]],
+        "resource",
+    ),
+    "/api/2/policies/{policyId}/imports": (lambda p: ["imports"], "imports"),
+    "/api/2/policies/{policyId}/imports/{importedPolicyId}": (
+        lambda p: ["imports", p["importedPolicyId"]],
+        "import",
+    ),
+}
+_ERROR_PREFIXES = {"thing": "things", "policy": "policies"}
+_THING_ID = re.compile(r"^[A-Za-z0-9_.-]*:[^/]+$")
+
+
+def _default_policy(policy_id: str) -> dict[str, Any]:
+    grant = {"grant": ["READ", "WRITE"], "revoke": []}
+    return {
+        "policyId": policy_id,
+        "entries": {
+            "DEFAULT": {
+                "subjects": {DEFAULT_SUBJECT: {"type": "nginx basic auth user"}},
+                "resources": {"thing:/": grant, "policy:/": grant, "message:/": grant},
+            }
+        },
+    }
+
+
+class MockDitto:
+    """A fake Ditto keeping things, policies and connections in memory; see the module docstring.
+
+    ``fault`` applies to every route, ``route_faults`` override it per spec route such as
+    ``/api/2/search/things``. Both can be changed while requests are running, e.g. to simulate an
+    outage. ``requests`` counts the requests per method and route.
+    """
+
+    def __init__(
+        self,
+        spec_path: Path = DEFAULT_SPEC_PATH,
+        *,
+        fault: Optional[Fault] = None,
+        route_faults: Optional[Mapping[str, Fault]] = None,
+        seed: int = 0,
+        namespace: str = "org.eclipse.ditto",
+    ) -> None:
+        self._routes = _load_routes(spec_path)
+        # Methods are checked per request, so a handler may cover methods the spec lacks for some routes
+        unknown = sorted({template for _, template in _HANDLERS} - {route.template for route in self._routes})
+        if unknown:
+            raise ValueError(f"Routes missing from {spec_path}: {unknown}")
+
+        self.fault = fault or Fault()
+        self.route_faults = dict(route_faults or {})
+        self.requests: Counter[tuple[str, str]] = Counter()
+        self.injected: Counter[str] = Counter()
+        self._random = random.Random(seed)
+        self._namespace = namespace
+        self._things: dict[str, _Entity] = {}
+        self._policies: dict[str, _Entity] = {}
+        self._connections: dict[str, _Entity] = {}
+        self._live_status: dict[str, str] = {}
+        self._log_levels = {module: {"ROOT": "info"} for module in MODULES}
+
+    # Seeding and inspection
+
+    def put_thing(self, thing: Mapping[str, Any]) -> None:
+        value = json.loads(json.dumps(thing))
+        self._things[value["thingId"]] = _Entity(value)
+        policy_id = value.setdefault("policyId", value["thingId"])
+        self._policies.setdefault(policy_id, _Entity(_default_policy(policy_id)))
+
+    def populate(self, count: int, *, namespace: str = "org.acme", features: int = 2) -> list[str]:
+        """Add ``count`` things ``{namespace}:device-00000`` ... with attributes and sensor features."""
+        thing_ids = []
+        for index in range(count):
+            thing_id = f"{namespace}:device-{index:05d}"
+            self.put_thing(
+                {
+                    "thingId": thing_id,
+                    "policyId": f"{namespace}:policy",
+                    "attributes": {
+                        "index": index,
+                        "manufacturer": self._random.choice(("ACME", "Bosch", "Siemens")),
+                        "location": {"floor": index % 10, "room": f"r{index % 97}"},
+                    },
+                    "features": {
+                        f"sensor-{feature}": {
+                            "properties": {"value": round(self._random.uniform(-20.0, 40.0), 2), "unit": "°C"}
+                        }
+                        for feature in range(features)
+                    },
+                }
+            )
+            thing_ids.append(thing_id)
+        return thing_ids
+
+    def thing(self, thing_id: str) -> Optional[dict[str, Any]]:
+        entity = self._things.get(thing_id)
+        return entity.view() if entity is not None else None
+
+    @property
+    def thing_count(self) -> int:
+        return len(self._things)
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def create_client(
+        self, middleware: Optional[list[BaseMiddleware]] = None, base_url: str = DEFAULT_BASE_URL
+    ) -> DittoClient:
+        """A ``DittoClient`` talking to this mock through ``middleware``, kiota's defaults if None."""
+        if middleware is None:
+            middleware = KiotaClientFactory.get_default_middleware(None)
+        http_client = KiotaClientFactory.create_with_custom_middleware(
+            middleware, client=httpx.AsyncClient(transport=self.transport())
+        )
+        request_adapter = DittoRequestAdapter(AnonymousAuthenticationProvider(), http_client=http_client)
+        request_adapter.base_url = base_url
+        return DittoClient(request_adapter)
+
+    # Dispatch
+
+    def _match(self, path: str) -> tuple[Optional[_SpecRoute], dict[str, str]]:
+        for route in self._routes:
+            match = route.pattern.match(path)
+            if match is not None:
+                return route, match.groupdict()
+        return None, {}
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        route, params = self._match(request.url.path)
+        if route is None:
+            return _DittoError(
+                404, "resource.notfound", f"The resource '{request.url.path}' could not be found."
+            ).response()
+
+        if request.method not in route.methods:
+            return _DittoError(
+                405, "method.notallowed", f"{request.method} is not allowed on {route.template}."
+            ).response()
+        self.requests[(request.method, route.template)] += 1
+
+        fault = self.route_faults.get(route.template, self.fault)
+        delay = fault.latency + (self._random.uniform(0.0, fault.jitter) if fault.jitter else 0.0)
+        # One draw per request keeps the sequence of injected faults reproducible
+        draw = self._random.random()
+        if delay:
+            await asyncio.sleep(delay)
+
+        if draw < fault.connect_error_rate:
+            self.injected["connect_error"] += 1
+            raise httpx.ConnectError("Injected connection error", request=request)
+        draw -= fault.connect_error_rate
+        if draw < fault.error_rate:
+            self.injected[f"status_{fault.error_status}"] += 1
+            headers = {"Retry-After": f"{fault.retry_after:g}"} if fault.retry_after is not None else None
+            error = _INJECTED_ERRORS.get(fault.error_status, "internal.error")
+            return _DittoError(fault.error_status, error, "Injected error.", headers).response()
+        draw -= fault.error_rate
+
+        response = self._dispatch(_Call(request, route.template, params))
+        if draw < fault.timeout_rate:
+            self.injected["timeout"] += 1
+            raise httpx.ReadTimeout("Injected lost response", request=request)
+        return response
+
+    def _dispatch(self, call: _Call) -> httpx.Response:
+        handler = _HANDLERS.get((call.method, call.route))
+        if handler is None:
+            return _DittoError(
+                501, "notimplemented", f"{call.method} {call.route} is not implemented by the mock."
+            ).response()
+        try:
+            return handler(self, call)
+        except _DittoError as ex:
+            return ex.response()
+        except _NotModified as ex:
+            return httpx.Response(304, headers={"ETag": ex.etag})
+        except Exception:
+            logger.exception("Mock Ditto failed on %s %s", call.method, call.request.url)
+            return _DittoError(500, "internal.error", "Internal error of the mock.").response()
+
+    # Things and policies
+
+    def _entity_resource(
+        self,
+        call: _Call,
+        entities: dict[str, _Entity],
+        entity_id: str,
+        pointer: list[str],
+        kind: str,
+        resource: str,
+    ) -> httpx.Response:
+        prefix = _ERROR_PREFIXES[kind]
+        entity = entities.get(entity_id)
+        if entity is None and (pointer or call.method != "PUT"):
+            raise _DittoError(404, f"{prefix}:{kind}.notfound", f"The {kind} with ID '{entity_id}' could not be found.")
+
+        current = _resolve(entity.value, pointer) if entity is not None else _MISSING
+        etag = None
+        if current is not _MISSING and entity is not None:
+            etag = entity.etag if not pointer else _hash_etag(current)
+        _check_preconditions(call.request, etag)
+        condition = call.query.get("condition")
+        if condition and entity is not None and not _parse_rql(condition)(entity.view()):
+            raise _DittoError(412, f"{prefix}:precondition.failed", f"The condition '{condition}' is not met.")
+
+        not_found = _DittoError(404, f"{prefix}:{resource}.notfound", f"The {resource} could not be found.")
+        if call.method == "GET":
+            if current is _MISSING or entity is None:
+                raise not_found
+            value = entity.view() if not pointer else current
+            selected = _select_fields(value, call.query.get("fields"))
+            return _json_response(200, selected if call.query.get("fields") or pointer else entity.value, etag=etag)
+
+        if call.method == "DELETE":
+            if current is _MISSING or entity is None:
+                raise not_found
+            if not pointer:
+                del entities[entity_id]
+            else:
+                _remove(entity.value, pointer)
+                entity.touch()
+            return httpx.Response(204)
+
+        body = call.json()
+        if call.method == "PATCH":
+            if entity is None:
+                raise not_found
+            patched = apply_merge_patch(None if current is _MISSING else current, body)
+            if not pointer:
+                entity.value = {**patched, f"{kind}Id": entity_id}
+            elif patched is None:
+                _remove(entity.value, pointer)
+            else:
+                _assign(entity.value, pointer, patched)
+            entity.touch()
+            return httpx.Response(204, headers={"ETag": entity.etag if not pointer else _hash_etag(patched)})
+
+        created = current is _MISSING
+        if not pointer:
+            if not isinstance(body, dict):
+                raise _DittoError(400, f"{prefix}:{kind}.invalid", f"The {kind} must be a JSON object.")
+            body = {key: value for key, value in body.items() if not key.startswith("_")}
+            body[f"{kind}Id"] = entity_id
+            if entity is None:
+                entity = entities[entity_id] = _Entity(body)
+            else:
+                # A thing replaced without a policyId keeps its policy
+                if kind == "thing" and "policyId" in entity.value:
+                    body.setdefault("policyId", entity.value["policyId"])
+                entity.value = body
+                entity.touch()
+            return _written(created, body, entity.etag, call.request)
+
+        if entity is None:
+            raise not_found
+        _assign(entity.value, pointer, body)
+        entity.touch()
+        return _written(created, body, _hash_etag(body), call.request)
+
+    def _create_thing(self, thing_id: str, body: dict[str, Any], request: httpx.Request) -> httpx.Response:
+        inline_policy = body.get("_policy")
+        policy_id = body.get("policyId") or thing_id
+        if policy_id not in self._policies:
+            policy = dict(inline_policy) if isinstance(inline_policy, dict) else _default_policy(policy_id)
+            self._policies[policy_id] = _Entity({**policy, "policyId": policy_id})
+        thing = {key: value for key, value in body.items() if not key.startswith("_")}
+        thing.update(thingId=thing_id, policyId=policy_id)
+        entity = self._things[thing_id] = _Entity(thing)
+        return _json_response(201, thing, etag=entity.etag, location=f"/api/2/things/{thing_id}")
+
+    @_route("GET,PUT,PATCH,DELETE", *_THING_RESOURCES)
+    def _thing_resource(self, call: _Call) -> httpx.Response:
+        thing_id = call.params["thingId"]
+        if not _THING_ID.match(thing_id):
+            raise _DittoError(400, "things:id.invalid", f"Thing ID '{thing_id}' is not valid.")
+        pointer, resource = _THING_RESOURCES[call.route]
+        if call.method == "PUT" and call.route == "/api/2/things/{thingId}" and thing_id not in self._things:
+            _check_preconditions(call.request, None)
+            body = call.json()
+            if not isinstance(body, dict):
+                raise _DittoError(400, "things:thing.invalid", "The thing must be a JSON object.")
+            return self._create_thing(thing_id, body, call.request)
+        return self._entity_resource(call, self._things, thing_id, pointer(call.params), "thing", resource)
+
+    @_route("GET", "/api/2/things")
+    def _list_things(self, call: _Call) -> httpx.Response:
+        ids = call.query.get("ids")
+        thing_ids = [thing_id for thing_id in ids.split(",") if thing_id] if ids else sorted(self._things)
+        fields = call.query.get("fields")
+        things = [
+            _select_fields(entity.view(), fields) if fields else entity.value
+            for entity in (self._things.get(thing_id) for thing_id in thing_ids)
+            if entity is not None
+        ]
+        return _json_response(200, things)
+
+    @_route("POST", "/api/2/things")
+    def _post_thing(self, call: _Call) -> httpx.Response:
+        body = call.json() or {}
+        if not isinstance(body, dict):
+            raise _DittoError(400, "things:thing.invalid", "The thing must be a JSON object.")
+        namespace = call.query.get("namespace") or self._namespace
+        return self._create_thing(f"{namespace}:{uuid.UUID(int=self._random.getrandbits(128))}", body, call.request)
+
+    @_route("GET,PUT,DELETE", *_POLICY_RESOURCES)
+    def _policy_resource(self, call: _Call) -> httpx.Response:
+        pointer, resource = _POLICY_RESOURCES[call.route]
+        return self._entity_resource(
+            call, self._policies, call.params["policyId"], pointer(call.params), "policy", resource
+        )
+
+    @_route("GET", "/api/2/whoami")
+    def _whoami(self, call: _Call) -> httpx.Response:
+        subject = DEFAULT_SUBJECT
+        authorization = call.request.headers.get("authorization", "")
+        if authorization.lower().startswith("basic "):
+            username = base64.b64decode(authorization[6:]).decode(errors="replace").split(":", 1)[0]
+            subject = f"nginx:{username}"
+        return _json_response(200, {"defaultSubject": subject, "subjects": [subject]})
+
+    @_route("POST", "/api/2/checkPermissions")
+    def _check_permissions(self, call: _Call) -> httpx.Response:
+        # Every subject of the mock is granted everything
+        body = call.json()
+        return _json_response(200, {key: True for key in body} if isinstance(body, dict) else {})
+
+    # Search
+
+    def _search_matches(self, values: Mapping[str, str]) -> list[_Entity]:
+        predicate = _parse_rql(values["filter"]) if values.get("filter") else None
+        namespaces = {namespace for namespace in values.get("namespaces", "").split(",") if namespace}
+        return [
+            entity
+            for thing_id, entity in self._things.items()
+            if (not namespaces or thing_id.split(":", 1)[0] in namespaces)
+            and (predicate is None or predicate(entity.view()))
+        ]
+
+    @_route("GET,POST", "/api/2/search/things")
+    def _search(self, call: _Call) -> httpx.Response:
+        values = call.form()
+        options = dict(re.findall(r"(\w+)\(([^)]*)\)", values.get("option", "")))
+        size = int(options.get("size", DEFAULT_PAGE_SIZE))
+        offset = 0
+        if not 1 <= size <= MAX_PAGE_SIZE:
+            raise _DittoError(400, "rql.expression.invalid", f"The page size must be between 1 and {MAX_PAGE_SIZE}.")
+
+        sort = options.get("sort", "")
+        if "cursor" in options:
+            if "sort" in options:
+                raise _DittoError(400, "rql.expression.invalid", "The sort option is carried by the cursor.")
+            try:
+                cursor = json.loads(base64.urlsafe_b64decode(options["cursor"]))
+                offset, sort = int(cursor["offset"]), str(cursor["sort"])
+            except (ValueError, KeyError, TypeError) as ex:
+                raise _DittoError(400, "things-search:cursor.invalid", "The cursor is invalid.") from ex
+        elif "limit" in options:
+            offset_text, _, count_text = options["limit"].partition(",")
+            offset, size = int(offset_text), int(count_text or size)
+
+        things = [entity.view() for entity in self._search_matches(values)]
+        # Stable sorts from the last key to the first; the thingId decides ties
+        for key in reversed([*_split_top_level(sort), "+thingId"]):
+            pointer = _pointer(key.lstrip("+-"))
+
+            def _sort_key(thing: dict[str, Any], pointer: list[str] = pointer) -> tuple[int, str, Any]:
+                value = _resolve(thing, pointer)
+                if value is _MISSING or value is None or isinstance(value, (dict, list)):
+                    return (1, "", "")
+                return (0, type(value).__name__ if not isinstance(value, (int, float)) else "number", value)
+
+            things.sort(key=_sort_key, reverse=key.startswith("-"))
+
+        fields = values.get("fields")
+        page = things[offset : offset + size]
+        items = [
+            _select_fields(thing, fields) if fields else {k: v for k, v in thing.items() if not k.startswith("_")}
+            for thing in page
+        ]
+        result: dict[str, Any] = {"items": items}
+        if offset + size < len(things):
+            if "limit" in options:
+                result["nextPageOffset"] = offset + size
+            else:
+                state = json.dumps({"offset": offset + size, "sort": sort}).encode()
+                result["cursor"] = base64.urlsafe_b64encode(state).decode()
+        return _json_response(200, result)
+
+    @_route("GET,POST", "/api/2/search/things/count")
+    def _count(self, call: _Call) -> httpx.Response:
+        return _json_response(200, len(self._search_matches(call.form())))
+
+    # Connections
+
+    def _connection(self, connection_id: str) -> _Entity:
+        entity = self._connections.get(connection_id)
+        if entity is None:
+            raise _DittoError(
+                404, "connectivity:connection.notfound", f"The Connection with ID '{connection_id}' could not be found."
+            )
+        return entity
+
+    @_route("GET", "/api/2/connections")
+    def _list_connections(self, call: _Call) -> httpx.Response:
+        if call.query.get("ids-only") == "true":
+            return _json_response(200, sorted(self._connections))
+        fields = call.query.get("fields")
+        return _json_response(200, [_select_fields(entity.value, fields) for entity in self._connections.values()])
+
+    @_route("POST", "/api/2/connections")
+    def _post_connection(self, call: _Call) -> httpx.Response:
+        body = call.json()
+        if not isinstance(body, dict):
+            raise _DittoError(400, "connectivity:connection.invalid", "The connection must be a JSON object.")
+        connection_id = body.get("id") or str(uuid.UUID(int=self._random.getrandbits(128)))
+        connection = {**body, "id": connection_id}
+        if call.query.get("dry-run") == "true":
+            return _json_response(200, connection)
+        entity = self._connections[connection_id] = _Entity(connection)
+        self._live_status[connection_id] = connection.get("connectionStatus", "closed")
+        return _json_response(201, connection, etag=entity.etag, location=f"/api/2/connections/{connection_id}")
+
+    @_route("GET,PUT,DELETE", "/api/2/connections/{connectionId}")
+    def _connection_resource(self, call: _Call) -> httpx.Response:
+        connection_id = call.params["connectionId"]
+        if call.method == "PUT":
+            body = call.json()
+            if not isinstance(body, dict):
+                raise _DittoError(400, "connectivity:connection.invalid", "The connection must be a JSON object.")
+            connection = {**body, "id": connection_id}
+            existing = self._connections.get(connection_id)
+            if existing is None:
+                entity = self._connections[connection_id] = _Entity(connection)
+                self._live_status[connection_id] = connection.get("connectionStatus", "closed")
+                return _written(True, connection, entity.etag, call.request)
+            existing.value = connection
+            existing.touch()
+            return _written(False, connection, existing.etag, call.request)
+
+        entity = self._connection(connection_id)
+        if call.method == "DELETE":
+            del self._connections[connection_id]
+            self._live_status.pop(connection_id, None)
+            return httpx.Response(204)
+        _check_preconditions(call.request, entity.etag)
+        return _json_response(200, _select_fields(entity.value, call.query.get("fields")), etag=entity.etag)
+
+    @_route("POST", "/api/2/connections/{connectionId}/command")
+    def _connection_command(self, call: _Call) -> httpx.Response:
+        entity = self._connection(call.params["connectionId"])
+        command = call.request.content.decode().strip()
+        if command == "connectivity.commands:openConnection":
+            self._live_status[entity.value["id"]] = "open"
+        elif command == "connectivity.commands:closeConnection":
+            self._live_status[entity.value["id"]] = "closed"
+        elif command not in (
+            "connectivity.commands:resetConnectionMetrics",
+            "connectivity.commands:enableConnectionLogs",
+            "connectivity.commands:resetConnectionLogs",
+        ):
+            raise _DittoError(400, "connectivity:command.invalid", f"Unknown connection command '{command}'.")
+        return httpx.Response(200)
+
+    @_route("GET", "/api/2/connections/{connectionId}/status")
+    def _connection_status(self, call: _Call) -> httpx.Response:
+        entity = self._connection(call.params["connectionId"])
+        connection_id = entity.value["id"]
+        return _json_response(
+            200,
+            {
+                "connectionId": connection_id,
+                "connectionStatus": entity.value.get("connectionStatus", "closed"),
+                "liveStatus": self._live_status.get(connection_id, "closed"),
+                "connectedSince": entity.modified,
+                "clientStatus": [],
+                "sourceStatus": [],
+                "targetStatus": [],
+                "sshTunnelStatus": [],
+            },
+        )
+
+    @_route("GET", "/api/2/connections/{connectionId}/metrics")
+    def _connection_metrics(self, call: _Call) -> httpx.Response:
+        entity = self._connection(call.params["connectionId"])
+        return _json_response(
+            200,
+            {
+                "connectionId": entity.value["id"],
+                "containsFailures": False,
+                "connectionMetrics": {},
+                "sourceMetrics": {},
+                "targetMetrics": {},
+            },
+        )
+
+    @_route("GET", "/api/2/connections/{connectionId}/logs")
+    def _connection_logs(self, call: _Call) -> httpx.Response:
+        entity = self._connection(call.params["connectionId"])
+        return _json_response(
+            200, {"connectionId": entity.value["id"], "enabledSince": None, "enabledUntil": None, "connectionLogs": []}
+        )
+
+    # DevOps
+
+    def _module_logging(self, module: str) -> dict[str, Any]:
+        if module not in self._log_levels:
+            raise _DittoError(404, "devops:module.notfound", f"The module '{module}' could not be found.")
+        return {
+            "1": {
+                "type": "devops.responses:retrieveLoggerConfig",
+                "status": 200,
+                "serviceName": module,
+                "instance": "1",
+                "loggerConfigs": [{"logger": name, "level": level} for name, level in self._log_levels[module].items()],
+            }
+        }
+
+    def _change_log_level(self, module: str, body: Any) -> dict[str, Any]:
+        if not isinstance(body, dict) or not body.get("logger") or not body.get("level"):
+            raise _DittoError(400, "devops:loggerconfig.invalid", "Both logger and level are required.")
+        self._module_logging(module)
+        self._log_levels[module][body["logger"]] = body["level"]
+        return {"1": {"type": "devops.responses:changeLogLevel", "status": 200, "serviceName": module, "instance": "1"}}
+
+    @_route("GET,PUT", "/devops/logging")
+    def _logging(self, call: _Call) -> httpx.Response:
+        if call.method == "GET":
+            return _json_response(200, {module: self._module_logging(module) for module in MODULES})
+        body = call.json()
+        return _json_response(200, [{module: self._change_log_level(module, body) for module in MODULES}])
+
+    @_route("GET,PUT", "/devops/logging/{moduleName}")
+    def _module_logging_resource(self, call: _Call) -> httpx.Response:
+        module = call.params["moduleName"]
+        if call.method == "GET":
+            return _json_response(200, self._module_logging(module))
+        return _json_response(201, self._change_log_level(module, call.json()))
+
+    @_route("GET", "/devops/config", "/devops/config/{moduleName}/{podName}")
+    def _config(self, call: _Call) -> httpx.Response:
+        modules = [call.params["moduleName"]] if "moduleName" in call.params else list(MODULES)
+        pod = call.params.get("podName", "1")
+        config = {"type": "common.responses:retrieveConfig", "status": 200, "config": {"ditto": {"mock": True}}}
+        return _json_response(200, {module: {pod: config} for module in modules})
+
+    @_route(
+        "POST",
+        "/devops/piggyback",
+        "/devops/piggyback/{serviceName}",
+        "/devops/piggyback/{serviceName}/{instanceIndex}",
+    )
+    def _piggyback(self, call: _Call) -> httpx.Response:
+        body = call.json()
+        command = body.get("piggybackCommand", {}) if isinstance(body, dict) else {}
+        command_type = str(command.get("type", "")).replace(".commands:", ".responses:")
+        service = call.params.get("serviceName", "things")
+        return _json_response(
+            200, {service: {call.params.get("instanceIndex", "1"): {"type": command_type, "status": 200}}}
+        )
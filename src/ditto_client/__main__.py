@@ -7,25 +7,26 @@ from dotenv import load_dotenv
 from typer import Typer
 
 from ditto_client import __version__
-from ditto_client.cli._config import config_app
-from ditto_client.cli._connection import connection_app
-from ditto_client.cli._devops import devops_app
-from ditto_client.cli._logging import logging_app
-from ditto_client.cli._permission import permission_app
-from ditto_client.cli._policy import policy_app
-from ditto_client.cli._search import search_app
-from ditto_client.cli._thing import thing_app
+from ditto_client.cli._lazy import LazySubcommand, LazyTyperGroup
+
+
+class _CliGroup(LazyTyperGroup):
+    # Command groups pull in kiota, httpx, rich and the generated models, so each one is
+    # only imported when it is invoked
+    lazy_subcommands = {
+        "policy": LazySubcommand("ditto_client.cli._policy:policy_app", "Policy management"),
+        "thing": LazySubcommand("ditto_client.cli._thing:thing_app", "Thing management"),
+        "search": LazySubcommand("ditto_client.cli._search:search_app", "Thing search"),
+        "connection": LazySubcommand("ditto_client.cli._connection:connection_app", "Connection management"),
+        "devops": LazySubcommand("ditto_client.cli._devops:devops_app", "DevOps"),
+        "permission": LazySubcommand("ditto_client.cli._permission:permission_app", "Permission check"),
+        "config": LazySubcommand("ditto_client.cli._config:config_app", "Configuration management"),
+        "logging": LazySubcommand("ditto_client.cli._logging:logging_app", "Logging configuration management"),
+    }
+
 
 load_dotenv()
-cli_app = Typer(name=f"Ditto Client [{__version__}]")
-cli_app.add_typer(policy_app, name="policy", help="Policy management")
-cli_app.add_typer(thing_app, name="thing", help="Thing management")
-cli_app.add_typer(search_app, name="search", help="Thing search")
-cli_app.add_typer(connection_app, name="connection", help="Connection management")
-cli_app.add_typer(devops_app, name="devops", help="DevOps")
-cli_app.add_typer(permission_app, name="permission", help="Permission check")
-cli_app.add_typer(config_app, name="config", help="Configuration management")
-cli_app.add_typer(logging_app, name="logging", help="Logging configuration management")
+cli_app = Typer(name=f"Ditto Client [{__version__}]", cls=_CliGroup)
 
 LOG_LEVELS = {
     "debug": logging.DEBUG,
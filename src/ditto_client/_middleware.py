@@ -0,0 +1,14 @@
+import httpx
+from kiota_http.middleware.middleware import BaseMiddleware
+
+
+class DittoMiddleware(BaseMiddleware):
+    """Typed base for the kiota middleware of this package."""
+
+    def __init__(self) -> None:
+        super().__init__()  # type: ignore[no-untyped-call]
+
+    async def send_next(self, request: httpx.Request, transport: httpx.AsyncBaseTransport) -> httpx.Response:
+        """Pass the request to the next middleware, or the transport at the end of the pipeline."""
+        response: httpx.Response = await super().send(request, transport)  # type: ignore[no-untyped-call]
+        return response
@@ -0,0 +1,80 @@
+import json
+from collections.abc import Callable
+from typing import Any, Optional
+
+import httpx
+from kiota_abstractions.api_error import APIError
+from kiota_abstractions.response_handler import ResponseHandler
+from kiota_abstractions.serialization.parsable_factory import ParsableFactory
+from kiota_serialization_json.json_parse_node import JsonParseNode
+
+
+def _find_error_class(
+    error_map: Optional[dict[str, ParsableFactory[Any]]],
+    status_code: int,
+) -> Optional[ParsableFactory[Any]]:
+    if not error_map:
+        return None
+    if str(status_code) in error_map:
+        return error_map[str(status_code)]
+    if 400 <= status_code < 500 and "4XX" in error_map:
+        return error_map["4XX"]
+    if 500 <= status_code < 600 and "5XX" in error_map:
+        return error_map["5XX"]
+    return error_map.get("XXX")
+
+
+def raise_for_status(response: httpx.Response, error_map: Optional[dict[str, ParsableFactory[Any]]]) -> None:
+    """Raise the error mapped for a failed response, mirroring what the kiota request adapter does."""
+    if response.is_success or response.status_code == 304:
+        return
+
+    headers = dict(response.headers)
+    error_class = _find_error_class(error_map, response.status_code)
+    if error_class is None or not response.content:
+        raise APIError(
+            f"The server returned an unexpected status code {response.status_code}",
+            response.status_code,
+            headers,
+        )
+
+    try:
+        error = JsonParseNode(json.loads(response.content)).get_object_value(error_class)
+    except ValueError as ex:
+        raise APIError(
+            f"The server returned an unexpected status code {response.status_code} and the error body could not be parsed",
+            response.status_code,
+            headers,
+        ) from ex
+
+    if not isinstance(error, APIError):
+        raise APIError(
+            f"The server returned an unexpected status code {response.status_code}",
+            response.status_code,
+            headers,
+        )
+
+    error.response_status_code = response.status_code
+    error.response_headers = headers
+    raise error
+
+
+def has_content(response: httpx.Response) -> bool:
+    return response.status_code not in (204, 304) and bool(response.content)
+
+
+class DecodingResponseHandler(ResponseHandler):
+    """Response handler returning ``decoder(body)`` for successful responses instead of a kiota model."""
+
+    def __init__(self, decoder: Callable[[bytes], Any]) -> None:
+        self._decoder = decoder
+
+    async def handle_response_async(  # type: ignore[override]
+        self,
+        response: httpx.Response,
+        error_map: Optional[dict[str, ParsableFactory[Any]]],
+    ) -> Any:
+        raise_for_status(response, error_map)
+        if not has_content(response):
+            return None
+        return self._decoder(response.content)
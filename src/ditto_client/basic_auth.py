@@ -1,8 +1,7 @@
 import binascii
-from typing import Any
+from typing import Any, Optional
 
 from kiota_abstractions.authentication.authentication_provider import AuthenticationProvider
-from kiota_abstractions.headers_collection import HeadersCollection
 from kiota_abstractions.request_information import RequestInformation
 
 
@@ -35,14 +34,30 @@ class BasicAuthProvider(AuthenticationProvider):
         password: str,
     ) -> None:
         self._user_name = user_name
-        self._password = password
+        # The header only depends on the credentials, so it is encoded once instead of on every request
+        self._auth_header = _build_auth_header(user_name, password)
+
+    @property
+    def user_name(self) -> str:
+        return self._user_name
+
+    @property
+    def auth_header(self) -> str:
+        return self._auth_header
+
+    def update_credentials(self, user_name: str, password: str) -> None:
+        """Rotate the credentials used by subsequent requests.
+
+        The new header is fully built before it replaces the old one in a single assignment, so
+        concurrent requests always send either the previous or the new credentials, never a mix.
+        """
+        auth_header = _build_auth_header(user_name, password)
+        self._user_name = user_name
+        self._auth_header = auth_header
 
     async def authenticate_request(
         self,
         request: RequestInformation,
-        additional_authentication_context: dict[str, Any] = {},
+        additional_authentication_context: Optional[dict[str, Any]] = None,
     ) -> None:
-        if not request.request_headers:
-            request.headers = HeadersCollection()
-
-        request.headers.add("Authorization", _build_auth_header(self._user_name, self._password))
+        request.headers.add("Authorization", self._auth_header)
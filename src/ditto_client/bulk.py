@@ -0,0 +1,131 @@
+import asyncio
+from collections.abc import AsyncGenerator, AsyncIterable, Iterable
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Optional, Union
+
+from kiota_abstractions.api_error import APIError
+
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.generated.models.advanced_error import AdvancedError
+from ditto_client.generated.models.new_thing import NewThing
+from ditto_client.generated.models.patch_thing import PatchThing
+from ditto_client.generated.models.thing import Thing
+from ditto_client.sync import sync_thing
+
+DEFAULT_MAX_IN_FLIGHT = 64
+
+
+class ThingOperationKind(str, Enum):
+    Put = "put"
+    Patch = "patch"
+    Delete = "delete"
+    # Patch only what differs from ``current`` (read from Ditto when None), see ``sync_thing``
+    Sync = "sync"
+
+
+@dataclass
+class ThingOperation:
+    kind: ThingOperationKind
+    thing_id: str
+    data: dict[str, Any] = field(default_factory=dict)
+    current: Optional[dict[str, Any]] = None
+
+
+@dataclass
+class ThingOperationResult:
+    operation: ThingOperation
+    # Position of the operation in the input, results are yielded in completion order
+    index: int
+    thing: Optional[Thing] = None
+    error: Optional[Exception] = None
+    # True when a sync operation found the thing up to date and sent nothing
+    skipped: bool = False
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+    @property
+    def status_code(self) -> Optional[int]:
+        if isinstance(self.error, APIError):
+            return self.error.response_status_code
+        return None
+
+    @property
+    def error_code(self) -> Optional[str]:
+        """The Ditto error code (e.g. ``things:thing.notfound``) when the server returned an ``AdvancedError``."""
+        if isinstance(self.error, AdvancedError):
+            return self.error.error
+        return None
+
+
+async def _execute(client: DittoClient, index: int, operation: ThingOperation) -> ThingOperationResult:
+    builder = client.api.two.things.by_thing_id(operation.thing_id)
+    skipped = False
+    try:
+        if operation.kind == ThingOperationKind.Put:
+            thing = await builder.put(body=NewThing(additional_data=operation.data))
+        elif operation.kind == ThingOperationKind.Patch:
+            thing = await builder.patch(body=PatchThing(additional_data=operation.data))
+        elif operation.kind == ThingOperationKind.Sync:
+            thing = None
+            skipped = await sync_thing(client, operation.thing_id, operation.data, current=operation.current) is None
+        else:
+            await builder.delete()
+            thing = None
+    except Exception as ex:
+        return ThingOperationResult(operation=operation, index=index, error=ex)
+
+    return ThingOperationResult(operation=operation, index=index, thing=thing, skipped=skipped)
+
+
+async def _aiter_operations(
+    operations: Union[Iterable[ThingOperation], AsyncIterable[ThingOperation]],
+) -> AsyncGenerator[ThingOperation, None]:
+    if isinstance(operations, AsyncIterable):
+        async for operation in operations:
+            yield operation
+    else:
+        for operation in operations:
+            yield operation
+
+
+async def execute_bulk(
+    client: DittoClient,
+    operations: Union[Iterable[ThingOperation], AsyncIterable[ThingOperation]],
+    *,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+) -> AsyncGenerator[ThingOperationResult, None]:
+    """Run thing put/patch/delete operations with at most ``max_in_flight`` requests outstanding.
+
+    Operations are pulled from ``operations`` only when a slot frees up and results are
+    yielded as they complete, so neither the input nor the results are ever buffered beyond
+    the in-flight window. A slow consumer stalls the executor rather than growing memory.
+    Failures are reported in the result of the failing operation and never abort the batch.
+    """
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1.")
+
+    in_flight: set[asyncio.Task[ThingOperationResult]] = set()
+    source = _aiter_operations(operations)
+    index = 0
+    try:
+        async for operation in source:
+            in_flight.add(asyncio.create_task(_execute(client, index, operation)))
+            index += 1
+
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+
+        while in_flight:
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in in_flight:
+            task.cancel()
+        await asyncio.gather(*in_flight, return_exceptions=True)
+        await source.aclose()
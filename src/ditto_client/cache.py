@@ -0,0 +1,280 @@
+import json
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import httpx
+
+from ditto_client._middleware import DittoMiddleware
+from ditto_client.fast_json import thing_from_dict
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.generated.models.thing import Thing
+from ditto_client.merge_patch import apply_merge_patch
+from ditto_client.search import iter_search_raw_things
+from ditto_client.sse import ThingChangeEvent, subscribe_thing_changes
+
+DEFAULT_MAX_SIZE = 10_000
+
+# Everything a plain GET of a thing returns, plus the revision used to order updates
+_SEED_FIELDS = "thingId,policyId,definition,attributes,features,_revision"
+
+# A thing, optionally followed by the path of one of its sub-resources
+_THING_PATH = re.compile(r"/api/2/things/([^/]+)(/.*)?")
+_ETAG_REVISION = re.compile(r'^(?:W/)?"rev:(\d+)"$')
+# Reads that must not be answered from the current state
+_BYPASS_HEADERS: frozenset[str] = frozenset(
+    ("at-historical-revision", "at-historical-timestamp", "channel", "if-match", "if-none-match")
+)
+
+
+@dataclass
+class ThingCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    applied_events: int = 0
+    stale_events: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass
+class _Entry:
+    data: dict[str, Any]
+    revision: Optional[int]
+    stored_at: float
+
+
+@dataclass
+class _Fill:
+    # Reads of the thing in flight, and changes to it seen while they were
+    readers: int = 0
+    changes: int = 0
+
+
+def _revision_of(data: dict[str, Any]) -> Optional[int]:
+    revision = data.get("_revision")
+    return revision if isinstance(revision, int) else None
+
+
+class ThingCache:
+    """In-process LRU cache of things keyed by thingId, kept current by Ditto change events.
+
+    Entries remember the ``_revision`` they were stored at; writes and events carrying an older
+    or equal revision are ignored, so events arriving late or out of order never roll a thing
+    back. With ``ttl`` set, entries older than ``ttl`` seconds count as misses.
+
+    The cache holds whatever the credentials used to fill it may read; share it only between
+    clients using the same credentials.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, ttl: Optional[float] = None) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1.")
+
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._fills: dict[str, _Fill] = {}
+        self._stats = ThingCacheStats()
+
+    @property
+    def stats(self) -> ThingCacheStats:
+        return self._stats
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, thing_id: object) -> bool:
+        return thing_id in self._entries
+
+    def get_dict(self, thing_id: str) -> Optional[dict[str, Any]]:
+        """Return the cached thing JSON, including ``_revision`` when known. Do not mutate it."""
+        entry = self._entries.get(thing_id)
+        if entry is not None and self._ttl is not None and time.monotonic() - entry.stored_at > self._ttl:
+            del self._entries[thing_id]
+            self._stats.expirations += 1
+            entry = None
+
+        if entry is None:
+            self._stats.misses += 1
+            return None
+
+        self._entries.move_to_end(thing_id)
+        self._stats.hits += 1
+        return entry.data
+
+    def get(self, thing_id: str) -> Optional[Thing]:
+        data = self.get_dict(thing_id)
+        return thing_from_dict(data) if data is not None else None
+
+    def revision(self, thing_id: str) -> Optional[int]:
+        entry = self._entries.get(thing_id)
+        return entry.revision if entry is not None else None
+
+    def put(self, data: dict[str, Any], revision: Optional[int] = None) -> bool:
+        """Store a full thing, unless the cache already holds a newer revision of it."""
+        thing_id = data.get("thingId")
+        if not isinstance(thing_id, str):
+            raise ValueError("Cached things need a thingId.")
+
+        if revision is None:
+            revision = _revision_of(data)
+        current = self._entries.get(thing_id)
+        if current is not None and revision is not None and current.revision is not None:
+            if revision < current.revision:
+                return False
+
+        self._entries[thing_id] = _Entry(data=data, revision=revision, stored_at=time.monotonic())
+        self._entries.move_to_end(thing_id)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+        return True
+
+    def invalidate(self, thing_id: str) -> None:
+        self._entries.pop(thing_id, None)
+        self._changed(thing_id)
+
+    def start_fill(self, thing_id: str) -> int:
+        """Announce a read of ``thing_id`` meant to fill the cache; pass the result to ``finish_fill``."""
+        fill = self._fills.setdefault(thing_id, _Fill())
+        fill.readers += 1
+        return fill.changes
+
+    def finish_fill(self, thing_id: str, token: int, data: Optional[dict[str, Any]], revision: Optional[int]) -> bool:
+        """Store ``data`` read since ``start_fill`` returned ``token``, unless the thing changed meanwhile."""
+        fill = self._fills[thing_id]
+        fill.readers -= 1
+        if not fill.readers:
+            del self._fills[thing_id]
+        if data is None or fill.changes != token:
+            return False
+        return self.put(data, revision)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def apply_event(self, event: ThingChangeEvent) -> bool:
+        """Merge a change event into the cached thing; things not in the cache are left alone."""
+        if event.thing_id is None:
+            return False
+        entry = self._entries.get(event.thing_id)
+        if entry is None:
+            # A read in flight may have been answered before this change
+            self._changed(event.thing_id)
+            return False
+
+        revision = event.revision
+        if revision is None:
+            # Without a revision the event cannot be ordered against the cached state
+            self.invalidate(event.thing_id)
+            return False
+        if entry.revision is not None and revision <= entry.revision:
+            self._stats.stale_events += 1
+            return False
+
+        entry.data = apply_merge_patch(entry.data, event.data)
+        entry.revision = revision
+        entry.stored_at = time.monotonic()
+        self._stats.applied_events += 1
+        return True
+
+    def _changed(self, thing_id: str) -> None:
+        fill = self._fills.get(thing_id)
+        if fill is not None:
+            fill.changes += 1
+
+    async def seed_from_search(
+        self,
+        client: DittoClient,
+        *,
+        filter: Optional[str] = None,
+        namespaces: Optional[str] = None,
+    ) -> int:
+        """Fill the cache from a search, returning the number of things stored."""
+        stored = 0
+        async for data in iter_search_raw_things(client, filter=filter, namespaces=namespaces, fields=_SEED_FIELDS):
+            stored += self.put(data)
+        return stored
+
+    async def follow(
+        self,
+        client: DittoClient,
+        *,
+        namespaces: Optional[str] = None,
+        filter: Optional[str] = None,
+    ) -> None:
+        """Apply Ditto's change events to the cache until cancelled. Run it as a background task."""
+        async for event in subscribe_thing_changes(
+            client,
+            namespaces=namespaces,
+            filter=filter,
+            extra_fields="_revision",
+        ):
+            self.apply_event(event)
+
+
+def etag_revision(etag: Optional[str]) -> Optional[int]:
+    """The revision carried by a thing's ``"rev:N"`` ETag, None for any other ETag."""
+    match = _ETAG_REVISION.match(etag or "")
+    return int(match.group(1)) if match else None
+
+
+class ThingCacheMiddleware(DittoMiddleware):
+    """Answers plain ``GET /api/2/things/{thingId}`` requests from a ``ThingCache``.
+
+    Misses are fetched and stored, with the revision taken from Ditto's ``ETag``. Requests with
+    query parameters (e.g. ``fields``), conditional or historical headers go to Ditto untouched,
+    and any write to a thing or one of its sub-resources invalidates its entry.
+    """
+
+    def __init__(self, cache: ThingCache) -> None:
+        super().__init__()
+        self._cache = cache
+
+    async def send(self, request: httpx.Request, transport: httpx.AsyncBaseTransport) -> httpx.Response:
+        match = _THING_PATH.fullmatch(request.url.path)
+        if match is None:
+            return await self.send_next(request, transport)
+
+        thing_id = match.group(1)
+        if request.method != "GET":
+            try:
+                return await self.send_next(request, transport)
+            finally:
+                # Also when no response came back, the write may have been applied
+                self._cache.invalidate(thing_id)
+
+        if match.group(2) or request.url.query or not _BYPASS_HEADERS.isdisjoint(request.headers.keys()):
+            return await self.send_next(request, transport)
+
+        cached = self._cache.get_dict(thing_id)
+        if cached is not None:
+            revision = self._cache.revision(thing_id)
+            return httpx.Response(
+                200,
+                json={key: value for key, value in cached.items() if not key.startswith("_")},
+                headers={"ETag": f'"rev:{revision}"'} if revision is not None else None,
+                request=request,
+            )
+
+        # A write or event while the read is in flight makes its response unfit to cache
+        token = self._cache.start_fill(thing_id)
+        data: Optional[dict[str, Any]] = None
+        revision = None
+        try:
+            response = await self.send_next(request, transport)
+            if response.status_code == 200:
+                await response.aread()
+                data = json.loads(response.content)
+                revision = etag_revision(response.headers.get("ETag"))
+        finally:
+            self._cache.finish_fill(thing_id, token, data, revision)
+        return response
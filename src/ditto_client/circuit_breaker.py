@@ -0,0 +1,202 @@
+import logging
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+import httpx
+
+from ditto_client._middleware import DittoMiddleware
+from ditto_client.endpoints import ENDPOINT_FAMILY_PREFIXES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREFIXES = tuple(prefix for prefix, _ in ENDPOINT_FAMILY_PREFIXES)
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+# Statuses meaning the service behind the gateway is unhealthy, not that the request was wrong
+_FAILURE_STATUS_CODES = frozenset((500, 502, 503, 504))
+
+
+class CircuitState(str, Enum):
+    Closed = "closed"
+    Open = "open"
+    HalfOpen = "half-open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit of its path prefix is open."""
+
+    def __init__(self, prefix: str, retry_in: float) -> None:
+        super().__init__(f"Circuit for {prefix} is open, retry in {retry_in:.1f}s.")
+        self.prefix = prefix
+        self.retry_in = retry_in
+
+
+StateChangeHook = Callable[[str, CircuitState, CircuitState], None]
+
+
+@dataclass
+class CircuitStats:
+    state: CircuitState = CircuitState.Closed
+    consecutive_failures: int = 0
+    rejected: int = 0
+    opened: int = 0
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker of one path prefix.
+
+    ``failure_threshold`` consecutive failures open the circuit; requests then fail fast for
+    ``reset_timeout`` seconds. Afterwards a single probe request is let through: its success
+    closes the circuit, its failure opens it again. Outcomes are reported with the generation
+    returned by ``before_request`` and ignored once the state changed since, so responses of
+    requests sent before the circuit opened cannot close it.
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        *,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        on_state_change: Optional[StateChangeHook] = None,
+    ) -> None:
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1.")
+
+        self._prefix = prefix
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._on_state_change = on_state_change
+        self._stats = CircuitStats()
+        self._opened_at = 0.0
+        self._probing = False
+        # Incremented on every state change
+        self._generation = 0
+
+    @property
+    def prefix(self) -> str:
+        return self._prefix
+
+    @property
+    def state(self) -> CircuitState:
+        return self._stats.state
+
+    @property
+    def stats(self) -> CircuitStats:
+        return self._stats
+
+    def before_request(self) -> int:
+        """Raise ``CircuitOpenError`` unless the request may be sent, else return the generation to report with."""
+        if self._stats.state == CircuitState.Open:
+            retry_in = self._opened_at + self._reset_timeout - time.monotonic()
+            if retry_in > 0:
+                self._stats.rejected += 1
+                raise CircuitOpenError(self._prefix, retry_in)
+            self._transition(CircuitState.HalfOpen)
+
+        if self._stats.state == CircuitState.HalfOpen:
+            if self._probing:
+                self._stats.rejected += 1
+                raise CircuitOpenError(self._prefix, 0.0)
+            self._probing = True
+        return self._generation
+
+    def record_success(self, generation: int) -> None:
+        if generation != self._generation:
+            return
+        self._probing = False
+        self._stats.consecutive_failures = 0
+        if self._stats.state != CircuitState.Closed:
+            self._transition(CircuitState.Closed)
+
+    def record_failure(self, generation: int) -> None:
+        if generation != self._generation:
+            return
+        self._probing = False
+        self._stats.consecutive_failures += 1
+        if self._stats.state == CircuitState.HalfOpen or (
+            self._stats.state == CircuitState.Closed and self._stats.consecutive_failures >= self._failure_threshold
+        ):
+            self._opened_at = time.monotonic()
+            self._stats.opened += 1
+            self._transition(CircuitState.Open)
+
+    def release_probe(self, generation: int) -> None:
+        """Give up a probe that ended without telling anything about the service's health."""
+        if generation == self._generation:
+            self._probing = False
+
+    def _transition(self, state: CircuitState) -> None:
+        self._generation += 1
+        previous, self._stats.state = self._stats.state, state
+        logger.info("Circuit for %s changed from %s to %s", self._prefix, previous.value, state.value)
+        if self._on_state_change is not None:
+            try:
+                self._on_state_change(self._prefix, previous, state)
+            except Exception:
+                logger.exception("Circuit state change hook failed")
+
+
+class CircuitBreakerMiddleware(DittoMiddleware):
+    """Fails requests fast with ``CircuitOpenError`` while the service behind their path prefix is down.
+
+    Each prefix (by default things, search, policies, connections and devops) has its own
+    ``CircuitBreaker``; requests matching none of them pass through. ``5xx`` responses, timeouts
+    and connection errors count as failures, any other response as success.
+    ``on_state_change(prefix, old_state, new_state)`` is called on every transition, e.g. to alert.
+    """
+
+    def __init__(
+        self,
+        prefixes: Iterable[str] = DEFAULT_PREFIXES,
+        *,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        on_state_change: Optional[StateChangeHook] = None,
+    ) -> None:
+        super().__init__()
+        # Longest prefix first, so /api/2/search/things is not matched by a broader /api/2/search
+        self._breakers = [
+            CircuitBreaker(
+                prefix,
+                failure_threshold=failure_threshold,
+                reset_timeout=reset_timeout,
+                on_state_change=on_state_change,
+            )
+            for prefix in sorted(prefixes, key=len, reverse=True)
+        ]
+
+    @property
+    def breakers(self) -> dict[str, CircuitBreaker]:
+        return {breaker.prefix: breaker for breaker in self._breakers}
+
+    def _breaker(self, path: str) -> Optional[CircuitBreaker]:
+        for breaker in self._breakers:
+            if path == breaker.prefix or path.startswith(breaker.prefix + "/"):
+                return breaker
+        return None
+
+    async def send(self, request: httpx.Request, transport: httpx.AsyncBaseTransport) -> httpx.Response:
+        breaker = self._breaker(request.url.path)
+        if breaker is None:
+            return await self.send_next(request, transport)
+
+        generation = breaker.before_request()
+        try:
+            response = await self.send_next(request, transport)
+        except (httpx.TimeoutException, httpx.NetworkError):
+            breaker.record_failure(generation)
+            raise
+        except BaseException:
+            breaker.release_probe(generation)
+            raise
+
+        if response.status_code in _FAILURE_STATUS_CODES:
+            breaker.record_failure(generation)
+        else:
+            breaker.record_success(generation)
+        return response
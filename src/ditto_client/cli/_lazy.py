@@ -0,0 +1,61 @@
+import importlib
+from dataclasses import dataclass
+from typing import Optional
+
+import click
+import typer
+from typer.core import TyperGroup
+
+
+@dataclass(frozen=True)
+class LazySubcommand:
+    # "package.module:attribute" of the Typer app implementing the command group
+    import_path: str
+    help: str
+
+
+class LazyTyperGroup(TyperGroup):
+    """Typer group importing its command groups only when one of them is invoked.
+
+    Subclasses list their groups in ``lazy_subcommands``. Listing them in ``--help`` uses the
+    registered help text, so the root help imports none of the groups.
+    """
+
+    lazy_subcommands: dict[str, LazySubcommand] = {}
+
+    def __init__(self, **attrs: object) -> None:
+        super().__init__(**attrs)  # type: ignore[arg-type]
+        self._loaded: dict[str, click.Command] = {}
+        self._listing = False
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return [*super().list_commands(ctx), *self.lazy_subcommands]
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        subcommand = self.lazy_subcommands.get(cmd_name)
+        if subcommand is None:
+            return super().get_command(ctx, cmd_name)
+        if self._listing:
+            return TyperGroup(name=cmd_name, help=subcommand.help)
+        if cmd_name not in self._loaded:
+            self._loaded[cmd_name] = self._load(cmd_name, subcommand)
+        return self._loaded[cmd_name]
+
+    def format_help(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        self._listing = True
+        try:
+            super().format_help(ctx, formatter)
+        finally:
+            self._listing = False
+
+    @staticmethod
+    def _load(cmd_name: str, subcommand: LazySubcommand) -> click.Command:
+        module_name, attribute = subcommand.import_path.split(":")
+        app = getattr(importlib.import_module(module_name), attribute)
+        if not isinstance(app, typer.Typer):
+            raise TypeError(f"{subcommand.import_path} is not a Typer app.")
+
+        group = typer.main.get_group(app)
+        group.name = cmd_name
+        group.help = group.help or subcommand.help
+        return group
@@ -12,6 +12,7 @@ from typer import Typer
 
 from ditto_client.generated.api.two.search.things.count.count_request_builder import CountRequestBuilder
 from ditto_client.generated.api.two.search.things.things_request_builder import ThingsRequestBuilder
+from ditto_client.search import iter_search_things
 
 from ._utils import create_ditto_client
 
@@ -27,9 +28,37 @@ def query(
     namespaces: Optional[str] = typer.Option(None, help="Comma-separated list of namespaces to search"),
     option: Optional[str] = typer.Option(None, help="Search options (e.g., 'size(10),sort(+thingId)')"),
     timeout: Optional[str] = typer.Option(None, help="Request timeout (e.g., '30s', '1m')"),
+    all_pages: bool = typer.Option(False, "--all", help="Follow the search cursor and return every page"),
+    sort: Optional[str] = typer.Option(None, help="Sort order used with --all (e.g., '+thingId')"),
 ) -> None:
     """Search for things in Ditto."""
 
+    if all_pages and option:
+        rprint("[red]--option cannot be combined with --all, use --sort instead[/red]")
+        raise typer.Exit(code=1)
+
+    async def _run_all() -> None:
+        client = create_ditto_client()
+
+        table = Table(title="Ditto Things")
+        table.add_column("Thing ID", justify="left", style="cyan", no_wrap=True)
+        table.add_column("Features", justify="center", style="yellow")
+
+        async for thing in iter_search_things(
+            client, filter=filter, namespaces=namespaces, fields=fields, sort=sort, timeout=timeout
+        ):
+            features_count = (
+                len(thing.features.additional_data) if thing.features and thing.features.additional_data else 0
+            )
+            table.add_row(thing.thing_id, str(features_count))
+
+        if not table.row_count:
+            rprint("[yellow]No things found[/yellow]")
+            return
+
+        console = Console()
+        console.print(table)
+
     async def _run() -> None:
         client = create_ditto_client()
 
@@ -72,7 +101,7 @@ def query(
         console = Console()
         console.print(table)
 
-    asyncio.run(_run())
+    asyncio.run(_run_all() if all_pages else _run())
 
 
 @search_app.command()
@@ -2,10 +2,11 @@
 
 import asyncio
 import json
+import time
+from collections.abc import Iterator
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Optional, TextIO
 
-import jsonpatch
 import typer
 from kiota_abstractions.base_request_configuration import RequestConfiguration
 from rich import print as rprint
@@ -13,10 +14,12 @@ from rich.console import Console
 from rich.table import Table
 from typer import Typer
 
+from ditto_client.bulk import DEFAULT_MAX_IN_FLIGHT, ThingOperation, ThingOperationKind, execute_bulk
 from ditto_client.generated.api.two.things.things_request_builder import ThingsRequestBuilder
 from ditto_client.generated.models.new_thing import NewThing
 from ditto_client.generated.models.patch_thing import PatchThing
 from ditto_client.generated.models.thing import Thing
+from ditto_client.search import MAX_PAGE_SIZE, iter_search_raw_things
 
 from ._utils import create_ditto_client
 
@@ -193,7 +196,9 @@ def diff(
         current_json = json.loads(json.dumps(current_data, default=str))
         historical_json = json.loads(json.dumps(historical_data, default=str))
 
-        # Generate JSON patch
+        # Generate JSON patch, jsonpatch is only needed by this command
+        import jsonpatch
+
         patch = jsonpatch.make_patch(historical_json, current_json)
 
         if not patch:
@@ -224,3 +229,108 @@ def delete(
         rprint(f"[green]Successfully deleted thing '{thing_id}'[/green]")
 
     asyncio.run(_run())
+
+
+@thing_app.command()
+def export(
+    output: typer.FileTextWrite = typer.Argument("-", help="NDJSON file to write things to ('-' for stdout)"),
+    filter: Optional[str] = typer.Option(None, help="RQL filter expression selecting the things to export"),
+    namespaces: Optional[str] = typer.Option(None, help="Comma-separated list of namespaces to export"),
+    fields: Optional[str] = typer.Option(None, help="Comma-separated list of fields to include"),
+    page_size: int = typer.Option(MAX_PAGE_SIZE, help="Number of things fetched per search page"),
+) -> None:
+    """Export things as newline-delimited JSON, following search cursors page by page."""
+
+    err_console = Console(stderr=True)
+
+    async def _run() -> None:
+        client = create_ditto_client()
+
+        exported = 0
+        started = time.monotonic()
+        # Written as returned by Ditto: going through the Thing model turns date-like strings into datetimes
+        async for thing in iter_search_raw_things(
+            client, filter=filter, namespaces=namespaces, fields=fields, page_size=page_size
+        ):
+            output.write(json.dumps(thing, ensure_ascii=False))
+            output.write("\n")
+            exported += 1
+
+        output.flush()
+        elapsed = time.monotonic() - started
+        err_console.print(f"[green]Exported {exported} things in {elapsed:.1f}s[/green]")
+
+    asyncio.run(_run())
+
+
+@thing_app.command(name="import")
+def import_(
+    input: typer.FileText = typer.Argument("-", help="NDJSON file to read things from ('-' for stdin)"),
+    patch: bool = typer.Option(False, help="Merge each line into the existing thing instead of replacing it"),
+    sync: bool = typer.Option(
+        False, help="Replace each thing by patching only what changed, skipping things already up to date"
+    ),
+    max_in_flight: int = typer.Option(DEFAULT_MAX_IN_FLIGHT, help="Maximum number of requests in flight"),
+    report_every: int = typer.Option(1000, help="Report throughput every N things"),
+) -> None:
+    """Import things from newline-delimited JSON, one thing per line with its thingId."""
+
+    err_console = Console(stderr=True)
+    if sync:
+        kind = ThingOperationKind.Sync
+    elif patch:
+        kind = ThingOperationKind.Patch
+    else:
+        kind = ThingOperationKind.Put
+
+    invalid = 0
+
+    def _operations() -> Iterator[ThingOperation]:
+        nonlocal invalid
+        for line_number, line in enumerate(input, start=1):
+            if not line.strip():
+                continue
+            try:
+                thing_data = json.loads(line)
+            except ValueError as ex:
+                invalid += 1
+                err_console.print(f"[red]Skipping line {line_number}: invalid JSON ({ex})[/red]")
+                continue
+            if not isinstance(thing_data, dict) or not isinstance(thing_data.get("thingId"), str):
+                invalid += 1
+                err_console.print(f"[red]Skipping line {line_number}: no thingId[/red]")
+                continue
+            yield ThingOperation(kind=kind, thing_id=thing_data["thingId"], data=thing_data)
+
+    async def _run() -> None:
+        client = create_ditto_client()
+
+        processed = 0
+        failed = 0
+        skipped = 0
+        started = time.monotonic()
+        async for result in execute_bulk(client, _operations(), max_in_flight=max_in_flight):
+            processed += 1
+            if not result.succeeded:
+                failed += 1
+                err_console.print(f"[red]Failed to import '{result.operation.thing_id}': {result.error}[/red]")
+            skipped += result.skipped
+
+            if processed % report_every == 0:
+                rate = processed / max(time.monotonic() - started, 1e-9)
+                err_console.print(
+                    f"[cyan]{processed + invalid} things processed ({failed + invalid} failed), {rate:.0f} things/s[/cyan]"
+                )
+
+        # Unreadable lines count as failed things
+        processed += invalid
+        failed += invalid
+        elapsed = time.monotonic() - started
+        err_console.print(
+            f"[green]Imported {processed - failed} of {processed} things in {elapsed:.1f}s "
+            f"({failed} failed, {skipped} unchanged)[/green]"
+        )
+        if failed:
+            raise typer.Exit(code=1)
+
+    asyncio.run(_run())
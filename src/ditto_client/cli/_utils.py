@@ -1,19 +1,21 @@
 import os
-
-from kiota_http.httpx_request_adapter import HttpxRequestAdapter
+from functools import cache
 
 from ditto_client.basic_auth import BasicAuthProvider
+from ditto_client.client_factory import DittoClientFactory
 from ditto_client.generated.ditto_client import DittoClient
 
 
-def create_client(user_name: str, password: str) -> DittoClient:
+@cache
+def _get_client_factory(user_name: str, password: str) -> DittoClientFactory:
     base_url = os.getenv("DITTO_BASE_URL", "http://host.docker.internal:8080")
 
     auth_provider = BasicAuthProvider(user_name=user_name, password=password)
-    request_adapter = HttpxRequestAdapter(auth_provider)
-    request_adapter.base_url = base_url
+    return DittoClientFactory(auth_provider, base_url)
 
-    return DittoClient(request_adapter)
+
+def create_client(user_name: str, password: str) -> DittoClient:
+    return _get_client_factory(user_name, password).create_client()
 
 
 def create_devops_client() -> DittoClient:
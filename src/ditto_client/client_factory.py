@@ -0,0 +1,92 @@
+from types import TracebackType
+from typing import Optional
+
+import httpx
+from kiota_abstractions.authentication.authentication_provider import AuthenticationProvider
+from kiota_http.kiota_client_factory import KiotaClientFactory
+from kiota_http.middleware.middleware import BaseMiddleware
+
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.instrumentation import Instrumentation
+from ditto_client.request_adapter import DittoRequestAdapter
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+DEFAULT_TIMEOUT = httpx.Timeout(100.0, connect=30.0)
+
+
+class DittoClientFactory:
+    """Owns a single pooled ``httpx.AsyncClient`` and hands out ``DittoClient`` instances bound to it.
+
+    Every client created by the factory shares the same connection pool, so TCP/TLS handshakes
+    are paid once per connection instead of once per client. Close the factory (or use it as an
+    async context manager) when done.
+    """
+
+    def __init__(
+        self,
+        auth_provider: AuthenticationProvider,
+        base_url: str,
+        *,
+        max_connections: Optional[int] = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: Optional[int] = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: Optional[float] = DEFAULT_KEEPALIVE_EXPIRY,
+        http2: bool = True,
+        timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+        middleware: Optional[list[BaseMiddleware]] = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ) -> None:
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        http_client = httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+        if middleware is None:
+            middleware = KiotaClientFactory.get_default_middleware(None)
+
+        self._http_client = KiotaClientFactory.create_with_custom_middleware(middleware, client=http_client)
+        self._base_url = base_url
+        self._instrumentation = instrumentation
+        self._request_adapter = self._create_request_adapter(auth_provider)
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        return self._http_client
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    def create_client(self, auth_provider: Optional[AuthenticationProvider] = None) -> DittoClient:
+        """Create a ``DittoClient`` on the shared pool.
+
+        Passing an ``auth_provider`` binds the client to different credentials while still
+        reusing the factory's connections.
+        """
+        if auth_provider is None:
+            return DittoClient(self._request_adapter)
+
+        return DittoClient(self._create_request_adapter(auth_provider))
+
+    async def aclose(self) -> None:
+        await self._http_client.aclose()
+
+    async def __aenter__(self) -> "DittoClientFactory":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await self.aclose()
+
+    def _create_request_adapter(self, auth_provider: AuthenticationProvider) -> DittoRequestAdapter:
+        request_adapter = DittoRequestAdapter(auth_provider, http_client=self._http_client)
+        request_adapter.base_url = self._base_url
+        request_adapter.instrumentation = self._instrumentation
+        return request_adapter
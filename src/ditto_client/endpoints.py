@@ -0,0 +1,29 @@
+"""Classification of Ditto request paths into the endpoint families served by separate Ditto services."""
+
+from enum import Enum
+
+
+class EndpointFamily(str, Enum):
+    Things = "things"
+    Search = "search"
+    Policies = "policies"
+    Connections = "connections"
+    DevOps = "devops"
+    Other = "other"
+
+
+ENDPOINT_FAMILY_PREFIXES = (
+    ("/api/2/things", EndpointFamily.Things),
+    ("/api/2/search", EndpointFamily.Search),
+    ("/api/2/policies", EndpointFamily.Policies),
+    ("/api/2/connections", EndpointFamily.Connections),
+    ("/devops", EndpointFamily.DevOps),
+)
+
+
+def endpoint_family(path: str) -> EndpointFamily:
+    """The family of a request path, e.g. ``EndpointFamily.Search`` for ``/api/2/search/things/count``."""
+    for prefix, family in ENDPOINT_FAMILY_PREFIXES:
+        if path == prefix or path.startswith(prefix + "/"):
+            return family
+    return EndpointFamily.Other
@@ -0,0 +1,176 @@
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import httpx
+from kiota_abstractions.serialization.parse_node import ParseNode
+
+from ditto_client._middleware import DittoMiddleware
+
+DEFAULT_MAX_ENTRIES = 10_000
+
+# Response extension carrying the cache entry a response was served from or stored in
+ETAG_CACHE_ENTRY_EXTENSION = "ditto_etag_cache_entry"
+
+_BYPASS_HEADERS: frozenset[str] = frozenset(
+    ("at-historical-revision", "at-historical-timestamp", "if-match", "if-none-match")
+)
+# Content-Encoding and Content-Length no longer apply to the decoded body served from the cache
+_STORED_HEADERS = ("content-type", "etag", "last-modified")
+
+
+@dataclass
+class ETagCacheStats:
+    revalidated: int = 0
+    fetched: int = 0
+    evictions: int = 0
+    bytes_saved: int = 0
+
+
+@dataclass
+class ETagCacheEntry:
+    etag: str
+    body: bytes
+    headers: dict[str, str]
+    # Models deserialized from ``body`` by parsable factory, None unless the cache shares models
+    models: Optional[dict[Any, Any]] = None
+
+
+class ETagCache:
+    """LRU store of GET response bodies with their ETags, keyed by URL, credentials and ``Accept``.
+
+    With ``share_models`` a ``DittoRequestAdapter`` keeps the model deserialized from a cached
+    body and returns that same instance whenever the body is revalidated, skipping
+    deserialization as well as the transfer. Models are then shared between callers and must
+    be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, *, share_models: bool = False) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+
+        self._max_entries = max_entries
+        self._share_models = share_models
+        self._entries: OrderedDict[tuple[str, str, str], ETagCacheEntry] = OrderedDict()
+        self._stats = ETagCacheStats()
+
+    @property
+    def stats(self) -> ETagCacheStats:
+        return self._stats
+
+    @property
+    def share_models(self) -> bool:
+        return self._share_models
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get(self, key: tuple[str, str, str]) -> Optional[ETagCacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple[str, str, str], entry: ETagCacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    def invalidate(self, key: tuple[str, str, str]) -> None:
+        self._entries.pop(key, None)
+
+
+class SharedModelParseNode:
+    """Root parse node returning the models already deserialized from a cached body.
+
+    The body is only parsed for a factory seen for the first time; everything else is delegated
+    to the parse node of the body.
+    """
+
+    def __init__(self, models: dict[Any, Any], parse: Callable[[], ParseNode]) -> None:
+        self._models = models
+        self._parse = parse
+        self._node: Optional[ParseNode] = None
+
+    def get_object_value(self, factory: Any) -> Any:
+        if factory not in self._models:
+            self._models[factory] = self._root().get_object_value(factory)
+        return self._models[factory]
+
+    def get_collection_of_object_values(self, factory: Any) -> Any:
+        key = (list, factory)
+        if key not in self._models:
+            self._models[key] = self._root().get_collection_of_object_values(factory)
+        return self._models[key]
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._root(), name)
+
+    def _root(self) -> ParseNode:
+        if self._node is None:
+            self._node = self._parse()
+        return self._node
+
+
+def _cache_key(request: httpx.Request) -> tuple[str, str, str]:
+    # Ditto filters responses by the caller's permissions, so the credentials are part of the key
+    return str(request.url), request.headers.get("authorization", ""), request.headers.get("accept", "")
+
+
+class ETagCacheMiddleware(DittoMiddleware):
+    """Revalidates cached GET responses with ``If-None-Match``.
+
+    Ditto answers an unchanged thing, feature or policy with ``304 Not Modified`` and no body;
+    the middleware then hands the cached body to kiota as a regular ``200`` response. Requests
+    that are already conditional or read historical state are passed through.
+    """
+
+    def __init__(self, cache: ETagCache) -> None:
+        super().__init__()
+        self._cache = cache
+
+    async def send(self, request: httpx.Request, transport: httpx.AsyncBaseTransport) -> httpx.Response:
+        if request.method != "GET" or not _BYPASS_HEADERS.isdisjoint(request.headers.keys()):
+            return await self.send_next(request, transport)
+
+        key = _cache_key(request)
+        entry = self._cache.get(key)
+        if entry is not None:
+            request.headers["If-None-Match"] = entry.etag
+
+        response = await self.send_next(request, transport)
+
+        if entry is not None and response.status_code == 304:
+            await response.aclose()
+            self._cache.stats.revalidated += 1
+            self._cache.stats.bytes_saved += len(entry.body)
+            return httpx.Response(
+                200,
+                headers=entry.headers,
+                content=entry.body,
+                request=request,
+                extensions={ETAG_CACHE_ENTRY_EXTENSION: entry},
+            )
+
+        etag = response.headers.get("etag")
+        if response.status_code != 200 or not etag:
+            self._cache.invalidate(key)
+            return response
+
+        await response.aread()
+        self._cache.stats.fetched += 1
+        entry = ETagCacheEntry(
+            etag=etag,
+            body=response.content,
+            headers={name: response.headers[name] for name in _STORED_HEADERS if name in response.headers},
+            models={} if self._cache.share_models else None,
+        )
+        self._cache.put(key, entry)
+        response.extensions[ETAG_CACHE_ENTRY_EXTENSION] = entry
+        return response
@@ -0,0 +1,91 @@
+"""Opt-in fast decoding of thing payloads, bypassing kiota's ``JsonParseNode``.
+
+The decoders build the generated ``Thing``, ``Attributes``, ``Features`` and ``SearchResultThings``
+models straight from the response bytes. Typed fields follow the same rules as the kiota path;
+free-form data (attributes, features, metadata and unknown fields) is kept exactly as decoded
+from JSON, i.e. ISO timestamps and UUIDs stay strings instead of becoming ``datetime``/``UUID``.
+
+``orjson`` (the ``fast`` extra) is used when it is installed, the standard library ``json`` module otherwise.
+"""
+
+from collections.abc import Callable
+from typing import Any, Optional, TypeVar, Union
+
+from kiota_http.middleware.options.response_handler_option import ResponseHandlerOption
+
+from ditto_client._response import DecodingResponseHandler
+from ditto_client.generated.models.attributes import Attributes
+from ditto_client.generated.models.features import Features
+from ditto_client.generated.models.search_result_things import SearchResultThings
+from ditto_client.generated.models.thing import Thing
+from ditto_client.generated.models.thing__metadata import Thing__metadata
+
+try:
+    import orjson
+
+    loads: Callable[[Union[bytes, str]], Any] = orjson.loads
+except ImportError:
+    import json
+
+    loads = json.loads
+
+T = TypeVar("T")
+
+_THING_FIELDS = frozenset(
+    ("_created", "_metadata", "_modified", "_revision", "attributes", "definition", "features", "policyId", "thingId")
+)
+
+
+def _str(value: Any) -> Optional[str]:
+    return value if isinstance(value, str) else None
+
+
+def thing_from_dict(data: dict[str, Any]) -> Thing:
+    attributes = data.get("attributes")
+    features = data.get("features")
+    metadata = data.get("_metadata")
+
+    return Thing(
+        additional_data={key: value for key, value in data.items() if key not in _THING_FIELDS},
+        _created=_str(data.get("_created")),
+        _metadata=Thing__metadata(additional_data=metadata) if isinstance(metadata, dict) else None,
+        _modified=_str(data.get("_modified")),
+        _revision=_str(data.get("_revision")),
+        attributes=Attributes(additional_data=attributes) if isinstance(attributes, dict) else None,
+        definition=_str(data.get("definition")),
+        features=Features(additional_data=features) if isinstance(features, dict) else None,
+        policy_id=_str(data.get("policyId")),
+        thing_id=_str(data.get("thingId")),
+    )
+
+
+def search_result_things_from_dict(data: dict[str, Any]) -> SearchResultThings:
+    items = data.get("items")
+
+    return SearchResultThings(
+        additional_data={key: value for key, value in data.items() if key not in ("cursor", "items")},
+        cursor=_str(data.get("cursor")),
+        items=[thing_from_dict(item) for item in items] if isinstance(items, list) else None,
+    )
+
+
+def decode_thing(payload: bytes) -> Thing:
+    return thing_from_dict(loads(payload))
+
+
+def decode_things(payload: bytes) -> list[Thing]:
+    return [thing_from_dict(item) for item in loads(payload)]
+
+
+def decode_search_result_things(payload: bytes) -> SearchResultThings:
+    return search_result_things_from_dict(loads(payload))
+
+
+def fast_json_option(decoder: Callable[[bytes], T]) -> ResponseHandlerOption:
+    """Build the request option selecting the fast decoder for a single call.
+
+    ``decoder`` must match the generated method's return type, e.g. ``decode_thing`` for
+    ``by_thing_id(...).get``, ``decode_things`` for ``things.get`` and
+    ``decode_search_result_things`` for ``search.things.get``.
+    """
+    return ResponseHandlerOption(DecodingResponseHandler(decoder))
@@ -0,0 +1,154 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+from kiota_abstractions.request_option import RequestOption
+
+from ditto_client._middleware import DittoMiddleware
+from ditto_client.endpoints import EndpointFamily, endpoint_family
+from ditto_client.retry import RetryBudget
+
+DEFAULT_PERCENTILE = 95.0
+DEFAULT_MIN_DELAY = 0.005
+DEFAULT_MAX_DELAY = 1.0
+# Latency samples kept per endpoint family, and new samples after which the percentile is recomputed
+_WINDOW = 1000
+_REFRESH_EVERY = 50
+
+
+@dataclass
+class HedgingPolicy(RequestOption):
+    """When ``HedgingMiddleware`` sends a duplicate of a slow read; also a request option enabling it per call.
+
+    The hedge is sent once the read has taken longer than ``percentile`` of recent reads of the
+    same endpoint family, bounded by ``min_delay`` and ``max_delay``; ``max_delay`` is also used
+    until enough latencies were seen.
+    """
+
+    percentile: float = DEFAULT_PERCENTILE
+    min_delay: float = DEFAULT_MIN_DELAY
+    max_delay: float = DEFAULT_MAX_DELAY
+
+    @staticmethod
+    def get_key() -> str:
+        return "DittoHedgingPolicy"
+
+
+@dataclass
+class HedgingStats:
+    requests: int = 0
+    hedges: int = 0
+    # Hedges answering before the original request
+    hedge_wins: int = 0
+    # Hedges not sent because the budget ran out
+    budget_exhausted: int = 0
+
+
+class _LatencyWindow:
+    def __init__(self) -> None:
+        self._samples: deque[float] = deque(maxlen=_WINDOW)
+        self._sorted: list[float] = []
+        self._new_samples = 0
+
+    def add(self, latency: float) -> None:
+        self._samples.append(latency)
+        self._new_samples += 1
+        if self._new_samples >= _REFRESH_EVERY:
+            self._sorted = sorted(self._samples)
+            self._new_samples = 0
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        if not self._sorted:
+            return None
+        index = min(len(self._sorted) - 1, int(len(self._sorted) * percentile / 100.0))
+        return self._sorted[index]
+
+
+def _clone(request: httpx.Request, options: dict[str, RequestOption]) -> httpx.Request:
+    clone = httpx.Request(
+        request.method, request.url, headers=request.headers.copy(), extensions=dict(request.extensions)
+    )
+    # The pipeline removes the options from the original request once it is sent
+    clone.options = dict(options)  # type: ignore[attr-defined]
+    return clone
+
+
+class HedgingMiddleware(DittoMiddleware):
+    """Sends a second copy of a slow ``GET`` and returns whichever response arrives first.
+
+    Hedging is opt-in: with a ``policy`` every GET is hedged, otherwise only calls passing a
+    ``HedgingPolicy`` in ``RequestConfiguration.options``. The losing request is cancelled.
+    Hedges are paid from ``budget``, by default 5% of the reads plus one per second, so a slow
+    Ditto does not get twice the load. Event streams are never hedged.
+    """
+
+    def __init__(self, policy: Optional[HedgingPolicy] = None, budget: Optional[RetryBudget] = None) -> None:
+        super().__init__()
+        self._policy = policy
+        self._budget = budget or RetryBudget(ratio=0.05, min_retries_per_second=1.0, max_balance=10.0)
+        self._latencies: dict[EndpointFamily, _LatencyWindow] = {}
+        self._stats = HedgingStats()
+
+    @property
+    def stats(self) -> HedgingStats:
+        return self._stats
+
+    def hedge_delay(self, family: EndpointFamily, policy: HedgingPolicy) -> float:
+        window = self._latencies.get(family)
+        latency = window.percentile(policy.percentile) if window is not None else None
+        if latency is None:
+            return policy.max_delay
+        return min(policy.max_delay, max(policy.min_delay, latency))
+
+    async def send(self, request: httpx.Request, transport: httpx.AsyncBaseTransport) -> httpx.Response:
+        options = getattr(request, "options", None) or {}
+        policy: Optional[HedgingPolicy] = options.get(HedgingPolicy.get_key(), self._policy)
+        if policy is None or request.method != "GET" or "text/event-stream" in request.headers.get("accept", ""):
+            return await self.send_next(request, transport)
+
+        self._stats.requests += 1
+        self._budget.record_request()
+        family = endpoint_family(request.url.path)
+        window = self._latencies.setdefault(family, _LatencyWindow())
+
+        started_at = hedge_started_at = time.monotonic()
+        tasks = [asyncio.create_task(self.send_next(request, transport))]
+        winner: Optional[asyncio.Task[httpx.Response]] = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(family, policy))
+            if not done:
+                if self._budget.try_spend():
+                    self._stats.hedges += 1
+                    hedge_started_at = time.monotonic()
+                    tasks.append(asyncio.create_task(self.send_next(_clone(request, options), transport)))
+                else:
+                    self._stats.budget_exhausted += 1
+
+            pending = set(tasks)
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # On a tie the original request wins
+                winner = next((task for task in tasks if task in done and task.exception() is None), None)
+        finally:
+            losers = [task for task in tasks if task is not winner]
+            for task in losers:
+                task.cancel()
+            await asyncio.gather(*losers, return_exceptions=True)
+            # A loser that completed anyway still holds a connection
+            for task in losers:
+                if not task.cancelled() and task.exception() is None:
+                    await task.result().aclose()
+
+        if winner is None:
+            # Every attempt failed, report the error of the original request
+            return tasks[0].result()
+
+        if winner is tasks[0]:
+            window.add(time.monotonic() - started_at)
+        else:
+            self._stats.hedge_wins += 1
+            window.add(time.monotonic() - hedge_started_at)
+        return winner.result()
@@ -0,0 +1,394 @@
+import inspect
+import logging
+import re
+import time
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import httpx
+from kiota_abstractions.request_information import RequestInformation
+from opentelemetry import metrics
+
+from ditto_client.__about__ import __version__
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, as the Prometheus client libraries use by default
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+PHASES = ("prepare", "pool_wait", "connect", "network", "deserialization")
+
+# Path segments followed by an identifier, and segments followed by a JSON pointer of any depth
+_PATH_IDENTIFIERS = {
+    "things": "{thingId}",
+    "policies": "{policyId}",
+    "features": "{featureId}",
+    "connections": "{connectionId}",
+    "entries": "{label}",
+    "subjects": "{subjectId}",
+    "imports": "{importedPolicyId}",
+    "messages": "{messageSubject}",
+}
+_PATH_POINTERS = {
+    "attributes": "{attributePath}",
+    "properties": "{propertyPath}",
+    "desiredProperties": "{propertyPath}",
+    "resources": "{resourcePath}",
+}
+_TEMPLATE_EXPRESSION = re.compile(r"\{[?&][^}]*\}")
+
+
+def route_template(path: str) -> str:
+    """Guess the route of a request path, e.g. ``/api/2/things/{thingId}/features/{featureId}``.
+
+    Only used for requests without a kiota URL template, whose route is taken from the template.
+    """
+    if path == "/devops" or path.startswith("/devops/"):
+        return path
+
+    route: list[str] = []
+    segments = iter(path.split("/"))
+    for segment in segments:
+        route.append(segment)
+        if segment in _PATH_POINTERS:
+            if next(segments, ""):
+                route.append(_PATH_POINTERS[segment])
+            break
+        # /api/2/search/things is a collection, not a thing
+        if segment in _PATH_IDENTIFIERS and route[-2:-1] != ["search"] and next(segments, ""):
+            route.append(_PATH_IDENTIFIERS[segment])
+    return "/".join(route)
+
+
+def _request_route(request_info: RequestInformation) -> str:
+    if request_info.url_template:
+        route = _TEMPLATE_EXPRESSION.sub("", request_info.url_template.removeprefix("{+baseurl}"))
+        return route or "/"
+    raw_url = request_info.path_parameters.get(RequestInformation.RAW_URL_KEY)
+    return route_template(httpx.URL(raw_url).path) if raw_url else "/"
+
+
+@dataclass
+class RequestMetrics:
+    """Timings and sizes of one request; the phases add up to ``duration``."""
+
+    method: str
+    route: str
+    status_code: Optional[int] = None
+    # Name of the exception the request failed with, if any
+    error: Optional[str] = None
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    duration: float = 0.0
+    # Authentication and building the request
+    prepare: float = 0.0
+    # Waiting for a connection, including time queued in middleware such as ``ThrottleMiddleware``
+    pool_wait: float = 0.0
+    # Opening TCP connections and TLS handshakes
+    connect: float = 0.0
+    # Sending the request and receiving the response, Ditto's processing time included
+    network: float = 0.0
+    # Parsing the response into models
+    deserialization: float = 0.0
+
+
+InstrumentationCallback = Callable[[RequestMetrics], None]
+
+
+class Histogram:
+    """Counts of observed values per bucket, with Prometheus ``le`` (less or equal) semantics."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self._buckets = tuple(buckets)
+        # The last count is for values above the largest bucket
+        self._counts = [0] * (len(self._buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    @property
+    def buckets(self) -> tuple[float, ...]:
+        return self._buckets
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self._buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> list[int]:
+        """Observations less or equal to each bucket, followed by the total for ``+Inf``."""
+        counts, total = [], 0
+        for count in self._counts:
+            total += count
+            counts.append(total)
+        return counts
+
+    def quantile(self, quantile: float) -> Optional[float]:
+        """Estimate a quantile by interpolating within its bucket, like Prometheus' ``histogram_quantile``."""
+        if self.count == 0:
+            return None
+        rank = quantile * self.count
+        lower, seen = 0.0, 0
+        for upper, count in zip(self._buckets, self._counts, strict=False):
+            if count and seen + count >= rank:
+                return lower + (upper - lower) * (rank - seen) / count
+            lower, seen = upper, seen + count
+        return self._buckets[-1] if self._buckets else None
+
+
+@dataclass
+class RouteStats:
+    method: str
+    route: str
+    duration: Histogram
+    phases: dict[str, Histogram]
+    status_codes: Counter[int] = field(default_factory=Counter)
+    errors: Counter[str] = field(default_factory=Counter)
+    bytes_sent: int = 0
+    bytes_received: int = 0
+
+    @property
+    def count(self) -> int:
+        return self.duration.count
+
+
+class _RequestTimer:
+    def __init__(self, method: str, route: str) -> None:
+        self.metrics = RequestMetrics(method, route)
+        self._started_at = time.perf_counter()
+        self._sent_at: Optional[float] = None
+        self._first_io_at: Optional[float] = None
+        self._connect_started_at = 0.0
+        self._received_at: Optional[float] = None
+
+    def request_sent(self, request: httpx.Request) -> None:
+        self._sent_at = time.perf_counter()
+        self.metrics.bytes_sent = int(request.headers.get("content-length", 0))
+        user_trace = request.extensions.get("trace")
+
+        async def _trace(name: str, info: dict[str, Any]) -> None:
+            self._trace(name)
+            if user_trace is not None:
+                result = user_trace(name, info)
+                if inspect.isawaitable(result):
+                    await result
+
+        request.extensions["trace"] = _trace
+
+    def response_received(self, response: httpx.Response) -> None:
+        self._received_at = time.perf_counter()
+        self.metrics.status_code = response.status_code
+        # Bodies that were never downloaded, e.g. of mocked responses, count with their declared length
+        self.metrics.bytes_received = response.num_bytes_downloaded or int(response.headers.get("content-length", 0))
+
+    def _trace(self, name: str) -> None:
+        # httpcore events, e.g. connection.connect_tcp.started or http11.send_request_headers.started
+        now = time.perf_counter()
+        if self._first_io_at is None:
+            self._first_io_at = now
+        if name.startswith("connection."):
+            if name.endswith(".started"):
+                self._connect_started_at = now
+            elif name.endswith(".complete"):
+                self.metrics.connect += now - self._connect_started_at
+
+    def finish(self) -> RequestMetrics:
+        metrics = self.metrics
+        finished_at = time.perf_counter()
+        metrics.duration = finished_at - self._started_at
+        if self._sent_at is None:
+            metrics.prepare = metrics.duration
+            return metrics
+
+        metrics.prepare = self._sent_at - self._started_at
+        received_at = self._received_at if self._received_at is not None else finished_at
+        if self._first_io_at is not None:
+            metrics.pool_wait = max(0.0, self._first_io_at - self._sent_at)
+        metrics.network = max(0.0, received_at - self._sent_at - metrics.pool_wait - metrics.connect)
+        metrics.deserialization = finished_at - received_at
+        return metrics
+
+
+_current_timer: ContextVar[Optional[_RequestTimer]] = ContextVar("ditto_request_timer", default=None)
+
+
+def on_request_sent(request: httpx.Request) -> None:
+    """Called by the request adapter when a request is handed to the HTTP client."""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.request_sent(request)
+
+
+def on_response_received(response: httpx.Response) -> None:
+    """Called by the request adapter once the body of a response is read."""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.response_received(response)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+class Instrumentation:
+    """Collects ``RequestMetrics`` of every request sent by a ``DittoRequestAdapter``, aggregated per route.
+
+    Set it as ``DittoRequestAdapter.instrumentation`` (or pass it to ``DittoClientFactory``).
+    Each request is also handed to the ``callbacks``, e.g. an ``OpenTelemetryExporter``;
+    ``prometheus_text()`` renders the aggregates in the Prometheus text format.
+    Event streams are not measured.
+    """
+
+    def __init__(
+        self, *, callbacks: Iterable[InstrumentationCallback] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        self._callbacks = list(callbacks)
+        self._buckets = tuple(sorted(buckets))
+        self._routes: dict[tuple[str, str], RouteStats] = {}
+
+    @property
+    def routes(self) -> dict[tuple[str, str], RouteStats]:
+        """Statistics per ``(method, route)``."""
+        return dict(self._routes)
+
+    def add_callback(self, callback: InstrumentationCallback) -> None:
+        self._callbacks.append(callback)
+
+    @contextmanager
+    def measure(self, request_info: RequestInformation) -> Iterator[None]:
+        method = request_info.http_method.value if request_info.http_method is not None else "GET"
+        timer = _RequestTimer(method, _request_route(request_info))
+        token = _current_timer.set(timer)
+        try:
+            yield
+        except BaseException as ex:
+            timer.metrics.error = type(ex).__name__
+            raise
+        finally:
+            _current_timer.reset(token)
+            self.record(timer.finish())
+
+    def record(self, metrics: RequestMetrics) -> None:
+        key = (metrics.method, metrics.route)
+        stats = self._routes.get(key)
+        if stats is None:
+            stats = self._routes[key] = RouteStats(
+                metrics.method,
+                metrics.route,
+                Histogram(self._buckets),
+                {phase: Histogram(self._buckets) for phase in PHASES},
+            )
+
+        stats.duration.observe(metrics.duration)
+        for phase, histogram in stats.phases.items():
+            histogram.observe(getattr(metrics, phase))
+        if metrics.status_code is not None:
+            stats.status_codes[metrics.status_code] += 1
+        if metrics.error is not None:
+            stats.errors[metrics.error] += 1
+        stats.bytes_sent += metrics.bytes_sent
+        stats.bytes_received += metrics.bytes_received
+
+        for callback in self._callbacks:
+            try:
+                callback(metrics)
+            except Exception:
+                logger.exception("Instrumentation callback failed")
+
+    def prometheus_text(self, prefix: str = "ditto_client") -> str:
+        """The aggregated metrics in the Prometheus text exposition format."""
+        lines: list[str] = []
+
+        def _histogram(name: str, histogram: Histogram, labels: str) -> None:
+            bounds = [*(repr(float(bucket)) for bucket in histogram.buckets), "+Inf"]
+            for bound, count in zip(bounds, histogram.cumulative_counts(), strict=True):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum!r}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        def _header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        routes = sorted(self._routes.values(), key=lambda stats: (stats.route, stats.method))
+
+        name = f"{prefix}_request_duration_seconds"
+        _header(name, "histogram", "Duration of Ditto requests until the response is deserialized.")
+        for stats in routes:
+            _histogram(name, stats.duration, _labels(method=stats.method, route=stats.route))
+
+        name = f"{prefix}_request_phase_seconds"
+        _header(name, "histogram", "Duration of Ditto requests per phase.")
+        for stats in routes:
+            for phase, histogram in stats.phases.items():
+                _histogram(name, histogram, _labels(method=stats.method, route=stats.route, phase=phase))
+
+        name = f"{prefix}_responses_total"
+        _header(name, "counter", "Ditto responses per status code.")
+        for stats in routes:
+            for status_code, count in sorted(stats.status_codes.items()):
+                labels = _labels(method=stats.method, route=stats.route, status=str(status_code))
+                lines.append(f"{name}{{{labels}}} {count}")
+
+        name = f"{prefix}_request_errors_total"
+        _header(name, "counter", "Failed Ditto requests per exception type.")
+        for stats in routes:
+            for error, count in sorted(stats.errors.items()):
+                lines.append(f"{name}{{{_labels(method=stats.method, route=stats.route, error=error)}}} {count}")
+
+        for name, attribute, help_text in (
+            (f"{prefix}_request_body_bytes_total", "bytes_sent", "Bytes of request bodies sent to Ditto."),
+            (f"{prefix}_response_body_bytes_total", "bytes_received", "Bytes of response bodies received from Ditto."),
+        ):
+            _header(name, "counter", help_text)
+            for stats in routes:
+                lines.append(f"{name}{{{_labels(method=stats.method, route=stats.route)}}} {getattr(stats, attribute)}")
+
+        return "\n".join(lines) + "\n"
+
+
+class OpenTelemetryExporter:
+    """Instrumentation callback recording requests as OpenTelemetry metrics.
+
+    Follows the HTTP client semantic conventions (``http.client.request.duration`` and the body
+    sizes) and adds ``ditto.client.request.phase.duration`` per phase. Metrics go to the global
+    ``MeterProvider`` unless a ``meter`` is given; without the OpenTelemetry SDK they are dropped.
+    """
+
+    def __init__(self, meter: Optional[metrics.Meter] = None) -> None:
+        meter = meter or metrics.get_meter("ditto_client", __version__)
+        self._duration = meter.create_histogram(
+            "http.client.request.duration", unit="s", description="Duration of Ditto requests."
+        )
+        self._phase_duration = meter.create_histogram(
+            "ditto.client.request.phase.duration", unit="s", description="Duration of Ditto requests per phase."
+        )
+        self._request_size = meter.create_histogram(
+            "http.client.request.body.size", unit="By", description="Size of Ditto request bodies."
+        )
+        self._response_size = meter.create_histogram(
+            "http.client.response.body.size", unit="By", description="Size of Ditto response bodies."
+        )
+
+    def __call__(self, request_metrics: RequestMetrics) -> None:
+        attributes: dict[str, str | int] = {
+            "http.request.method": request_metrics.method,
+            "url.template": request_metrics.route,
+        }
+        if request_metrics.status_code is not None:
+            attributes["http.response.status_code"] = request_metrics.status_code
+        if request_metrics.error is not None:
+            attributes["error.type"] = request_metrics.error
+
+        self._duration.record(request_metrics.duration, attributes)
+        self._request_size.record(request_metrics.bytes_sent, attributes)
+        self._response_size.record(request_metrics.bytes_received, attributes)
+        for phase in PHASES:
+            self._phase_duration.record(getattr(request_metrics, phase), {**attributes, "ditto.phase": phase})
@@ -0,0 +1,141 @@
+import asyncio
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any, Optional
+from urllib.parse import quote
+
+from kiota_abstractions.base_request_configuration import RequestConfiguration
+
+from ditto_client.fast_json import thing_from_dict
+from ditto_client.generated.api.two.things.things_request_builder import ThingsRequestBuilder
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.generated.models.thing import Thing
+from ditto_client.raw import raw_json_option
+
+DEFAULT_MAX_BATCH_SIZE = 100
+# Stays below the 8 KiB request line limit of common proxies in front of Ditto
+DEFAULT_MAX_IDS_LENGTH = 6000
+DEFAULT_BATCH_DELAY = 0.001
+
+
+@dataclass
+class ThingLoaderStats:
+    loads: int = 0
+    # Loads of an id already waiting for the next batch
+    deduplicated: int = 0
+    batches: int = 0
+    missing: int = 0
+
+    @property
+    def average_batch_size(self) -> float:
+        return (self.loads - self.deduplicated) / self.batches if self.batches else 0.0
+
+
+def _with_thing_id(fields: Optional[str]) -> Optional[str]:
+    # Results are matched to their callers by thingId, so it must be selected
+    if fields is None or "thingId" in fields.split(","):
+        return fields
+    return f"thingId,{fields}"
+
+
+class ThingLoader:
+    """Batches single-thing lookups into ``GET /api/2/things?ids=...`` multi-gets.
+
+    Lookups issued within ``batch_delay`` seconds of the first one are collected and fetched in
+    one request, which is sent early once the batch reaches ``max_batch_size`` ids or its
+    ``ids`` parameter ``max_ids_length`` characters. Every thing is fetched with the same
+    ``fields`` selector. Things that do not exist or are not visible to the caller load as None;
+    when the multi-get itself fails, e.g. on a malformed id, every lookup of the batch raises.
+    """
+
+    def __init__(
+        self,
+        client: DittoClient,
+        *,
+        fields: Optional[str] = None,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_ids_length: int = DEFAULT_MAX_IDS_LENGTH,
+        batch_delay: float = DEFAULT_BATCH_DELAY,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+
+        self._things = client.api.two.things
+        self._fields = _with_thing_id(fields)
+        self._max_batch_size = max_batch_size
+        self._max_ids_length = max_ids_length
+        self._batch_delay = batch_delay
+        self._pending: dict[str, asyncio.Future[Optional[Thing]]] = {}
+        self._pending_length = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._fetches: set[asyncio.Task[None]] = set()
+        self._stats = ThingLoaderStats()
+
+    @property
+    def stats(self) -> ThingLoaderStats:
+        return self._stats
+
+    async def load(self, thing_id: str) -> Optional[Thing]:
+        self._stats.loads += 1
+        future = self._pending.get(thing_id)
+        if future is None:
+            future = self._enqueue(thing_id)
+        else:
+            self._stats.deduplicated += 1
+        # Shielded, callers waiting on the same id must not be cancelled with each other
+        return await asyncio.shield(future)
+
+    async def load_many(self, thing_ids: Iterable[str]) -> list[Optional[Thing]]:
+        return await asyncio.gather(*(self.load(thing_id) for thing_id in thing_ids))
+
+    def _enqueue(self, thing_id: str) -> asyncio.Future[Optional[Thing]]:
+        # The ids are sent as one comma-separated, percent-encoded query parameter
+        length = len(quote(thing_id, safe="")) + 3
+        if self._pending and self._pending_length + length > self._max_ids_length:
+            self._flush()
+
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[Optional[Thing]] = loop.create_future()
+        self._pending[thing_id] = future
+        self._pending_length += length
+
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._batch_delay, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending, self._pending_length = self._pending, {}, 0
+        if batch:
+            fetch = asyncio.create_task(self._fetch(batch))
+            self._fetches.add(fetch)
+            fetch.add_done_callback(self._fetches.discard)
+
+    async def _fetch(self, batch: dict[str, asyncio.Future[Optional[Thing]]]) -> None:
+        self._stats.batches += 1
+        query_params = ThingsRequestBuilder.ThingsRequestBuilderGetQueryParameters(
+            ids=",".join(batch), fields=self._fields
+        )
+        request_config = RequestConfiguration(query_parameters=query_params, options=[raw_json_option()])
+        try:
+            items: Any = await self._things.get(request_configuration=request_config)
+        except Exception as ex:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(ex)
+            return
+
+        for item in items or []:
+            waiting = batch.pop(item.get("thingId"), None)
+            if waiting is not None and not waiting.done():
+                waiting.set_result(thing_from_dict(item))
+
+        self._stats.missing += len(batch)
+        for future in batch.values():
+            if not future.done():
+                future.set_result(None)
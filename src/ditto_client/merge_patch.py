@@ -0,0 +1,49 @@
+"""JSON merge patch (RFC 7396), the format of Ditto ``PATCH`` requests and change events."""
+
+from typing import Any
+
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """Return ``target`` with ``patch`` applied; ``target`` itself is left unchanged.
+
+    Only the objects along patched paths are copied, unchanged subtrees are shared with ``target``.
+    """
+    if not isinstance(patch, dict):
+        return patch
+
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
+
+
+def create_merge_patch(current: dict[str, Any], desired: dict[str, Any]) -> dict[str, Any]:
+    """Return the smallest merge patch turning ``current`` into ``desired``, empty when they are equal.
+
+    Unchanged keys are left out, removed keys become ``null`` and objects are diffed recursively;
+    arrays and scalars are replaced as a whole. Merge patches cannot set a value to ``null``, so
+    ``desired`` must not contain ``null`` object members.
+    """
+    patch: dict[str, Any] = {}
+    for key in current.keys() - desired.keys():
+        patch[key] = None
+
+    for key, value in desired.items():
+        if value is None:
+            raise ValueError(f"Cannot express the null value of '{key}' in a merge patch.")
+
+        old = current.get(key)
+        if isinstance(value, dict):
+            if isinstance(old, dict):
+                nested = create_merge_patch(old, value)
+                if nested:
+                    patch[key] = nested
+            else:
+                # Nothing to diff against, but the whole object still must not contain nulls
+                patch[key] = create_merge_patch({}, value)
+        elif key not in current or old != value or type(old) is not type(value):
+            patch[key] = value
+    return patch
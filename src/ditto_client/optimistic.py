@@ -0,0 +1,192 @@
+"""Optimistic-concurrency read-modify-write of things and their parts.
+
+The current state is read together with its ``ETag`` and written back with ``If-Match`` (or
+Ditto's ``condition`` parameter), so a write racing another writer fails with ``412 Precondition
+Failed`` instead of silently overwriting the other change. Conflicting writes are retried on the
+fresh state after a short, jittered backoff.
+"""
+
+import asyncio
+import json
+import logging
+import random
+from collections.abc import Callable
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Optional
+
+import httpx
+from kiota_abstractions.api_error import APIError
+from kiota_abstractions.base_request_builder import BaseRequestBuilder
+from kiota_abstractions.base_request_configuration import RequestConfiguration
+from kiota_abstractions.method import Method
+from kiota_abstractions.request_information import RequestInformation
+from kiota_abstractions.response_handler import ResponseHandler
+from kiota_abstractions.serialization.parsable_factory import ParsableFactory
+from kiota_http.middleware.options.response_handler_option import ResponseHandlerOption
+
+from ditto_client._response import has_content, raise_for_status
+from ditto_client.cache import etag_revision
+from ditto_client.fast_json import loads
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.generated.models.advanced_error import AdvancedError
+from ditto_client.merge_patch import apply_merge_patch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 10
+DEFAULT_BACKOFF = 0.01
+DEFAULT_MAX_BACKOFF = 1.0
+
+_ERROR_MAPPING: dict[str, type[ParsableFactory[Any]]] = {"4XX": AdvancedError, "5XX": AdvancedError}
+
+
+class Precondition(str, Enum):
+    # Send the ETag read with the state as If-Match; works for things and all their parts
+    IfMatch = "if-match"
+    # Send condition=eq(_revision,N); needs the revision-based ETag of a whole thing
+    Condition = "condition"
+
+
+@dataclass
+class OptimisticWriteResult:
+    # State written, or the current state when the write was skipped
+    value: Any
+    attempts: int
+    conflicts: int
+    written: bool
+
+
+class _StateResponseHandler(ResponseHandler):
+    """Returns the decoded JSON body of a read together with its ``ETag``."""
+
+    async def handle_response_async(  # type: ignore[override]
+        self,
+        response: httpx.Response,
+        error_map: Optional[dict[str, ParsableFactory[Any]]],
+    ) -> tuple[Any, Optional[str]]:
+        raise_for_status(response, error_map)
+        value = loads(response.content) if has_content(response) else None
+        return value, response.headers.get("etag")
+
+
+async def _read(builder: Any) -> tuple[Any, Optional[str]]:
+    request_config: RequestConfiguration[Any] = RequestConfiguration()
+    request_config.options = [ResponseHandlerOption(_StateResponseHandler())]
+    state: tuple[Any, Optional[str]] = await builder.get(request_configuration=request_config)
+    return state
+
+
+async def _write(
+    builder: BaseRequestBuilder,
+    body: Any,
+    etag: Optional[str],
+    *,
+    merge: bool,
+    precondition: Precondition,
+) -> None:
+    if etag is None:
+        raise ValueError("Ditto returned no ETag to make the write conditional on.")
+
+    request_info = RequestInformation(
+        Method.PATCH if merge else Method.PUT, builder.url_template, dict(builder.path_parameters)
+    )
+    content_type = "application/merge-patch+json" if merge else "application/json"
+    request_info.set_stream_content(json.dumps(body).encode(), content_type)
+
+    if precondition == Precondition.IfMatch:
+        request_info.headers.try_add("If-Match", etag)
+    else:
+        revision = etag_revision(etag)
+        if revision is None:
+            raise ValueError(f"Cannot build a revision condition from ETag {etag}, use Precondition.IfMatch.")
+        request_info.query_parameters["condition"] = f"eq(_revision,{revision})"
+
+    await builder.request_adapter.send_no_response_content_async(request_info, _ERROR_MAPPING)
+
+
+def _is_conflict(ex: Exception) -> bool:
+    return isinstance(ex, APIError) and ex.response_status_code == 412
+
+
+async def read_modify_write(
+    builder: BaseRequestBuilder,
+    modify: Callable[[Any], Any],
+    *,
+    merge: bool = True,
+    precondition: Precondition = Precondition.IfMatch,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    backoff: float = DEFAULT_BACKOFF,
+    max_backoff: float = DEFAULT_MAX_BACKOFF,
+) -> OptimisticWriteResult:
+    """Read the resource of ``builder``, write what ``modify`` makes of it and retry on conflicts.
+
+    ``builder`` is any generated builder with ``get`` and ``put``/``patch``, e.g. a thing,
+    its attributes, a feature's properties or a single property. ``modify`` gets the current
+    JSON and returns a merge patch (``merge=True``) or the new value (``merge=False``); returning
+    None, an empty patch or an unchanged value skips the write. ``modify`` may be called once
+    per attempt and must not have side effects. When all ``max_attempts`` conflict, the last
+    ``412`` error is raised.
+    """
+    if max_attempts < 1:
+        raise ValueError("max_attempts must be at least 1.")
+
+    attempt = conflicts = 0
+    while True:
+        attempt += 1
+        current, etag = await _read(builder)
+        change = modify(current)
+        if change is None or (merge and change == {}) or (not merge and change == current):
+            return OptimisticWriteResult(value=current, attempts=attempt, conflicts=conflicts, written=False)
+
+        try:
+            await _write(builder, change, etag, merge=merge, precondition=precondition)
+        except Exception as ex:
+            if not _is_conflict(ex) or attempt == max_attempts:
+                raise
+            conflicts += 1
+            logger.debug("Conflicting write to %s, retrying (attempt %d)", builder.path_parameters, attempt)
+            await asyncio.sleep(random.uniform(0, min(max_backoff, backoff * 2**attempt)))
+            continue
+
+        value = apply_merge_patch(current, change) if merge else change
+        return OptimisticWriteResult(value=value, attempts=attempt, conflicts=conflicts, written=True)
+
+
+async def update_thing(
+    client: DittoClient,
+    thing_id: str,
+    modify: Callable[[Any], Any],
+    **kwargs: Any,
+) -> OptimisticWriteResult:
+    """Merge the patch ``modify`` returns for the current thing JSON, see ``read_modify_write``."""
+    return await read_modify_write(client.api.two.things.by_thing_id(thing_id), modify, merge=True, **kwargs)
+
+
+async def update_feature_properties(
+    client: DittoClient,
+    thing_id: str,
+    feature_id: str,
+    modify: Callable[[Any], Any],
+    **kwargs: Any,
+) -> OptimisticWriteResult:
+    """Merge the patch ``modify`` returns for the current properties of a feature."""
+    builder = client.api.two.things.by_thing_id(thing_id).features.by_feature_id(feature_id).properties
+    return await read_modify_write(builder, modify, merge=True, **kwargs)
+
+
+async def update_feature_property(
+    client: DittoClient,
+    thing_id: str,
+    feature_id: str,
+    property_path: str,
+    modify: Callable[[Any], Any],
+    **kwargs: Any,
+) -> OptimisticWriteResult:
+    """Replace a single feature property with the value ``modify`` returns for its current value."""
+    builder = (
+        client.api.two.things.by_thing_id(thing_id)
+        .features.by_feature_id(feature_id)
+        .properties.by_property_path(property_path)
+    )
+    return await read_modify_write(builder, modify, merge=False, **kwargs)
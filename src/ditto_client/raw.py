@@ -0,0 +1,41 @@
+"""Passthrough response modes returning the Ditto JSON untouched instead of kiota models.
+
+Pass one of the options to any generated ``get`` through ``RequestConfiguration.options``;
+the call then returns ``bytes`` (``raw_bytes_option``) or the decoded ``dict``/``list``
+(``raw_json_option``) in place of the typed model. Error responses are still raised as the
+generated error models (e.g. ``AdvancedError``).
+"""
+
+from typing import Any
+
+from kiota_abstractions.base_request_configuration import RequestConfiguration
+from kiota_http.middleware.options.response_handler_option import ResponseHandlerOption
+
+from ditto_client._response import DecodingResponseHandler
+from ditto_client.fast_json import loads
+
+
+def _passthrough(payload: bytes) -> bytes:
+    return payload
+
+
+def raw_bytes_option() -> ResponseHandlerOption:
+    return ResponseHandlerOption(DecodingResponseHandler(_passthrough))
+
+
+def raw_json_option() -> ResponseHandlerOption:
+    return ResponseHandlerOption(DecodingResponseHandler(loads))
+
+
+def raw_bytes_config(**kwargs: Any) -> RequestConfiguration[Any]:
+    """A ``RequestConfiguration`` (taking the usual ``headers``/``query_parameters``) in raw bytes mode."""
+    request_config: RequestConfiguration[Any] = RequestConfiguration(**kwargs)
+    request_config.options = [*(request_config.options or []), raw_bytes_option()]
+    return request_config
+
+
+def raw_json_config(**kwargs: Any) -> RequestConfiguration[Any]:
+    """A ``RequestConfiguration`` (taking the usual ``headers``/``query_parameters``) in raw JSON mode."""
+    request_config: RequestConfiguration[Any] = RequestConfiguration(**kwargs)
+    request_config.options = [*(request_config.options or []), raw_json_option()]
+    return request_config
@@ -0,0 +1,159 @@
+from collections.abc import AsyncIterator
+from contextlib import AbstractContextManager, asynccontextmanager, nullcontext
+from typing import Any, Optional, TypeVar, cast
+
+import httpx
+from kiota_abstractions.request_adapter import PrimitiveType, ResponseType
+from kiota_abstractions.request_information import RequestInformation
+from kiota_abstractions.serialization.parsable import Parsable
+from kiota_abstractions.serialization.parsable_factory import ParsableFactory
+from kiota_abstractions.serialization.parse_node import ParseNode
+from kiota_http.httpx_request_adapter import HttpxRequestAdapter
+from opentelemetry import trace
+
+from ditto_client.etag_cache import ETAG_CACHE_ENTRY_EXTENSION, ETagCacheEntry, SharedModelParseNode
+from ditto_client.instrumentation import Instrumentation, on_request_sent, on_response_received
+from ditto_client.url_template import compile_url_template
+
+ModelType = TypeVar("ModelType", bound=Parsable)
+ErrorMap = Optional[dict[str, type[ParsableFactory[Any]]]]
+
+
+class DittoRequestAdapter(HttpxRequestAdapter):
+    """``HttpxRequestAdapter`` expanding the request URL with precompiled templates.
+
+    kiota expands the URL template of a request twice while building it, each time re-parsing
+    the template with ``std_uritemplate``. The URL is expanded once here from a cached
+    ``CompiledUrlTemplate`` and handed to kiota as the raw URL of the request.
+
+    With an ``instrumentation`` every request is measured, see ``ditto_client.instrumentation``.
+    """
+
+    instrumentation: Optional[Instrumentation] = None
+
+    def get_request_from_request_information(
+        self,
+        request_info: RequestInformation,
+        parent_span: trace.Span,
+        attribute_span: trace.Span,
+    ) -> httpx.Request:
+        request = self._build_request(request_info, parent_span, attribute_span)
+        if self.instrumentation is not None:
+            on_request_sent(request)
+        return request
+
+    def _build_request(
+        self,
+        request_info: RequestInformation,
+        parent_span: trace.Span,
+        attribute_span: trace.Span,
+    ) -> httpx.Request:
+        path_parameters = request_info.path_parameters
+        url = None
+        if request_info.url_template and RequestInformation.RAW_URL_KEY not in path_parameters:
+            template = compile_url_template(request_info.url_template)
+            if template is not None:
+                url = template.expand({**request_info.query_parameters, **path_parameters})
+
+        if url is None:
+            return super().get_request_from_request_information(request_info, parent_span, attribute_span)
+
+        path_parameters[RequestInformation.RAW_URL_KEY] = url
+        try:
+            return super().get_request_from_request_information(request_info, parent_span, attribute_span)
+        finally:
+            # The request information stays reusable with different parameters
+            del path_parameters[RequestInformation.RAW_URL_KEY]
+
+    async def get_http_response_message(
+        self,
+        request_info: RequestInformation,
+        parent_span: trace.Span,
+        claims: str = "",
+    ) -> httpx.Response:
+        response = await super().get_http_response_message(request_info, parent_span, claims)
+        if self.instrumentation is not None:
+            on_response_received(response)
+        return response
+
+    def _measure(self, request_info: RequestInformation) -> AbstractContextManager[None]:
+        if self.instrumentation is None:
+            return nullcontext()
+        return self.instrumentation.measure(request_info)
+
+    async def send_async(
+        self,
+        request_info: RequestInformation,
+        parsable_factory: ParsableFactory[ModelType],
+        error_map: ErrorMap,
+    ) -> Optional[ModelType]:
+        with self._measure(request_info):
+            return await super().send_async(request_info, parsable_factory, error_map)
+
+    async def send_collection_async(
+        self,
+        request_info: RequestInformation,
+        parsable_factory: ParsableFactory[ModelType],
+        error_map: ErrorMap,
+    ) -> Optional[list[ModelType]]:
+        with self._measure(request_info):
+            return await super().send_collection_async(request_info, parsable_factory, error_map)
+
+    async def send_collection_of_primitive_async(
+        self,
+        request_info: RequestInformation,
+        response_type: type[PrimitiveType],
+        error_map: ErrorMap,
+    ) -> Optional[list[PrimitiveType]]:
+        with self._measure(request_info):
+            return await super().send_collection_of_primitive_async(request_info, response_type, error_map)
+
+    async def send_primitive_async(
+        self,
+        request_info: RequestInformation,
+        response_type: str,
+        error_map: ErrorMap,
+    ) -> Optional[ResponseType]:
+        with self._measure(request_info):
+            return await super().send_primitive_async(request_info, response_type, error_map)
+
+    async def send_no_response_content_async(self, request_info: RequestInformation, error_map: ErrorMap) -> None:
+        with self._measure(request_info):
+            await super().send_no_response_content_async(request_info, error_map)
+
+    async def get_root_parse_node(
+        self,
+        response: httpx.Response,
+        parent_span: trace.Span,
+        attribute_span: trace.Span,
+    ) -> Optional[ParseNode]:
+        entry: Optional[ETagCacheEntry] = response.extensions.get(ETAG_CACHE_ENTRY_EXTENSION)
+        content_type = self.get_response_content_type(response)
+        if entry is None or entry.models is None or not content_type:
+            return await super().get_root_parse_node(response, parent_span, attribute_span)
+
+        # Bodies revalidated by the ETag cache reuse the models deserialized the first time
+        def _parse() -> ParseNode:
+            return self._parse_node_factory.get_root_parse_node(content_type, response.content)
+
+        return cast(ParseNode, SharedModelParseNode(entry.models, _parse))
+
+    @asynccontextmanager
+    async def stream_async(self, request_info: RequestInformation) -> AsyncIterator[httpx.Response]:
+        """Send the request through the middleware pipeline and yield the response before its body is read.
+
+        Used for long-lived responses such as server-sent events; the status is not checked.
+        """
+        parent_span = self.start_tracing_span(request_info, "stream_async")
+        try:
+            self.set_base_url_for_request_information(request_info)
+            await self._authentication_provider.authenticate_request(request_info)
+
+            request = self.get_request_from_request_information(request_info, parent_span, parent_span)
+            response = await self._http_client.send(request, stream=True)
+            try:
+                yield response
+            finally:
+                await response.aclose()
+        finally:
+            parent_span.end()
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Optional, Union
+
+import httpx
+from kiota_abstractions.request_option import RequestOption
+
+from ditto_client._middleware import DittoMiddleware
+
+logger = logging.getLogger(__name__)
+
+# 429 from Ditto's throttling, 502/503/504 from the gateway or nginx in front of it
+DEFAULT_RETRY_STATUS_CODES = frozenset((429, 502, 503, 504))
+# PATCH is a JSON merge patch in Ditto, applying it twice has the same effect as applying it once
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE"))
+
+# Failures before the request reached Ditto, safe to retry for any method
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+@dataclass
+class RetryPolicy(RequestOption):
+    """How ``RetryMiddleware`` retries; also a request option overriding the policy of a single call.
+
+    Waits are drawn uniformly between zero and ``backoff * 2 ** retry`` capped at ``max_backoff``
+    ("full jitter"), unless Ditto sent a ``Retry-After``. Responses asking to wait longer than
+    ``max_retry_after`` are returned instead of retried.
+    """
+
+    max_retries: int = 3
+    backoff: float = 0.1
+    max_backoff: float = 10.0
+    max_retry_after: float = 60.0
+    retry_status_codes: frozenset[int] = DEFAULT_RETRY_STATUS_CODES
+    retry_methods: frozenset[str] = IDEMPOTENT_METHODS
+
+    @staticmethod
+    def get_key() -> str:
+        return "DittoRetryPolicy"
+
+    def backoff_delay(self, retry: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**retry))
+
+
+class RetryBudget:
+    """Caps retries at a fraction of the traffic so a struggling Ditto is not hit with a retry storm.
+
+    Every first attempt deposits ``ratio`` tokens and ``min_retries_per_second`` tokens trickle in
+    over time, so low-traffic clients can still retry; each retry spends one token. The balance
+    never exceeds ``max_balance``.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_retries_per_second: float = 5.0, max_balance: float = 100.0) -> None:
+        self._ratio = ratio
+        self._min_retries_per_second = min_retries_per_second
+        self._max_balance = max_balance
+        self._balance = max_balance
+        self._updated_at = time.monotonic()
+
+    @property
+    def balance(self) -> float:
+        self._refill(0.0)
+        return self._balance
+
+    def record_request(self) -> None:
+        self._refill(self._ratio)
+
+    def try_spend(self) -> bool:
+        self._refill(0.0)
+        if self._balance < 1.0:
+            return False
+        self._balance -= 1.0
+        return True
+
+    def _refill(self, deposit: float) -> None:
+        now = time.monotonic()
+        earned = (now - self._updated_at) * self._min_retries_per_second
+        self._balance = min(self._max_balance, self._balance + earned + deposit)
+        self._updated_at = now
+
+
+@dataclass
+class RetryStats:
+    requests: int = 0
+    retries: int = 0
+    # Retries by status code or transport error name
+    retries_by_reason: Counter[str] = field(default_factory=Counter)
+    # Retryable failures returned because the budget ran out
+    budget_exhausted: int = 0
+    # Retryable failures returned after all retries were used
+    exhausted: int = 0
+
+    @property
+    def amplification(self) -> float:
+        """Requests sent to Ditto per request made by the caller."""
+        return (self.requests + self.retries) / self.requests if self.requests else 1.0
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at: float = parsedate_to_datetime(value).timestamp()
+        return max(0.0, retry_at - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryMiddleware(DittoMiddleware):
+    """Retries transient Ditto failures with exponential backoff and jitter.
+
+    Idempotent requests are retried on ``429``, ``502``, ``503`` and ``504`` and on transport
+    errors; other methods, such as ``POST`` messages, only when the connection could not be
+    established. ``Retry-After`` is honored. Pass a ``RetryPolicy`` as request option to change
+    the policy of one call, e.g. ``RetryPolicy(retry_methods=frozenset({"POST"}))``.
+
+    With a ``RetryBudget`` retries stop once they exceed the budget's share of the traffic;
+    without one every request may use all of its retries. Use the middleware instead of kiota's
+    ``RetryHandler``, not next to it, or retries multiply.
+    """
+
+    def __init__(self, policy: Optional[RetryPolicy] = None, budget: Optional[RetryBudget] = None) -> None:
+        super().__init__()
+        self._policy = policy or RetryPolicy()
+        self._budget = budget
+        self._stats = RetryStats()
+
+    @property
+    def stats(self) -> RetryStats:
+        return self._stats
+
+    async def send(self, request: httpx.Request, transport: httpx.AsyncBaseTransport) -> httpx.Response:
+        # The pipeline drops the request options before sending, so look them up first
+        options = getattr(request, "options", None) or {}
+        policy: RetryPolicy = options.get(RetryPolicy.get_key(), self._policy)
+
+        self._stats.requests += 1
+        if self._budget is not None:
+            self._budget.record_request()
+
+        retry = 0
+        while True:
+            outcome: Union[httpx.Response, httpx.TransportError]
+            try:
+                outcome = await self.send_next(request, transport)
+            except httpx.TransportError as ex:
+                outcome = ex
+
+            delay = self._retry_delay(request, outcome, policy, retry)
+            if delay is None:
+                if isinstance(outcome, Exception):
+                    raise outcome
+                return outcome
+
+            if isinstance(outcome, httpx.Response):
+                await outcome.aclose()
+                reason = str(outcome.status_code)
+            else:
+                reason = type(outcome).__name__
+
+            retry += 1
+            self._stats.retries += 1
+            self._stats.retries_by_reason[reason] += 1
+            logger.debug(
+                "Retrying %s %s after %s in %.3fs (retry %d)", request.method, request.url, reason, delay, retry
+            )
+            await asyncio.sleep(delay)
+
+    def _retry_delay(
+        self,
+        request: httpx.Request,
+        outcome: Union[httpx.Response, httpx.TransportError],
+        policy: RetryPolicy,
+        retry: int,
+    ) -> Optional[float]:
+        if isinstance(outcome, httpx.Response):
+            if outcome.status_code not in policy.retry_status_codes or request.method not in policy.retry_methods:
+                return None
+            delay = retry_after_seconds(outcome)
+            if delay is not None and delay > policy.max_retry_after:
+                return None
+        else:
+            if request.method not in policy.retry_methods and not isinstance(outcome, _NOT_SENT_ERRORS):
+                return None
+            delay = None
+
+        if retry >= policy.max_retries:
+            self._stats.exhausted += 1
+            return None
+        if self._budget is not None and not self._budget.try_spend():
+            self._stats.budget_exhausted += 1
+            return None
+        return delay if delay is not None else policy.backoff_delay(retry)
@@ -0,0 +1,344 @@
+import asyncio
+from collections.abc import AsyncGenerator, Sequence
+from dataclasses import dataclass
+from typing import Any, Optional, Union
+
+from kiota_abstractions.base_request_configuration import RequestConfiguration
+from kiota_abstractions.request_option import RequestOption
+
+from ditto_client.fast_json import decode_search_result_things, fast_json_option
+from ditto_client.generated.api.two.search.things.count.count_request_builder import CountRequestBuilder
+from ditto_client.generated.api.two.search.things.things_request_builder import ThingsRequestBuilder
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.generated.models.search_result_things import SearchResultThings
+from ditto_client.generated.models.thing import Thing
+from ditto_client.raw import raw_json_option
+
+# Largest page size accepted by the Ditto search service
+MAX_PAGE_SIZE = 200
+
+DEFAULT_SCAN_CONCURRENCY = 4
+
+
+@dataclass
+class SearchShard:
+    """A slice of a search, scanned by its own cursor chain."""
+
+    filter: Optional[str] = None
+    namespaces: Optional[str] = None
+    count: int = 0
+
+
+class _ShardDone:
+    pass
+
+
+_SHARD_DONE = _ShardDone()
+
+
+def _build_option(page_size: int, sort: Optional[str], cursor: Optional[str]) -> str:
+    # Ditto only accepts `size` next to a cursor; the sort order is carried by the cursor itself
+    if cursor:
+        return f"size({page_size}),cursor({cursor})"
+    if sort:
+        return f"size({page_size}),sort({sort})"
+    return f"size({page_size})"
+
+
+async def _fetch_page(
+    client: DittoClient,
+    query_params: ThingsRequestBuilder.ThingsRequestBuilderGetQueryParameters,
+    option: Optional[RequestOption],
+) -> Any:
+    request_config = RequestConfiguration(query_parameters=query_params)
+    if option is not None:
+        request_config.options = [option]
+    return await client.api.two.search.things.get(request_configuration=request_config)
+
+
+def _page_cursor(page: Union[SearchResultThings, dict[str, Any]]) -> Optional[str]:
+    if isinstance(page, dict):
+        cursor = page.get("cursor")
+        return cursor if isinstance(cursor, str) else None
+    return page.cursor
+
+
+async def _iter_pages(
+    client: DittoClient,
+    *,
+    filter: Optional[str],
+    namespaces: Optional[str],
+    fields: Optional[str],
+    sort: Optional[str],
+    page_size: int,
+    timeout: Optional[str],  # noqa: ASYNC109
+    option: Optional[RequestOption],
+) -> AsyncGenerator[Any, None]:
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}.")
+
+    def _query_params(cursor: Optional[str]) -> ThingsRequestBuilder.ThingsRequestBuilderGetQueryParameters:
+        return ThingsRequestBuilder.ThingsRequestBuilderGetQueryParameters(
+            fields=fields,
+            filter=filter,
+            namespaces=namespaces,
+            option=_build_option(page_size, sort, cursor),
+            timeout=timeout,
+        )
+
+    next_page: Optional[asyncio.Task[Any]] = asyncio.create_task(_fetch_page(client, _query_params(None), option))
+    try:
+        while next_page is not None:
+            page = await next_page
+            next_page = None
+
+            if page is None:
+                return
+
+            cursor = _page_cursor(page)
+            if cursor:
+                next_page = asyncio.create_task(_fetch_page(client, _query_params(cursor), option))
+
+            yield page
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+            await asyncio.gather(next_page, return_exceptions=True)
+
+
+async def iter_search_pages(
+    client: DittoClient,
+    *,
+    filter: Optional[str] = None,
+    namespaces: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: Optional[str] = None,
+    page_size: int = MAX_PAGE_SIZE,
+    timeout: Optional[str] = None,  # noqa: ASYNC109
+    fast_json: bool = False,
+) -> AsyncGenerator[SearchResultThings, None]:
+    """Yield search result pages, following the cursor returned by each page.
+
+    The request for the next page is issued as soon as a page arrives, so the network
+    round-trip overlaps with the caller consuming the current page. At most two pages are
+    held in memory at any time. ``fast_json`` decodes pages with ``ditto_client.fast_json``.
+    """
+    pages = _iter_pages(
+        client,
+        filter=filter,
+        namespaces=namespaces,
+        fields=fields,
+        sort=sort,
+        page_size=page_size,
+        timeout=timeout,
+        option=fast_json_option(decode_search_result_things) if fast_json else None,
+    )
+    try:
+        async for page in pages:
+            yield page
+    finally:
+        await pages.aclose()
+
+
+async def iter_search_things(
+    client: DittoClient,
+    *,
+    filter: Optional[str] = None,
+    namespaces: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: Optional[str] = None,
+    page_size: int = MAX_PAGE_SIZE,
+    timeout: Optional[str] = None,  # noqa: ASYNC109
+    fast_json: bool = False,
+) -> AsyncGenerator[Thing, None]:
+    """Yield every thing matching the search, transparently following cursors page by page."""
+    pages = iter_search_pages(
+        client,
+        filter=filter,
+        namespaces=namespaces,
+        fields=fields,
+        sort=sort,
+        page_size=page_size,
+        timeout=timeout,
+        fast_json=fast_json,
+    )
+    try:
+        async for page in pages:
+            for thing in page.items or []:
+                yield thing
+    finally:
+        await pages.aclose()
+
+
+async def iter_search_raw_things(
+    client: DittoClient,
+    *,
+    filter: Optional[str] = None,
+    namespaces: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: Optional[str] = None,
+    page_size: int = MAX_PAGE_SIZE,
+    timeout: Optional[str] = None,  # noqa: ASYNC109
+) -> AsyncGenerator[dict[str, Any], None]:
+    """Like ``iter_search_things`` but yielding the things as decoded JSON, e.g. to keep the integer ``_revision``."""
+    pages = _iter_pages(
+        client,
+        filter=filter,
+        namespaces=namespaces,
+        fields=fields,
+        sort=sort,
+        page_size=page_size,
+        timeout=timeout,
+        option=raw_json_option(),
+    )
+    try:
+        async for page in pages:
+            for thing in page.get("items") or []:
+                yield thing
+    finally:
+        await pages.aclose()
+
+
+async def count_things(
+    client: DittoClient,
+    *,
+    filter: Optional[str] = None,
+    namespaces: Optional[str] = None,
+    timeout: Optional[str] = None,  # noqa: ASYNC109
+) -> int:
+    query_params = CountRequestBuilder.CountRequestBuilderGetQueryParameters(
+        filter=filter,
+        namespaces=namespaces,
+        timeout=timeout,
+    )
+    request_config = RequestConfiguration(query_parameters=query_params)
+    return await client.api.two.search.things.count.get(request_configuration=request_config) or 0
+
+
+def _and_filter(*filters: Optional[str]) -> Optional[str]:
+    parts = [f for f in filters if f]
+    if not parts:
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    return f"and({','.join(parts)})"
+
+
+def _thing_id_range_filters(thing_id_bounds: Sequence[str]) -> list[Optional[str]]:
+    if not thing_id_bounds:
+        return [None]
+
+    bounds = sorted(thing_id_bounds)
+    filters: list[Optional[str]] = [f'lt(thingId,"{bounds[0]}")']
+    for lower, upper in zip(bounds, bounds[1:], strict=False):
+        filters.append(f'and(ge(thingId,"{lower}"),lt(thingId,"{upper}"))')
+    filters.append(f'ge(thingId,"{bounds[-1]}")')
+    return filters
+
+
+async def plan_search_shards(
+    client: DittoClient,
+    *,
+    filter: Optional[str] = None,
+    namespaces: Optional[Sequence[str]] = None,
+    thing_id_bounds: Optional[Sequence[str]] = None,
+    concurrency: int = DEFAULT_SCAN_CONCURRENCY,
+    timeout: Optional[str] = None,  # noqa: ASYNC109
+) -> list[SearchShard]:
+    """Split a search into one shard per namespace and thingId range, sized with ``search/things/count``.
+
+    Empty shards are dropped and the remaining ones are ordered largest first, so that a
+    bounded pool of workers picking shards in order ends up with a balanced amount of work.
+    The counts are not used to split shards: each shard is scanned by a single cursor chain,
+    so a namespace holding most of the things bounds the scan unless ``thing_id_bounds``
+    cut it into ranges.
+    """
+    namespace_shards: Sequence[Optional[str]] = namespaces or [None]
+    shards = [
+        SearchShard(filter=_and_filter(filter, range_filter), namespaces=namespace)
+        for namespace in namespace_shards
+        for range_filter in _thing_id_range_filters(thing_id_bounds or [])
+    ]
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _count(shard: SearchShard) -> None:
+        async with semaphore:
+            shard.count = await count_things(client, filter=shard.filter, namespaces=shard.namespaces, timeout=timeout)
+
+    await asyncio.gather(*(_count(shard) for shard in shards))
+
+    return sorted((shard for shard in shards if shard.count), key=lambda shard: shard.count, reverse=True)
+
+
+async def scan_search_things(
+    client: DittoClient,
+    *,
+    filter: Optional[str] = None,
+    namespaces: Optional[Sequence[str]] = None,
+    thing_id_bounds: Optional[Sequence[str]] = None,
+    fields: Optional[str] = None,
+    page_size: int = MAX_PAGE_SIZE,
+    concurrency: int = DEFAULT_SCAN_CONCURRENCY,
+    timeout: Optional[str] = None,  # noqa: ASYNC109
+    fast_json: bool = False,
+) -> AsyncGenerator[Thing, None]:
+    """Scan a search concurrently, one cursor chain per shard, merged into a single stream.
+
+    The search is split by ``namespaces`` and/or ``thing_id_bounds`` (see ``plan_search_shards``)
+    and at most ``concurrency`` shards are scanned at the same time. Things are yielded in
+    no particular order. Shards block once the merge buffer is full, so memory stays bounded
+    by roughly ``concurrency`` pages regardless of the size of the scan.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1.")
+
+    shards = await plan_search_shards(
+        client,
+        filter=filter,
+        namespaces=namespaces,
+        thing_id_bounds=thing_id_bounds,
+        concurrency=concurrency,
+        timeout=timeout,
+    )
+
+    pending: asyncio.Queue[SearchShard] = asyncio.Queue()
+    for shard in shards:
+        pending.put_nowait(shard)
+
+    merged: asyncio.Queue[Union[Thing, BaseException, _ShardDone]] = asyncio.Queue(maxsize=page_size * concurrency)
+
+    async def _worker() -> None:
+        try:
+            while not pending.empty():
+                shard = pending.get_nowait()
+                async for thing in iter_search_things(
+                    client,
+                    filter=shard.filter,
+                    namespaces=shard.namespaces,
+                    fields=fields,
+                    page_size=page_size,
+                    timeout=timeout,
+                    fast_json=fast_json,
+                ):
+                    await merged.put(thing)
+        except Exception as ex:
+            await merged.put(ex)
+        # Not in a finally: once cancelled nobody reads the queue, and a put on a full queue would block forever
+        await merged.put(_SHARD_DONE)
+
+    workers = [asyncio.create_task(_worker()) for _ in range(min(concurrency, len(shards)))]
+    try:
+        running = len(workers)
+        while running:
+            item = await merged.get()
+            if isinstance(item, _ShardDone):
+                running -= 1
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                yield item
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
@@ -0,0 +1,95 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+from ditto_client._middleware import DittoMiddleware
+
+# Headers that differ between otherwise identical requests without changing the response
+_IGNORED_HEADERS = frozenset(("correlation-id", "traceparent", "tracestate", "x-correlation-id"))
+# The body is shared as decoded bytes, so the encoding headers of the original response no longer apply
+_DROPPED_RESPONSE_HEADERS = frozenset(("content-encoding", "content-length", "transfer-encoding"))
+
+_Key = tuple[str, str, tuple[tuple[str, str], ...]]
+
+
+@dataclass
+class SingleFlightStats:
+    # Requests sent to Ditto
+    flights: int = 0
+    # Requests answered by a flight another caller had already started
+    coalesced: int = 0
+
+    @property
+    def coalesced_ratio(self) -> float:
+        requests = self.flights + self.coalesced
+        return self.coalesced / requests if requests else 0.0
+
+
+def _flight_key(request: httpx.Request) -> _Key:
+    headers = tuple(
+        sorted((name.lower(), value) for name, value in request.headers.items() if name.lower() not in _IGNORED_HEADERS)
+    )
+    return request.method, str(request.url), headers
+
+
+def _share(response: httpx.Response, request: httpx.Request) -> httpx.Response:
+    headers = [
+        (name, value) for name, value in response.headers.items() if name.lower() not in _DROPPED_RESPONSE_HEADERS
+    ]
+    return httpx.Response(
+        response.status_code,
+        headers=headers,
+        content=response.content,
+        request=request,
+        extensions=dict(response.extensions),
+    )
+
+
+class SingleFlightMiddleware(DittoMiddleware):
+    """Lets concurrent identical GET requests share a single request to Ditto.
+
+    Requests are identical when method, URL and headers match, so callers with different
+    credentials or conditional headers never share a response. Each caller gets its own copy
+    of the shared response, error statuses included. A flight keeps running when the callers
+    waiting on it are cancelled, and is forgotten as soon as it completes, so later requests
+    always see fresh state. Event streams are never coalesced.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._flights: dict[_Key, asyncio.Task[httpx.Response]] = {}
+        self._stats = SingleFlightStats()
+
+    @property
+    def stats(self) -> SingleFlightStats:
+        return self._stats
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def send(self, request: httpx.Request, transport: httpx.AsyncBaseTransport) -> httpx.Response:
+        if request.method not in ("GET", "HEAD") or "text/event-stream" in request.headers.get("accept", ""):
+            return await self.send_next(request, transport)
+
+        key = _flight_key(request)
+        flight: Optional[asyncio.Task[httpx.Response]] = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.create_task(self._fly(key, request, transport))
+            self._flights[key] = flight
+            self._stats.flights += 1
+        else:
+            self._stats.coalesced += 1
+
+        response = await asyncio.shield(flight)
+        return _share(response, request)
+
+    async def _fly(self, key: _Key, request: httpx.Request, transport: httpx.AsyncBaseTransport) -> httpx.Response:
+        try:
+            response = await self.send_next(request, transport)
+            await response.aread()
+            return response
+        finally:
+            self._flights.pop(key, None)
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import httpx
+from kiota_abstractions.method import Method
+from kiota_abstractions.request_information import RequestInformation
+from kiota_abstractions.serialization.parsable_factory import ParsableFactory
+
+from ditto_client._response import raise_for_status
+from ditto_client.fast_json import loads, thing_from_dict
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.generated.models.advanced_error import AdvancedError
+from ditto_client.generated.models.thing import Thing
+from ditto_client.request_adapter import DittoRequestAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECONNECT_DELAY = 1.0
+DEFAULT_MAX_RECONNECT_DELAY = 30.0
+
+_THINGS_URL_TEMPLATE = "{+baseurl}/api/2/things{?extraFields*,fields*,filter*,ids*,namespaces*}"
+_ERROR_MAPPING: dict[str, ParsableFactory[Any]] = {"4XX": AdvancedError}
+
+
+@dataclass
+class ServerSentEvent:
+    data: str
+    event: str = "message"
+    id: Optional[str] = None
+
+
+class ServerSentEventParser:
+    """Incremental parser for a ``text/event-stream`` body, fed one line at a time."""
+
+    def __init__(self) -> None:
+        self.last_event_id: Optional[str] = None
+        # Reconnection time in milliseconds requested by the server
+        self.retry: Optional[int] = None
+        self._data: list[str] = []
+        self._event = ""
+
+    def feed(self, line: str) -> Optional[ServerSentEvent]:
+        """Consume a line without its terminator, returning the event completed by it if any."""
+        if not line:
+            return self._dispatch()
+        if line.startswith(":"):
+            return None
+
+        name, _, value = line.partition(":")
+        value = value.removeprefix(" ")
+        if name == "data":
+            self._data.append(value)
+        elif name == "event":
+            self._event = value
+        elif name == "id" and "\0" not in value:
+            self.last_event_id = value
+        elif name == "retry" and value.isdigit():
+            self.retry = int(value)
+        return None
+
+    def _dispatch(self) -> Optional[ServerSentEvent]:
+        data, event = self._data, self._event
+        self._data, self._event = [], ""
+        if not data:
+            return None
+        return ServerSentEvent(data="\n".join(data), event=event or "message", id=self.last_event_id)
+
+
+@dataclass
+class ThingChangeEvent:
+    thing_id: Optional[str]
+    # The changed parts of the thing plus the requested fields/extraFields, as sent by Ditto
+    data: dict[str, Any] = field(default_factory=dict)
+    event_id: Optional[str] = None
+
+    @property
+    def revision(self) -> Optional[int]:
+        revision = self.data.get("_revision")
+        return revision if isinstance(revision, int) else None
+
+    @property
+    def thing(self) -> Thing:
+        return thing_from_dict(self.data)
+
+    @classmethod
+    def from_sse(cls, event: ServerSentEvent) -> "ThingChangeEvent":
+        data = loads(event.data)
+        thing_id = data.get("thingId")
+        return cls(thing_id=thing_id if isinstance(thing_id, str) else None, data=data, event_id=event.id)
+
+
+def _build_request(query_parameters: dict[str, Optional[str]], last_event_id: Optional[str]) -> RequestInformation:
+    request_info = RequestInformation(Method.GET, _THINGS_URL_TEMPLATE, {})
+    request_info.query_parameters = {key: value for key, value in query_parameters.items() if value}
+    request_info.headers.try_add("Accept", "text/event-stream")
+    if last_event_id:
+        request_info.headers.try_add("Last-Event-ID", last_event_id)
+    return request_info
+
+
+async def subscribe_thing_changes(
+    client: DittoClient,
+    *,
+    ids: Optional[str] = None,
+    namespaces: Optional[str] = None,
+    fields: Optional[str] = None,
+    extra_fields: Optional[str] = None,
+    filter: Optional[str] = None,
+    last_event_id: Optional[str] = None,
+    reconnect_delay: float = DEFAULT_RECONNECT_DELAY,
+    max_reconnect_delay: float = DEFAULT_MAX_RECONNECT_DELAY,
+) -> AsyncGenerator[ThingChangeEvent, None]:
+    """Yield thing change events from Ditto's server-sent event stream on ``/api/2/things``.
+
+    Events are parsed as the body streams in. When the connection drops, or the server answers
+    with a 5xx, the stream is reopened with ``Last-Event-ID`` set to the last received event id,
+    backing off exponentially up to ``max_reconnect_delay`` seconds. 4xx responses are raised.
+    The subscription runs until the generator is closed.
+
+    Requires a client created by ``DittoClientFactory`` (i.e. backed by ``DittoRequestAdapter``).
+    """
+    request_adapter = client.request_adapter
+    if not isinstance(request_adapter, DittoRequestAdapter):
+        raise TypeError("Streaming thing changes requires a client backed by DittoRequestAdapter.")
+
+    query_parameters = {
+        "extraFields": extra_fields,
+        "fields": fields,
+        "filter": filter,
+        "ids": ids,
+        "namespaces": namespaces,
+    }
+    delay = reconnect_delay
+    while True:
+        try:
+            async with request_adapter.stream_async(_build_request(query_parameters, last_event_id)) as response:
+                if response.status_code >= 500:
+                    logger.warning("Thing change stream returned %s, reconnecting", response.status_code)
+                else:
+                    await _raise_for_status(response)
+
+                    parser = ServerSentEventParser()
+                    async for line in response.aiter_lines():
+                        event = parser.feed(line)
+                        if parser.retry is not None:
+                            reconnect_delay = parser.retry / 1000
+                        if event is None:
+                            continue
+
+                        if event.id is not None:
+                            last_event_id = event.id
+                        delay = reconnect_delay
+                        # Ditto sends empty events to keep idle connections open
+                        if event.data.strip():
+                            yield ThingChangeEvent.from_sse(event)
+
+                    logger.info("Thing change stream closed by the server, reconnecting")
+        except (httpx.TransportError, httpx.StreamError) as ex:
+            logger.warning("Thing change stream dropped (%s), reconnecting", ex)
+
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_reconnect_delay)
+
+
+async def _raise_for_status(response: httpx.Response) -> None:
+    if response.is_success:
+        return
+    await response.aread()
+    raise_for_status(response, _ERROR_MAPPING)
@@ -0,0 +1,88 @@
+"""Bring things and features to a desired state by sending only what changed.
+
+Instead of replacing a whole thing with ``PUT``, the desired state is diffed against the current
+one (passed in, taken from a ``ThingCache`` or read from Ditto) and the minimal JSON merge patch is
+sent with ``PATCH``. Nothing is sent when the thing is already up to date.
+"""
+
+from typing import Any, Optional
+
+from kiota_abstractions.api_error import APIError
+from kiota_abstractions.base_request_configuration import RequestConfiguration
+
+from ditto_client.cache import ThingCache
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.generated.models.feature import Feature
+from ditto_client.generated.models.patch_thing import PatchThing
+from ditto_client.merge_patch import create_merge_patch
+from ditto_client.raw import raw_json_option
+
+
+def _writable_fields(data: dict[str, Any]) -> dict[str, Any]:
+    # The thingId is part of the URL and special fields such as _revision are maintained by Ditto
+    return {key: value for key, value in data.items() if key != "thingId" and not key.startswith("_")}
+
+
+async def _read_current(builder: Any) -> dict[str, Any]:
+    try:
+        current = await builder.get(request_configuration=RequestConfiguration(options=[raw_json_option()]))
+    except APIError as ex:
+        if ex.response_status_code == 404:
+            return {}
+        raise
+    return current if isinstance(current, dict) else {}
+
+
+async def sync_thing(
+    client: DittoClient,
+    thing_id: str,
+    desired: dict[str, Any],
+    *,
+    current: Optional[dict[str, Any]] = None,
+    cache: Optional[ThingCache] = None,
+) -> Optional[dict[str, Any]]:
+    """Patch a thing to match ``desired`` and return the patch sent.
+
+    The current state is ``current`` when given, else the cached thing, else read from Ditto; a
+    missing thing is created. Attributes, features and the definition absent from ``desired`` are
+    removed, like a ``PUT`` would; the policy is only changed when ``desired`` has a ``policyId``.
+    Returns None without sending a request when the thing already matches.
+    """
+    builder = client.api.two.things.by_thing_id(thing_id)
+    if current is None and cache is not None:
+        current = cache.get_dict(thing_id)
+    if current is None:
+        current = await _read_current(builder)
+
+    current = _writable_fields(current)
+    desired = _writable_fields(desired)
+    if "policyId" not in desired:
+        current.pop("policyId", None)
+
+    patch = create_merge_patch(current, desired)
+    if not patch:
+        return None
+
+    await builder.patch(body=PatchThing(additional_data=patch))
+    return patch
+
+
+async def sync_feature(
+    client: DittoClient,
+    thing_id: str,
+    feature_id: str,
+    desired: dict[str, Any],
+    *,
+    current: Optional[dict[str, Any]] = None,
+) -> Optional[dict[str, Any]]:
+    """Patch a feature (``properties``, ``desiredProperties``, ``definition``) to match ``desired``."""
+    builder = client.api.two.things.by_thing_id(thing_id).features.by_feature_id(feature_id)
+    if current is None:
+        current = await _read_current(builder)
+
+    patch = create_merge_patch(current, desired)
+    if not patch:
+        return None
+
+    await builder.patch(body=Feature(additional_data=patch))
+    return patch
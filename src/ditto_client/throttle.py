@@ -0,0 +1,240 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+from ditto_client._middleware import DittoMiddleware
+from ditto_client.endpoints import EndpointFamily, endpoint_family
+
+DEFAULT_INITIAL_LIMIT = 20
+DEFAULT_MAX_LIMIT = 500
+DEFAULT_DECREASE_RATIO = 0.7
+DEFAULT_LATENCY_TOLERANCE = 2.0
+DEFAULT_BASELINE_WINDOW = 30.0
+
+# Responses telling the client to slow down
+_CONGESTION_STATUS_CODES = frozenset((429, 503, 504))
+
+
+class TokenBucket:
+    """Limits requests to ``rate`` per second on average, with bursts of up to ``burst`` requests.
+
+    Callers that find the bucket empty wait in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+
+        self._rate = rate
+        self._burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self._burst
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._waiting = 0
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    async def acquire(self) -> None:
+        self._waiting += 1
+        try:
+            async with self._lock:
+                self._refill()
+                if self._tokens < 1.0:
+                    await asyncio.sleep((1.0 - self._tokens) / self._rate)
+                    self._refill()
+                self._tokens -= 1.0
+        finally:
+            self._waiting -= 1
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+
+class AdaptiveConcurrencyLimiter:
+    """Finds how many concurrent requests an endpoint sustains, additive-increase/multiplicative-decrease.
+
+    The limit grows by about one per round trip while requests succeed at full use of the
+    limit, and is cut by ``decrease_ratio`` when Ditto answers ``429``/``503``/``504``, a
+    request times out or latency exceeds ``latency_tolerance`` times the fastest successful,
+    uncongested response of the last ``baseline_window`` seconds. Only requests started after
+    the last cut can cut it again, so one burst of failures shrinks the limit once. Requests
+    above the limit wait in arrival order.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = DEFAULT_INITIAL_LIMIT,
+        *,
+        min_limit: int = 1,
+        max_limit: int = DEFAULT_MAX_LIMIT,
+        decrease_ratio: float = DEFAULT_DECREASE_RATIO,
+        latency_tolerance: float = DEFAULT_LATENCY_TOLERANCE,
+        baseline_window: float = DEFAULT_BASELINE_WINDOW,
+    ) -> None:
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit.")
+
+        self._limit = float(initial_limit)
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._decrease_ratio = decrease_ratio
+        self._latency_tolerance = latency_tolerance
+        self._baseline_window = baseline_window
+        # (finished at, latency) with increasing latencies, the first one is the windowed minimum
+        self._baseline: deque[tuple[float, float]] = deque()
+        self._last_decrease = 0.0
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> float:
+        """Wait for a slot and return the start time to pass to ``release``."""
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return time.monotonic()
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before the cancellation, pass it on
+                self._in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+        return time.monotonic()
+
+    @property
+    def min_latency(self) -> Optional[float]:
+        """The latency baseline, None until a successful request finished within the window."""
+        while self._baseline and self._baseline[0][0] < time.monotonic() - self._baseline_window:
+            self._baseline.popleft()
+        return self._baseline[0][1] if self._baseline else None
+
+    def release(self, started_at: float, *, congested: bool = False, succeeded: bool = True) -> None:
+        """Free the slot taken at ``started_at``; only ``succeeded`` requests count toward the latency baseline."""
+        now = time.monotonic()
+        latency = now - started_at
+        used = self._in_flight >= self.limit // 2
+        self._in_flight -= 1
+
+        min_latency = self.min_latency
+        if min_latency is not None and latency > self._latency_tolerance * min_latency:
+            congested = True
+        # A fast rejection or a queued response must not move the baseline
+        if succeeded and not congested:
+            while self._baseline and self._baseline[-1][1] >= latency:
+                self._baseline.pop()
+            self._baseline.append((now, latency))
+
+        if congested:
+            if started_at >= self._last_decrease:
+                self._limit = max(float(self._min_limit), self._limit * self._decrease_ratio)
+                self._last_decrease = now
+        elif used:
+            self._limit = min(float(self._max_limit), self._limit + 1.0 / self._limit)
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+
+@dataclass
+class ThrottleMetrics:
+    concurrency_limit: Optional[int] = None
+    in_flight: Optional[int] = None
+    # Requests waiting for a token or a concurrency slot
+    queue_depth: int = 0
+    rate: Optional[float] = None
+    tokens: Optional[float] = None
+
+
+class ThrottleMiddleware(DittoMiddleware):
+    """Applies a ``TokenBucket`` and/or an ``AdaptiveConcurrencyLimiter`` per endpoint family.
+
+    Families without a limiter pass through untouched, as do event streams, which hold their
+    connection open. Put it after ``RetryMiddleware`` so that retries are throttled as well.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate_limits: Optional[Mapping[EndpointFamily, TokenBucket]] = None,
+        concurrency_limits: Optional[Mapping[EndpointFamily, AdaptiveConcurrencyLimiter]] = None,
+    ) -> None:
+        super().__init__()
+        self._rate_limits = dict(rate_limits or {})
+        self._concurrency_limits = dict(concurrency_limits or {})
+
+    def metrics(self) -> dict[EndpointFamily, ThrottleMetrics]:
+        metrics: dict[EndpointFamily, ThrottleMetrics] = {}
+        for family, bucket in self._rate_limits.items():
+            metrics[family] = ThrottleMetrics(rate=bucket.rate, tokens=bucket.tokens, queue_depth=bucket.waiting)
+        for family, limiter in self._concurrency_limits.items():
+            family_metrics = metrics.setdefault(family, ThrottleMetrics())
+            family_metrics.concurrency_limit = limiter.limit
+            family_metrics.in_flight = limiter.in_flight
+            family_metrics.queue_depth += limiter.waiting
+        return metrics
+
+    async def send(self, request: httpx.Request, transport: httpx.AsyncBaseTransport) -> httpx.Response:
+        if "text/event-stream" in request.headers.get("accept", ""):
+            return await self.send_next(request, transport)
+
+        family = endpoint_family(request.url.path)
+        bucket = self._rate_limits.get(family)
+        if bucket is not None:
+            await bucket.acquire()
+
+        limiter = self._concurrency_limits.get(family)
+        if limiter is None:
+            return await self.send_next(request, transport)
+
+        started_at = await limiter.acquire()
+        congested = succeeded = False
+        try:
+            response = await self.send_next(request, transport)
+            congested = response.status_code in _CONGESTION_STATUS_CODES
+            succeeded = response.status_code < 400
+            return response
+        except httpx.TimeoutException:
+            congested = True
+            raise
+        finally:
+            limiter.release(started_at, congested=congested, succeeded=succeeded)
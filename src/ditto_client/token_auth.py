@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import httpx
+from kiota_abstractions.authentication.authentication_provider import AuthenticationProvider
+from kiota_abstractions.request_information import RequestInformation
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_MARGIN = 60.0
+# Shortest time between two timer-driven refreshes, whatever the lifetime of the tokens returned
+MIN_REFRESH_DELAY = 1.0
+
+
+@dataclass(frozen=True)
+class AccessToken:
+    token: str
+    # Expiry on the time.monotonic() clock
+    expires_at: float
+
+    @classmethod
+    def from_expires_in(cls, token: str, expires_in: float) -> "AccessToken":
+        return cls(token=token, expires_at=time.monotonic() + expires_in)
+
+    def expires_within(self, seconds: float) -> bool:
+        return time.monotonic() >= self.expires_at - seconds
+
+
+TokenFetcher = Callable[[], Awaitable[AccessToken]]
+
+
+def client_credentials_token_fetcher(
+    token_url: str,
+    client_id: str,
+    client_secret: str,
+    *,
+    scope: Optional[str] = None,
+    http_client: Optional[httpx.AsyncClient] = None,
+) -> TokenFetcher:
+    """Build a fetcher for the OAuth2 client credentials grant against ``token_url``."""
+    client = http_client or httpx.AsyncClient()
+
+    async def _fetch() -> AccessToken:
+        form = {"grant_type": "client_credentials", "client_id": client_id, "client_secret": client_secret}
+        if scope:
+            form["scope"] = scope
+
+        response = await client.post(token_url, data=form)
+        response.raise_for_status()
+        payload = response.json()
+
+        return AccessToken.from_expires_in(payload["access_token"], float(payload.get("expires_in", 300)))
+
+    return _fetch
+
+
+class BearerTokenProvider(AuthenticationProvider):
+    """Authenticates requests with a cached bearer token, refreshed before it expires.
+
+    Once a token enters the last ``refresh_margin`` seconds of its lifetime, or the second half
+    of it for tokens living less than twice the margin, a refresh is started in the background
+    while requests keep using the still valid token; a timer also starts it when no requests
+    come in. Only one refresh runs at a time: every coroutine needing a new token awaits the
+    same in-flight fetch, so a burst of requests at expiry results in a single call to the
+    token endpoint.
+    """
+
+    def __init__(self, fetch_token: TokenFetcher, *, refresh_margin: float = DEFAULT_REFRESH_MARGIN) -> None:
+        self._fetch_token = fetch_token
+        self._refresh_margin = refresh_margin
+        self._token: Optional[AccessToken] = None
+        self._refresh_at = 0.0
+        self._refresh_task: Optional[asyncio.Task[AccessToken]] = None
+        self._timer_task: Optional[asyncio.Task[None]] = None
+
+    async def get_token(self) -> str:
+        token = self._token
+        if token is None or token.expires_within(0):
+            token = await self.refresh()
+        elif time.monotonic() >= self._refresh_at:
+            self._start_refresh()
+        return token.token
+
+    async def refresh(self) -> AccessToken:
+        """Fetch a new token, joining the refresh already in flight if there is one."""
+        # Shield the shared task so that a cancelled waiter does not cancel the refresh for everyone
+        return await asyncio.shield(self._start_refresh())
+
+    async def authenticate_request(
+        self,
+        request: RequestInformation,
+        additional_authentication_context: Optional[dict[str, Any]] = None,
+    ) -> None:
+        request.headers.add("Authorization", f"Bearer {await self.get_token()}")
+
+    async def aclose(self) -> None:
+        for task in (self._refresh_task, self._timer_task):
+            if task is not None:
+                task.cancel()
+
+    def _start_refresh(self) -> "asyncio.Task[AccessToken]":
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._fetch())
+            self._refresh_task.add_done_callback(self._on_refresh_done)
+        return self._refresh_task
+
+    async def _fetch(self) -> AccessToken:
+        token = await self._fetch_token()
+        lifetime = max(0.0, token.expires_at - time.monotonic())
+        self._token = token
+        self._refresh_at = token.expires_at - min(self._refresh_margin, lifetime / 2)
+        self._schedule_refresh()
+        return token
+
+    def _on_refresh_done(self, task: "asyncio.Task[AccessToken]") -> None:
+        if not task.cancelled() and task.exception() is not None:
+            # Waiters receive the error; background refreshes only get logged and are retried on the next request
+            logger.warning("Failed to refresh the bearer token: %s", task.exception())
+
+    def _schedule_refresh(self) -> None:
+        if self._timer_task is not None:
+            self._timer_task.cancel()
+
+        # Never immediately: a token endpoint handing out short-lived tokens would be called in a loop
+        delay = max(MIN_REFRESH_DELAY, self._refresh_at - time.monotonic())
+
+        async def _refresh_later() -> None:
+            await asyncio.sleep(delay)
+            self._start_refresh()
+
+        self._timer_task = asyncio.create_task(_refresh_later())
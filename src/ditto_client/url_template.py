@@ -0,0 +1,113 @@
+"""Precompiled expansion of the RFC 6570 URL templates used by the generated request builders.
+
+``std_uritemplate`` re-parses the template character by character on every request. The generated
+templates only use simple (``{thingId}``), reserved (``{+baseurl}``) and exploded query
+(``{?fields*,timeout*}``) expressions, so they are parsed once into literals and expressions and
+expanded with ``urllib.parse.quote``. Values the fast path does not handle (lists, maps, dates, ...)
+make ``expand`` return ``None`` and the caller falls back to ``std_uritemplate``.
+"""
+
+import re
+from dataclasses import dataclass
+from enum import Enum
+from functools import cache
+from typing import Any, Optional, Union
+from urllib.parse import quote
+
+_EXPRESSION = re.compile(r"\{([^}]*)\}")
+_VARIABLE = re.compile(r"[A-Za-z0-9_%.]+")
+_OPERATOR_PREFIXES = {"": "", "+": "", "?": "?", "&": "&"}
+
+
+class _Unsupported(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class _Expression:
+    operator: str
+    variables: tuple[str, ...]
+
+
+def _to_str(value: Any) -> str:
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    raise _Unsupported
+
+
+def _encode(operator: str, value: str) -> str:
+    if operator != "+":
+        return quote(value, safe="")
+    # Reserved expansion keeps ASCII as is; percent triplets and non-ASCII need std_uritemplate's rules
+    if "%" in value or not value.isascii():
+        raise _Unsupported
+    return value.replace(" ", "%20")
+
+
+class CompiledUrlTemplate:
+    def __init__(self, parts: list[Union[str, _Expression]]) -> None:
+        self._parts = parts
+
+    def expand(self, values: dict[str, Any]) -> Optional[str]:
+        """Expand the template, or return ``None`` when a value needs the generic expansion."""
+        result: list[str] = []
+        try:
+            for part in self._parts:
+                if isinstance(part, str):
+                    result.append(part)
+                    continue
+
+                named = part.operator in ("?", "&")
+                first = True
+                for name in part.variables:
+                    value = values.get(name)
+                    if value is None:
+                        continue
+
+                    result.append(_OPERATOR_PREFIXES[part.operator] if first else ("&" if named else ","))
+                    first = False
+                    if named:
+                        result.append(f"{name}=")
+                    result.append(_encode(part.operator, _to_str(value)))
+        except _Unsupported:
+            return None
+
+        return "".join(result)
+
+
+def _parse_expression(expression: str) -> Optional[_Expression]:
+    operator = expression[:1] if expression[:1] in ("+", "?", "&") else ""
+    variables = []
+    for variable in expression[len(operator) :].split(","):
+        # Explode only changes the expansion of lists and maps, which the fast path does not handle
+        name = variable.removesuffix("*")
+        if not _VARIABLE.fullmatch(name):
+            return None
+        variables.append(name)
+    return _Expression(operator=operator, variables=tuple(variables))
+
+
+@cache
+def compile_url_template(template: str) -> Optional[CompiledUrlTemplate]:
+    """Compile ``template``, or return ``None`` when it uses expressions the fast path does not support."""
+    parts: list[Union[str, _Expression]] = []
+    position = 0
+    for match in _EXPRESSION.finditer(template):
+        if match.start() > position:
+            parts.append(template[position : match.start()])
+
+        expression = _parse_expression(match.group(1))
+        if expression is None:
+            return None
+        parts.append(expression)
+        position = match.end()
+
+    if position < len(template):
+        parts.append(template[position:])
+    return CompiledUrlTemplate(parts)
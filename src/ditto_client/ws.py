@@ -0,0 +1,352 @@
+"""Ditto Protocol client over the Ditto WebSocket (``/ws/2``).
+
+Commands are sent as Ditto Protocol envelopes and their responses are matched by
+``correlation-id``, so any number of commands can be in flight on a single socket.
+Twin and live events are delivered to subscribers after ``START-SEND-*`` has been acknowledged.
+
+Requires the optional ``websockets`` package (the ``ws`` extra).
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass, field
+from enum import Enum
+from types import TracebackType
+from typing import Any, Optional
+from urllib.parse import quote, urlencode
+
+from ditto_client.basic_auth import BasicAuthProvider
+from ditto_client.generated.models.advanced_error import AdvancedError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMMAND_TIMEOUT = 60.0
+DEFAULT_MAX_IN_FLIGHT = 1000
+DEFAULT_SUBSCRIBER_QUEUE_SIZE = 10_000
+
+
+class EventStream(str, Enum):
+    TwinEvents = "EVENTS"
+    LiveEvents = "LIVE_EVENTS"
+    LiveMessages = "MESSAGES"
+    LiveCommands = "LIVE_COMMANDS"
+
+
+# Protocol text messages starting and stopping each stream
+_START_COMMANDS = {
+    EventStream.TwinEvents: "START-SEND-EVENTS",
+    EventStream.LiveEvents: "START-SEND-LIVE-EVENTS",
+    EventStream.LiveMessages: "START-SEND-MESSAGES",
+    EventStream.LiveCommands: "START-SEND-LIVE-COMMANDS",
+}
+_STOP_COMMANDS = {stream: command.replace("START", "STOP", 1) for stream, command in _START_COMMANDS.items()}
+
+
+def thing_topic(thing_id: str, criterion: str, action: str, *, channel: str = "twin") -> str:
+    """Build the Ditto Protocol topic of a thing, e.g. ``org.acme/device-1/things/twin/commands/modify``."""
+    namespace, _, name = thing_id.partition(":")
+    return f"{namespace}/{name}/things/{channel}/{criterion}/{action}"
+
+
+@dataclass
+class DittoProtocolMessage:
+    topic: str
+    path: str = "/"
+    value: Any = None
+    headers: dict[str, Any] = field(default_factory=dict)
+    status: Optional[int] = None
+    # Field selector of retrieve commands, e.g. "thingId,attributes"
+    fields: Optional[str] = None
+
+    @property
+    def thing_id(self) -> Optional[str]:
+        parts = self.topic.split("/", 3)
+        if len(parts) < 3 or parts[2] != "things":
+            return None
+        return f"{parts[0]}:{parts[1]}"
+
+    @property
+    def correlation_id(self) -> Optional[str]:
+        return self.headers.get("correlation-id")
+
+    @property
+    def is_response(self) -> bool:
+        # Events caused by a command carry its correlation-id too, but no status
+        return self.status is not None and self.topic.split("/")[4:5] != ["events"]
+
+    @property
+    def stream(self) -> Optional[EventStream]:
+        criteria = self.topic.split("/")[3:5]
+        if criteria == ["twin", "events"]:
+            return EventStream.TwinEvents
+        if criteria == ["live", "events"]:
+            return EventStream.LiveEvents
+        if criteria == ["live", "messages"]:
+            return EventStream.LiveMessages
+        if criteria == ["live", "commands"]:
+            return EventStream.LiveCommands
+        return None
+
+    def to_json(self) -> str:
+        envelope: dict[str, Any] = {"topic": self.topic, "path": self.path, "headers": self.headers}
+        if self.value is not None:
+            envelope["value"] = self.value
+        if self.status is not None:
+            envelope["status"] = self.status
+        if self.fields is not None:
+            envelope["fields"] = self.fields
+        return json.dumps(envelope)
+
+    @classmethod
+    def from_dict(cls, envelope: dict[str, Any]) -> "DittoProtocolMessage":
+        return cls(
+            topic=envelope.get("topic", ""),
+            path=envelope.get("path", "/"),
+            value=envelope.get("value"),
+            headers=envelope.get("headers") or {},
+            status=envelope.get("status"),
+            fields=envelope.get("fields"),
+        )
+
+
+def _to_error(response: DittoProtocolMessage) -> AdvancedError:
+    value = response.value if isinstance(response.value, dict) else {}
+    error = AdvancedError(
+        error=value.get("error"),
+        message=value.get("message"),
+        status=response.status,
+        description=value.get("description"),
+    )
+    error.response_status_code = response.status
+    return error
+
+
+class DittoWebSocketClient:
+    """Multiplexes Ditto Protocol commands and event subscriptions over one WebSocket connection.
+
+    Connect with ``await client.connect()`` or use the client as an async context manager.
+    At most ``max_in_flight`` commands await their response at the same time; further
+    commands wait for a slot. Subscribers that fall more than ``subscriber_queue_size``
+    events behind lose the oldest events rather than stalling command responses.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        auth_provider: BasicAuthProvider,
+        *,
+        command_timeout: float = DEFAULT_COMMAND_TIMEOUT,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        subscriber_queue_size: int = DEFAULT_SUBSCRIBER_QUEUE_SIZE,
+    ) -> None:
+        self._url = url
+        self._auth_provider = auth_provider
+        self._command_timeout = command_timeout
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._subscriber_queue_size = subscriber_queue_size
+        self._connection: Any = None
+        self._reader: Optional[asyncio.Task[None]] = None
+        self._pending: dict[str, asyncio.Future[DittoProtocolMessage]] = {}
+        self._pending_acks: dict[str, asyncio.Future[None]] = {}
+        self._subscribers: dict[EventStream, set[asyncio.Queue[Optional[DittoProtocolMessage]]]] = {
+            stream: set() for stream in EventStream
+        }
+        self._dropped_events = 0
+
+    @property
+    def dropped_events(self) -> int:
+        return self._dropped_events
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def connect(self) -> None:
+        try:
+            from websockets.asyncio.client import connect
+        except ImportError as ex:
+            raise ImportError(
+                "The Ditto WebSocket client requires the 'ws' extra: pip install 'ditto-client[ws]'."
+            ) from ex
+
+        self._connection = await connect(
+            self._url,
+            additional_headers={"Authorization": self._auth_provider.auth_header},
+            max_size=None,
+        )
+        self._reader = asyncio.create_task(self._read())
+
+    async def aclose(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+    async def __aenter__(self) -> "DittoWebSocketClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await self.aclose()
+
+    async def send_command(
+        self,
+        message: DittoProtocolMessage,
+        *,
+        response_required: bool = True,
+        timeout: Optional[float] = None,  # noqa: ASYNC109
+    ) -> Optional[DittoProtocolMessage]:
+        """Send a command envelope and return its response, raising ``AdvancedError`` for error responses.
+
+        With ``response_required=False`` the command is sent fire-and-forget and ``None`` is returned.
+        """
+        connection = self._require_connection()
+        message.headers.setdefault("correlation-id", str(uuid.uuid4()))
+        message.headers["response-required"] = response_required
+
+        if not response_required:
+            await connection.send(message.to_json())
+            return None
+
+        correlation_id = message.headers["correlation-id"]
+        async with self._in_flight:
+            future: asyncio.Future[DittoProtocolMessage] = asyncio.get_running_loop().create_future()
+            self._pending[correlation_id] = future
+            try:
+                await connection.send(message.to_json())
+                response = await asyncio.wait_for(future, timeout or self._command_timeout)
+            finally:
+                self._pending.pop(correlation_id, None)
+
+        if response.status is not None and response.status >= 400:
+            raise _to_error(response)
+        return response
+
+    async def retrieve(self, thing_id: str, path: str = "/", *, fields: Optional[str] = None) -> Any:
+        message = DittoProtocolMessage(thing_topic(thing_id, "commands", "retrieve"), path, fields=fields)
+        response = await self.send_command(message)
+        return response.value if response else None
+
+    async def modify(self, thing_id: str, path: str, value: Any, *, response_required: bool = True) -> None:
+        message = DittoProtocolMessage(thing_topic(thing_id, "commands", "modify"), path, value)
+        await self.send_command(message, response_required=response_required)
+
+    async def merge(self, thing_id: str, path: str, value: Any, *, response_required: bool = True) -> None:
+        message = DittoProtocolMessage(thing_topic(thing_id, "commands", "merge"), path, value)
+        message.headers["content-type"] = "application/merge-patch+json"
+        await self.send_command(message, response_required=response_required)
+
+    async def delete(self, thing_id: str, path: str = "/", *, response_required: bool = True) -> None:
+        message = DittoProtocolMessage(thing_topic(thing_id, "commands", "delete"), path)
+        await self.send_command(message, response_required=response_required)
+
+    async def subscribe(
+        self,
+        stream: EventStream = EventStream.TwinEvents,
+        *,
+        namespaces: Optional[str] = None,
+        filter: Optional[str] = None,
+        extra_fields: Optional[str] = None,
+    ) -> AsyncGenerator[DittoProtocolMessage, None]:
+        """Yield the events of ``stream`` until the generator is closed or the connection ends.
+
+        The stream is started on the server when the first subscriber of ``stream`` arrives,
+        with that subscriber's filters, and stopped when the last one leaves.
+        """
+        queue: asyncio.Queue[Optional[DittoProtocolMessage]] = asyncio.Queue(self._subscriber_queue_size)
+        subscribers = self._subscribers[stream]
+        first = not subscribers
+        # Registered before starting the stream, events may arrive right behind the acknowledgement
+        subscribers.add(queue)
+
+        try:
+            if first:
+                options = {"namespaces": namespaces, "filter": filter, "extraFields": extra_fields}
+                await self._send_protocol_command(_START_COMMANDS[stream], options)
+
+            while (message := await queue.get()) is not None:
+                yield message
+        finally:
+            subscribers.discard(queue)
+            if not subscribers and self._connection is not None and self._reader and not self._reader.done():
+                await self._send_protocol_command(_STOP_COMMANDS[stream], {})
+
+    async def _send_protocol_command(self, command: str, options: dict[str, Optional[str]]) -> None:
+        connection = self._require_connection()
+        # The server acknowledges "START-SEND-EVENTS?filter=..." with "START-SEND-EVENTS:ACK"
+        parameters = urlencode({key: value for key, value in options.items() if value}, quote_via=quote)
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._pending_acks[command] = future
+        try:
+            await connection.send(f"{command}?{parameters}" if parameters else command)
+            await asyncio.wait_for(future, self._command_timeout)
+        finally:
+            self._pending_acks.pop(command, None)
+
+    def _require_connection(self) -> Any:
+        if self._connection is None:
+            raise RuntimeError("The WebSocket client is not connected.")
+        return self._connection
+
+    async def _read(self) -> None:
+        try:
+            async for frame in self._connection:
+                if isinstance(frame, bytes):
+                    frame = frame.decode()
+                if frame.endswith(":ACK"):
+                    ack = self._pending_acks.get(frame.removesuffix(":ACK"))
+                    if ack is not None and not ack.done():
+                        ack.set_result(None)
+                    continue
+
+                try:
+                    envelope = json.loads(frame)
+                except ValueError:
+                    envelope = None
+                if not isinstance(envelope, dict):
+                    logger.warning("Ignoring malformed Ditto Protocol frame: %.200s", frame)
+                    continue
+                self._dispatch(DittoProtocolMessage.from_dict(envelope))
+        except Exception as ex:
+            logger.warning("Ditto WebSocket connection failed: %s", ex)
+        finally:
+            self._close_pending()
+
+    def _dispatch(self, message: DittoProtocolMessage) -> None:
+        correlation_id = message.correlation_id
+        future = self._pending.get(correlation_id) if correlation_id and message.is_response else None
+        if future is not None:
+            if not future.done():
+                future.set_result(message)
+            return
+
+        stream = message.stream
+        if stream is None:
+            logger.debug("Ignoring uncorrelated Ditto Protocol message on %s", message.topic)
+            return
+
+        for queue in self._subscribers[stream]:
+            if queue.full():
+                queue.get_nowait()
+                self._dropped_events += 1
+            queue.put_nowait(message)
+
+    def _close_pending(self) -> None:
+        error = ConnectionError("The Ditto WebSocket connection was closed.")
+        futures: list[asyncio.Future[Any]] = [*self._pending.values(), *self._pending_acks.values()]
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+        for subscribers in self._subscribers.values():
+            for queue in subscribers:
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(None)
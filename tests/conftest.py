@@ -0,0 +1,7 @@
+import pytest
+from mock_ditto import MockDitto
+
+
+@pytest.fixture
+def ditto() -> MockDitto:
+    return MockDitto()
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+from mock_ditto import Fault, MockDitto
+
+from ditto_client.bulk import ThingOperation, ThingOperationKind, execute_bulk
+
+
+def _operations(count: int) -> list[ThingOperation]:
+    return [
+        ThingOperation(ThingOperationKind.Put, f"org.acme:device-{index}", {"attributes": {"index": index}})
+        for index in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_execute_bulk_reports_every_operation(ditto: MockDitto) -> None:
+    operations = _operations(20) + [ThingOperation(ThingOperationKind.Delete, "org.acme:missing")]
+
+    results = [result async for result in execute_bulk(ditto.create_client(), operations, max_in_flight=4)]
+
+    assert sorted(result.index for result in results) == list(range(21))
+    failed = [result for result in results if not result.succeeded]
+    assert [(result.status_code, result.error_code) for result in failed] == [(404, "things:thing.notfound")]
+    assert ditto.thing_count == 20
+
+
+@pytest.mark.asyncio
+async def test_closing_execute_bulk_awaits_in_flight_operations(ditto: MockDitto) -> None:
+    ditto.fault = Fault(latency=0.05)
+
+    results = execute_bulk(ditto.create_client(), _operations(50), max_in_flight=8)
+    await anext(results)
+    await results.aclose()
+
+    assert not {task for task in asyncio.all_tasks() if task is not asyncio.current_task() and not task.done()}
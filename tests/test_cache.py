@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+import pytest
+from kiota_http.kiota_client_factory import KiotaClientFactory
+from mock_ditto import MockDitto
+
+from ditto_client.cache import ThingCache, ThingCacheMiddleware
+from ditto_client.generated.ditto_client import DittoClient
+from ditto_client.generated.models.attributes import Attributes
+from ditto_client.generated.models.patch_thing import PatchThing
+
+THING_ID = "org.acme:device-1"
+
+
+class _HeldReads(MockDitto):
+    """Answers GETs with the state at arrival but delivers them only once ``release`` is set."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.read_arrived = asyncio.Event()
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        response = await super().handle(request)
+        if request.method == "GET":
+            self.read_arrived.set()
+            await self.release.wait()
+        return response
+
+
+def _cached_client(ditto: MockDitto, cache: ThingCache) -> DittoClient:
+    return ditto.create_client([ThingCacheMiddleware(cache), *KiotaClientFactory.get_default_middleware(None)])
+
+
+async def _attributes(client: DittoClient) -> dict[str, object]:
+    thing = await client.api.two.things.by_thing_id(THING_ID).get()
+    assert thing is not None and thing.attributes is not None
+    return thing.attributes.additional_data
+
+
+@pytest.mark.asyncio
+async def test_reads_are_served_from_the_cache(ditto: MockDitto) -> None:
+    ditto.put_thing({"thingId": THING_ID, "attributes": {"index": 0}})
+    cache = ThingCache()
+    client = _cached_client(ditto, cache)
+
+    assert await _attributes(client) == {"index": 0}
+    assert await _attributes(client) == {"index": 0}
+
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+    assert ditto.requests[("GET", "/api/2/things/{thingId}")] == 1
+
+
+@pytest.mark.asyncio
+async def test_sub_resource_writes_invalidate_the_thing(ditto: MockDitto) -> None:
+    ditto.put_thing({"thingId": THING_ID, "attributes": {"index": 0}})
+    client = _cached_client(ditto, ThingCache())
+    await _attributes(client)
+
+    await client.api.two.things.by_thing_id(THING_ID).attributes.put(Attributes(additional_data={"index": 1}))
+
+    assert await _attributes(client) == {"index": 1}
+
+
+@pytest.mark.asyncio
+async def test_write_during_a_read_keeps_the_read_out_of_the_cache() -> None:
+    ditto = _HeldReads()
+    ditto.put_thing({"thingId": THING_ID, "attributes": {"index": 0}})
+    cache = ThingCache()
+    client = _cached_client(ditto, cache)
+
+    ditto.release.clear()
+    read = asyncio.create_task(_attributes(client))
+    await ditto.read_arrived.wait()
+    await client.api.two.things.by_thing_id(THING_ID).patch(PatchThing(additional_data={"attributes": {"index": 999}}))
+    ditto.release.set()
+
+    assert await read == {"index": 0}
+    assert THING_ID not in cache
+    assert await _attributes(client) == {"index": 999}
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from kiota_abstractions.api_error import APIError
+from kiota_http.kiota_client_factory import KiotaClientFactory
+from kiota_http.middleware.retry_handler import RetryHandler
+from mock_ditto import Fault, MockDitto
+
+from ditto_client.circuit_breaker import CircuitBreakerMiddleware, CircuitOpenError, CircuitState
+from ditto_client.generated.ditto_client import DittoClient
+
+THING_ID = "org.acme:device-00000"
+
+
+def _client(ditto: MockDitto, breaker: CircuitBreakerMiddleware) -> DittoClient:
+    middleware = [m for m in KiotaClientFactory.get_default_middleware(None) if not isinstance(m, RetryHandler)]
+    return ditto.create_client([breaker, *middleware])
+
+
+@pytest.mark.asyncio
+async def test_success_sent_before_the_circuit_opened_does_not_close_it(ditto: MockDitto) -> None:
+    ditto.populate(1)
+    transitions: list[tuple[CircuitState, CircuitState]] = []
+    breaker = CircuitBreakerMiddleware(
+        failure_threshold=2, reset_timeout=60.0, on_state_change=lambda _, old, new: transitions.append((old, new))
+    )
+    thing = _client(ditto, breaker).api.two.things.by_thing_id(THING_ID)
+    ditto.route_faults["/api/2/things/{thingId}"] = Fault(latency=0.1)
+    ditto.route_faults["/api/2/things/{thingId}/attributes"] = Fault(error_rate=1.0)
+
+    slow_read = asyncio.create_task(thing.get())
+    await asyncio.sleep(0.01)
+    for _ in range(2):
+        with pytest.raises(APIError):
+            await thing.attributes.get()
+
+    assert await slow_read is not None
+    assert transitions == [(CircuitState.Closed, CircuitState.Open)]
+    with pytest.raises(CircuitOpenError):
+        await thing.get()
+
+
+@pytest.mark.asyncio
+async def test_only_the_half_open_probe_closes_the_circuit(ditto: MockDitto) -> None:
+    ditto.populate(1)
+    transitions: list[tuple[CircuitState, CircuitState]] = []
+    breaker = CircuitBreakerMiddleware(
+        failure_threshold=1, reset_timeout=0.05, on_state_change=lambda _, old, new: transitions.append((old, new))
+    )
+    thing = _client(ditto, breaker).api.two.things.by_thing_id(THING_ID)
+
+    ditto.fault = Fault(error_rate=1.0)
+    with pytest.raises(APIError):
+        await thing.get()
+
+    await asyncio.sleep(0.06)
+    ditto.fault = Fault(latency=0.05)
+    probe = asyncio.create_task(thing.get())
+    await asyncio.sleep(0.01)
+    # While the probe is out every other request fails fast
+    with pytest.raises(CircuitOpenError):
+        await thing.get()
+
+    assert await probe is not None
+    assert transitions == [
+        (CircuitState.Closed, CircuitState.Open),
+        (CircuitState.Open, CircuitState.HalfOpen),
+        (CircuitState.HalfOpen, CircuitState.Closed),
+    ]
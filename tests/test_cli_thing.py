@@ -0,0 +1,62 @@
+import json
+from collections.abc import Iterator
+from typing import Any
+from unittest import mock
+
+import pytest
+from mock_ditto import MockDitto
+from typer.testing import CliRunner
+
+from ditto_client.cli import _thing
+
+# Strings kiota's JSON parse node would turn into dates, times, durations and UUIDs
+_TEMPORAL_STRINGS = {
+    "date": "2024-01-01",
+    "time": "12:30",
+    "duration": "P1D",
+    "timestamp": "2024-01-01T08:00:00Z",
+    "uuid": "0b4f5c5e-7c2a-4c5e-9d1e-3a2f6b7c8d9e",
+}
+
+
+@pytest.fixture
+def runner(ditto: MockDitto) -> Iterator[CliRunner]:
+    with mock.patch.object(_thing, "create_ditto_client", ditto.create_client):
+        yield CliRunner()
+
+
+def test_export_import_round_trip(ditto: MockDitto, runner: CliRunner) -> None:
+    things: list[dict[str, Any]] = [
+        {
+            "thingId": f"org.acme:device-{index}",
+            "policyId": "org.acme:policy",
+            "attributes": {**_TEMPORAL_STRINGS, "index": index, "ratio": 0.5, "tags": ["a", "b"], "none": None},
+            "features": {"clock": {"properties": dict(_TEMPORAL_STRINGS)}},
+        }
+        for index in range(3)
+    ]
+    for thing in things:
+        ditto.put_thing(thing)
+
+    exported = runner.invoke(_thing.thing_app, ["export", "-"])
+    assert exported.exit_code == 0, exported.output
+    lines = [json.loads(line) for line in exported.stdout.splitlines() if line.startswith("{")]
+    assert sorted(lines, key=lambda thing: thing["thingId"]) == things
+
+    for thing in things:
+        ditto.put_thing({"thingId": thing["thingId"], "policyId": "org.acme:policy"})
+    imported = runner.invoke(_thing.thing_app, ["import", "-"], input=exported.stdout)
+    assert imported.exit_code == 0, imported.output
+    for thing in things:
+        stored = ditto.thing(thing["thingId"]) or {}
+        assert {key: value for key, value in stored.items() if not key.startswith("_")} == thing
+
+
+def test_import_reports_unreadable_lines(ditto: MockDitto, runner: CliRunner) -> None:
+    lines = ['{"thingId": "org.acme:a"}', "not json", '{"attributes": {}}', '{"thingId": "org.acme:b"}']
+
+    result = runner.invoke(_thing.thing_app, ["import", "-"], input="\n".join(lines))
+
+    assert result.exit_code == 1
+    assert "line 2" in result.output and "line 3" in result.output
+    assert ditto.thing_count == 2
@@ -0,0 +1,55 @@
+import httpx
+import pytest
+from mock_ditto import Fault, MockDitto
+
+BASE_URL = "http://localhost:8080"
+
+
+@pytest.mark.asyncio
+async def test_things_round_trip_with_etags(ditto: MockDitto) -> None:
+    async with httpx.AsyncClient(transport=ditto.transport(), base_url=BASE_URL) as client:
+        created = await client.put("/api/2/things/org.acme:device-1", json={"attributes": {"on": True}})
+        assert created.status_code == 201
+
+        read = await client.get("/api/2/things/org.acme:device-1")
+        assert read.json()["attributes"] == {"on": True}
+        etag = read.headers["ETag"]
+
+        assert (await client.get("/api/2/things/org.acme:device-1", headers={"If-None-Match": etag})).status_code == 304
+        stale = await client.put(
+            "/api/2/things/org.acme:device-1/attributes/on", json=False, headers={"If-Match": '"rev:0"'}
+        )
+        assert stale.status_code == 412
+
+
+@pytest.mark.asyncio
+async def test_search_and_count(ditto: MockDitto) -> None:
+    ditto.populate(25)
+    async with httpx.AsyncClient(transport=ditto.transport(), base_url=BASE_URL) as client:
+        count = await client.get("/api/2/search/things/count", params={"filter": "lt(attributes/index,10)"})
+        page = await client.get("/api/2/search/things", params={"option": "size(20),sort(-attributes/index)"})
+
+    assert count.json() == 10
+    items = page.json()["items"]
+    assert len(items) == 20 and items[0]["attributes"]["index"] == 24
+    assert "cursor" in page.json()
+
+
+@pytest.mark.asyncio
+async def test_unknown_and_unsupported_routes(ditto: MockDitto) -> None:
+    async with httpx.AsyncClient(transport=ditto.transport(), base_url=BASE_URL) as client:
+        assert (await client.get("/api/2/nothing")).status_code == 404
+        assert (await client.patch("/api/2/search/things")).status_code == 405
+
+
+@pytest.mark.asyncio
+async def test_faults_are_reproducible_per_seed() -> None:
+    async def _statuses(seed: int) -> list[int]:
+        ditto = MockDitto(fault=Fault(error_rate=0.3), seed=seed)
+        ditto.populate(1)
+        async with httpx.AsyncClient(transport=ditto.transport(), base_url=BASE_URL) as client:
+            return [(await client.get("/api/2/things/org.acme:device-00000")).status_code for _ in range(50)]
+
+    first = await _statuses(7)
+    assert first == await _statuses(7)
+    assert {200, 503} == set(first)
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from kiota_abstractions.api_error import APIError
+from kiota_http.kiota_client_factory import KiotaClientFactory
+from kiota_http.middleware.retry_handler import RetryHandler
+from mock_ditto import Fault, MockDitto
+
+from ditto_client.search import iter_search_things, scan_search_things
+
+
+def _other_tasks() -> set[asyncio.Task[object]]:
+    return {task for task in asyncio.all_tasks() if task is not asyncio.current_task() and not task.done()}
+
+
+@pytest.mark.asyncio
+async def test_iter_search_things_follows_cursors(ditto: MockDitto) -> None:
+    thing_ids = ditto.populate(45)
+
+    things = [thing async for thing in iter_search_things(ditto.create_client(), page_size=10)]
+
+    assert sorted(thing.thing_id or "" for thing in things) == thing_ids
+
+
+@pytest.mark.asyncio
+async def test_closing_iter_search_things_awaits_the_prefetch(ditto: MockDitto) -> None:
+    ditto.populate(45)
+    ditto.fault = Fault(latency=0.05)
+
+    things = iter_search_things(ditto.create_client(), page_size=10)
+    await anext(things)
+    await things.aclose()
+
+    assert not _other_tasks()
+
+
+@pytest.mark.asyncio
+async def test_scan_search_things_merges_shards(ditto: MockDitto) -> None:
+    thing_ids = ditto.populate(30, namespace="org.acme") + ditto.populate(30, namespace="org.other")
+
+    things = scan_search_things(
+        ditto.create_client(),
+        namespaces=["org.acme", "org.other"],
+        thing_id_bounds=["org.acme:device-00010"],
+        page_size=10,
+    )
+
+    assert sorted([thing.thing_id or "" async for thing in things]) == sorted(thing_ids)
+
+
+@pytest.mark.asyncio
+async def test_closing_scan_early_does_not_hang(ditto: MockDitto) -> None:
+    ditto.populate(200, namespace="org.acme")
+    ditto.populate(200, namespace="org.other")
+
+    things = scan_search_things(
+        ditto.create_client(), namespaces=["org.acme", "org.other"], page_size=10, concurrency=2
+    )
+    async for _ in things:
+        break
+    await asyncio.wait_for(things.aclose(), 2.0)
+
+    assert not _other_tasks()
+
+
+@pytest.mark.asyncio
+async def test_scan_search_things_raises_worker_errors(ditto: MockDitto) -> None:
+    ditto.populate(200, namespace="org.acme")
+    ditto.populate(200, namespace="org.other")
+    client = ditto.create_client(
+        [m for m in KiotaClientFactory.get_default_middleware(None) if not isinstance(m, RetryHandler)]
+    )
+    things = scan_search_things(client, namespaces=["org.acme", "org.other"], page_size=10, concurrency=2)
+    # Counting the shards still works, the scan itself fails
+    ditto.route_faults["/api/2/search/things"] = Fault(error_rate=1.0)
+
+    async def _consume() -> None:
+        async for _ in things:
+            pass
+
+    with pytest.raises(APIError):
+        await asyncio.wait_for(_consume(), 2.0)
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from kiota_abstractions.api_error import APIError
+from kiota_http.kiota_client_factory import KiotaClientFactory
+from kiota_http.middleware.retry_handler import RetryHandler
+from mock_ditto import Fault, MockDitto
+
+from ditto_client.endpoints import EndpointFamily
+from ditto_client.throttle import AdaptiveConcurrencyLimiter, ThrottleMiddleware
+
+
+async def _request(limiter: AdaptiveConcurrencyLimiter, latency: float, **outcome: bool) -> None:
+    started_at = await limiter.acquire()
+    await asyncio.sleep(latency)
+    limiter.release(started_at, **outcome)
+
+
+@pytest.mark.asyncio
+async def test_fast_rejection_does_not_become_the_baseline() -> None:
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10)
+    await _request(limiter, 0.01)
+    baseline = limiter.min_latency
+
+    await _request(limiter, 0.0, congested=True, succeeded=False)
+    assert limiter.min_latency == baseline
+    limit = limiter.limit
+
+    for _ in range(10):
+        await _request(limiter, 0.012)
+    assert limiter.limit == limit
+
+
+@pytest.mark.asyncio
+async def test_baseline_expires_with_its_window() -> None:
+    limiter = AdaptiveConcurrencyLimiter(baseline_window=0.05)
+    await _request(limiter, 0.001)
+    assert limiter.min_latency is not None
+
+    await asyncio.sleep(0.1)
+    assert limiter.min_latency is None
+    # Without a baseline a slower request is not congested and starts a new one
+    await _request(limiter, 0.02)
+    assert limiter.min_latency is not None and limiter.min_latency >= 0.02
+
+
+@pytest.mark.asyncio
+async def test_throttle_keeps_its_limit_after_a_fast_503(ditto: MockDitto) -> None:
+    ditto.populate(1)
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10)
+    middleware = [
+        ThrottleMiddleware(concurrency_limits={EndpointFamily.Things: limiter}),
+        *(m for m in KiotaClientFactory.get_default_middleware(None) if not isinstance(m, RetryHandler)),
+    ]
+    thing = ditto.create_client(middleware).api.two.things.by_thing_id("org.acme:device-00000")
+
+    ditto.fault = Fault(latency=0.01)
+    await thing.get()
+    ditto.fault = Fault(error_rate=1.0)
+    with pytest.raises(APIError):
+        await thing.get()
+    limit = limiter.limit
+
+    ditto.fault = Fault(latency=0.012)
+    for _ in range(10):
+        await thing.get()
+    assert limiter.limit == limit
@@ -0,0 +1,85 @@
+import asyncio
+
+import httpx
+import pytest
+
+from ditto_client import token_auth
+from ditto_client.token_auth import BearerTokenProvider, client_credentials_token_fetcher
+
+TOKEN_URL = "https://auth.example.com/oauth/token"
+
+
+class StubTokenEndpoint:
+    def __init__(self, expires_in: float, delay: float = 0.0) -> None:
+        self.expires_in = expires_in
+        self.delay = delay
+        self.calls = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return httpx.Response(200, json={"access_token": f"token-{self.calls}", "expires_in": self.expires_in})
+
+    def provider(self, refresh_margin: float = token_auth.DEFAULT_REFRESH_MARGIN) -> BearerTokenProvider:
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+        fetcher = client_credentials_token_fetcher(TOKEN_URL, "client", "secret", http_client=http_client)
+        return BearerTokenProvider(fetcher, refresh_margin=refresh_margin)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_fetch() -> None:
+    endpoint = StubTokenEndpoint(expires_in=300, delay=0.01)
+    provider = endpoint.provider()
+
+    tokens = await asyncio.gather(*(provider.get_token() for _ in range(50)))
+
+    assert set(tokens) == {"token-1"}
+    assert endpoint.calls == 1
+    await provider.aclose()
+
+
+@pytest.mark.asyncio
+async def test_token_shorter_than_margin_is_not_refreshed_in_a_loop() -> None:
+    endpoint = StubTokenEndpoint(expires_in=30)
+    provider = endpoint.provider(refresh_margin=60.0)
+
+    assert await provider.get_token() == "token-1"
+    await asyncio.sleep(0.5)
+    for _ in range(100):
+        assert await provider.get_token() == "token-1"
+
+    assert endpoint.calls == 1
+    await provider.aclose()
+
+
+@pytest.mark.asyncio
+async def test_idle_refresh_halfway_through_short_lifetime(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(token_auth, "MIN_REFRESH_DELAY", 0.01)
+    endpoint = StubTokenEndpoint(expires_in=0.4)
+    provider = endpoint.provider(refresh_margin=60.0)
+
+    assert await provider.get_token() == "token-1"
+    # Refreshed by the timer after ~0.2s, well before the token expires
+    await asyncio.sleep(0.3)
+
+    assert endpoint.calls == 2
+    assert await provider.get_token() == "token-2"
+    await provider.aclose()
+
+
+@pytest.mark.asyncio
+async def test_token_within_margin_is_used_while_refreshing() -> None:
+    endpoint = StubTokenEndpoint(expires_in=300, delay=0.05)
+    provider = endpoint.provider(refresh_margin=60.0)
+    await provider.get_token()
+
+    endpoint.expires_in = 3600
+    # Move the refresh point into the past, as if 4 of the 5 minutes had gone by
+    provider._refresh_at = 0.0
+    tokens = await asyncio.gather(*(provider.get_token() for _ in range(10)))
+    assert set(tokens) == {"token-1"}
+
+    await asyncio.sleep(0.1)
+    assert endpoint.calls == 2
+    assert await provider.get_token() == "token-2"
+    await provider.aclose()
@@ -0,0 +1,205 @@
+import asyncio
+import json
+from collections.abc import AsyncGenerator
+from typing import Any, Optional
+
+import pytest
+import pytest_asyncio
+
+from ditto_client.basic_auth import BasicAuthProvider
+from ditto_client.generated.models.advanced_error import AdvancedError
+from ditto_client.ws import DittoProtocolMessage, DittoWebSocketClient, EventStream, thing_topic
+
+pytest.importorskip("websockets")
+
+from websockets.asyncio.server import Server, ServerConnection, serve  # noqa: E402
+
+
+class DittoWebSocketStandIn:
+    """In-process stand-in for Ditto's ``/ws/2``: answers twin commands from a dict and emits twin events.
+
+    As Ditto does, the event of a modify carries the command's correlation-id; with
+    ``event_before_response`` it is sent ahead of the command response.
+    """
+
+    def __init__(self, *, event_before_response: bool = False) -> None:
+        self.things: dict[str, dict[str, Any]] = {}
+        self.authorization: Optional[str] = None
+        self.event_before_response = event_before_response
+        self._streams: dict[ServerConnection, set[str]] = {}
+        self.events_started = asyncio.Event()
+        self._server: Optional[Server] = None
+
+    @property
+    def url(self) -> str:
+        assert self._server is not None
+        host, port = next(iter(self._server.sockets)).getsockname()[:2]
+        return f"ws://{host}:{port}/ws/2"
+
+    async def start(self) -> None:
+        self._server = await serve(self._handle, "127.0.0.1", 0)
+
+    async def stop(self) -> None:
+        assert self._server is not None
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, connection: ServerConnection) -> None:
+        self.authorization = connection.request.headers.get("Authorization") if connection.request else None
+        self._streams[connection] = set()
+        try:
+            async for frame in connection:
+                assert isinstance(frame, str)
+                if frame.startswith(("START-SEND-", "STOP-SEND-")):
+                    command = frame.partition("?")[0]
+                    stream = command.split("-SEND-", 1)[1]
+                    if command.startswith("START"):
+                        self._streams[connection].add(stream)
+                        self.events_started.set()
+                    else:
+                        self._streams[connection].discard(stream)
+                    await connection.send(f"{command}:ACK")
+                else:
+                    await self._command(connection, DittoProtocolMessage.from_dict(json.loads(frame)))
+        finally:
+            del self._streams[connection]
+
+    async def _command(self, connection: ServerConnection, command: DittoProtocolMessage) -> None:
+        thing_id = command.thing_id or ""
+        action = command.topic.rsplit("/", 1)[-1]
+        headers = {"correlation-id": command.correlation_id}
+
+        if action == "retrieve":
+            thing = self.things.get(thing_id)
+            if thing is None:
+                error = {
+                    "error": "things:thing.notfound",
+                    "message": f"The Thing with ID '{thing_id}' could not be found.",
+                }
+                response = DittoProtocolMessage(command.topic, command.path, error, headers, status=404)
+            else:
+                value = _get(thing, command.path)
+                if command.fields:
+                    value = {key: value[key] for key in command.fields.split(",") if key in value}
+                response = DittoProtocolMessage(command.topic, command.path, value, headers, 200)
+        else:
+            thing = self.things.setdefault(thing_id, {"thingId": thing_id})
+            _set(thing, command.path, command.value)
+            response = DittoProtocolMessage(command.topic, command.path, None, headers, status=204)
+            event = DittoProtocolMessage(
+                thing_topic(thing_id, "events", "modified"), command.path, command.value, dict(headers)
+            )
+            if self.event_before_response:
+                await self._publish(event)
+            if command.headers.get("response-required", True):
+                await connection.send(response.to_json())
+            if not self.event_before_response:
+                await self._publish(event)
+            return
+
+        await connection.send(response.to_json())
+
+    async def send_raw(self, frame: str) -> None:
+        for connection in list(self._streams):
+            await connection.send(frame)
+
+    async def _publish(self, event: DittoProtocolMessage) -> None:
+        for connection, streams in list(self._streams.items()):
+            if "EVENTS" in streams:
+                await connection.send(event.to_json())
+
+
+def _get(thing: dict[str, Any], path: str) -> Any:
+    value: Any = thing
+    for key in filter(None, path.split("/")):
+        value = value[key]
+    return value
+
+
+def _set(thing: dict[str, Any], path: str, value: Any) -> None:
+    *parents, last = path.strip("/").split("/")
+    for key in parents:
+        thing = thing.setdefault(key, {})
+    thing[last] = value
+
+
+@pytest_asyncio.fixture
+async def stand_in() -> AsyncGenerator[DittoWebSocketStandIn, None]:
+    server = DittoWebSocketStandIn()
+    await server.start()
+    yield server
+    await server.stop()
+
+
+@pytest_asyncio.fixture
+async def ws(stand_in: DittoWebSocketStandIn) -> AsyncGenerator[DittoWebSocketClient, None]:
+    async with DittoWebSocketClient(stand_in.url, BasicAuthProvider("ditto", "ditto")) as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_modify_and_retrieve(stand_in: DittoWebSocketStandIn, ws: DittoWebSocketClient) -> None:
+    await ws.modify("org.acme:device-1", "/features/temperature/properties/value", 21.5)
+
+    assert await ws.retrieve("org.acme:device-1", "/features/temperature/properties/value") == 21.5
+    assert stand_in.authorization == BasicAuthProvider("ditto", "ditto").auth_header
+
+
+@pytest.mark.asyncio
+async def test_error_response_raises(ws: DittoWebSocketClient) -> None:
+    with pytest.raises(AdvancedError) as error:
+        await ws.retrieve("org.acme:missing")
+
+    assert error.value.response_status_code == 404
+    assert error.value.error == "things:thing.notfound"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_commands_are_correlated(ws: DittoWebSocketClient) -> None:
+    thing_ids = [f"org.acme:device-{index}" for index in range(500)]
+
+    await asyncio.gather(*(ws.modify(thing_id, "/attributes/id", thing_id) for thing_id in thing_ids))
+    values = await asyncio.gather(*(ws.retrieve(thing_id, "/attributes/id") for thing_id in thing_ids))
+
+    assert values == thing_ids
+    assert ws.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_event_ahead_of_response_goes_to_subscribers(
+    stand_in: DittoWebSocketStandIn, ws: DittoWebSocketClient
+) -> None:
+    stand_in.event_before_response = True
+    events = ws.subscribe(EventStream.TwinEvents)
+    next_event = asyncio.ensure_future(anext(events))
+    await asyncio.wait_for(stand_in.events_started.wait(), 1.0)
+
+    message = DittoProtocolMessage(thing_topic("org.acme:device-1", "commands", "modify"), "/attributes/on", True)
+    response = await ws.send_command(message)
+
+    assert response is not None and response.status == 204
+    event = await asyncio.wait_for(next_event, 1.0)
+    assert event.topic.endswith("/things/twin/events/modified")
+    assert event.correlation_id == message.correlation_id
+    await events.aclose()
+
+
+@pytest.mark.asyncio
+async def test_retrieve_sends_field_selector(ws: DittoWebSocketClient) -> None:
+    await ws.modify("org.acme:device-1", "/attributes", {"on": True})
+    await ws.modify("org.acme:device-1", "/features", {"lamp": {"properties": {"on": True}}})
+
+    assert await ws.retrieve("org.acme:device-1", fields="thingId,attributes") == {
+        "thingId": "org.acme:device-1",
+        "attributes": {"on": True},
+    }
+
+
+@pytest.mark.asyncio
+async def test_malformed_frames_are_skipped(stand_in: DittoWebSocketStandIn, ws: DittoWebSocketClient) -> None:
+    await ws.modify("org.acme:device-1", "/attributes/on", True)
+
+    for frame in ("not json", "[1, 2]", "42"):
+        await stand_in.send_raw(frame)
+
+    assert await asyncio.wait_for(ws.retrieve("org.acme:device-1", "/attributes/on"), 1.0) is True